@@ -0,0 +1,50 @@
+import argparse
+import json
+import sys
+
+def compare(baseline: dict, current: dict, threshold: float):
+    """
+    Compare two benchmark reports.
+
+    Returns:
+        List of (name, baseline value, current value, relative change, regressed)
+    """
+    rows = []
+    base_results = baseline['results']
+    for name, result in sorted(current['results'].items()):
+        if name not in base_results:
+            continue
+        before = base_results[name]['value']
+        after = result['value']
+        change = (after - before) / before if before else 0.0
+        # Normalize so that a positive change is always an improvement
+        improvement = change if result['higher_is_better'] else -change
+        rows.append((name, before, after, change, improvement < -threshold))
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare two benchmark reports and flag regressions.')
+    parser.add_argument('baseline', help='Report of the reference commit')
+    parser.add_argument('current', help='Report of the commit under test')
+    parser.add_argument('--threshold', type=float, default=0.10, help='Relative slowdown treated as a regression')
+    args = parser.parse_args()
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+
+    rows = compare(baseline, current, args.threshold)
+    regressions = 0
+    for name, before, after, change, regressed in rows:
+        unit = current['results'][name]['unit']
+        marker = '✗' if regressed else ' '
+        print(f"{marker} {name:45s} {before:12.3f} -> {after:12.3f} {unit:8s} ({change:+.1%})")
+        regressions += regressed
+
+    print(f"\n{regressions} regression(s) beyond {args.threshold:.0%} "
+          f"({baseline['meta'].get('commit')} -> {current['meta'].get('commit')})")
+    sys.exit(1 if regressions else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+import argparse
+import json
+import multiprocessing
+import os
+import subprocess
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BACKEND_DIR)
+
+MODES = ('private', 'shared')
+
+def memory_usage(pid='self'):
+    """
+    Resident memory of a process in MB from /proc/<pid>/smaps_rollup.
+
+    - rss: all resident pages, shared ones included
+    - pss: shared pages divided between the processes mapping them
+    - uss: pages private to the process (what a worker really costs)
+    """
+    fields = {}
+    with open(f'/proc/{pid}/smaps_rollup') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 2 and parts[0].endswith(':') and parts[1].isdigit():
+                fields[parts[0][:-1]] = int(parts[1]) / 1024.0
+    return {
+        'rss': fields.get('Rss', 0.0),
+        'pss': fields.get('Pss', 0.0),
+        'uss': fields.get('Private_Clean', 0.0) + fields.get('Private_Dirty', 0.0),
+    }
+
+def _worker(pipeline, texts, repeat, barrier, results, done):
+    for _ in range(repeat):
+        pipeline.analyze_batch(texts)
+    # Measure once every worker has run inference, while all are alive
+    barrier.wait()
+    results.put(memory_usage())
+    done.wait()
+
+def measure_workers(workers, repeat):
+    """
+    Load the pipeline, fork ``workers`` children like the Celery prefork
+    pool, run inference in each and return their memory usage.
+    """
+    from benchmarks.run import load_texts
+    from models.nlp_pipeline import NLPPipeline
+
+    pipeline = NLPPipeline()
+    texts = [text for text in load_texts() if text]
+    parent = memory_usage()
+
+    context = multiprocessing.get_context('fork')
+    barrier = context.Barrier(workers)
+    results = context.Queue()
+    done = context.Event()
+    processes = [
+        context.Process(target=_worker, args=(pipeline, texts, repeat, barrier, results, done))
+        for _ in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    per_worker = [results.get() for _ in processes]
+    done.set()
+    for process in processes:
+        process.join()
+    return {'parent': parent, 'workers': per_worker}
+
+def compare_modes(workers, repeat, weights_dir=None):
+    """
+    Measure private (from_pretrained) and shared (memory-mapped) weights,
+    each in a fresh interpreter so the two loads cannot affect each other.
+    """
+    weights_dir = weights_dir or tempfile.mkdtemp(prefix='hoaxalyzer-weights-')
+    reports = {}
+    for mode in MODES:
+        env = dict(os.environ)
+        env.pop('MODEL_WEIGHTS_DIR', None)
+        if mode == 'shared':
+            env['MODEL_WEIGHTS_DIR'] = weights_dir
+            if not os.listdir(weights_dir):
+                # Export the weight files first so the conversion is not measured
+                _run(env, 1, 0)
+        reports[mode] = _run(env, workers, repeat)
+    return reports
+
+def _run(env, workers, repeat):
+    output = subprocess.run(
+        [sys.executable, '-m', 'benchmarks.memory', '--workers', str(workers), '--repeat', str(repeat)],
+        cwd=BACKEND_DIR,
+        env=env,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description='Per-worker memory of forked inference workers.')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--repeat', type=int, default=2, help='Inference passes per worker before measuring')
+    args = parser.parse_args()
+    # Last line of stdout is the report (compare_modes parses it)
+    print(json.dumps(measure_workers(args.workers, args.repeat)))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,302 @@
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BACKEND_DIR)
+
+from benchmarks.fixture_server import FIXTURES_DIR, FixtureServer
+from benchmarks.tiny_models import build_tiny_model
+
+ARTICLE_FIXTURES = ['article_politik.html', 'article_kesehatan.html', 'article_hoaks.html']
+BENCHMARKS = ['preprocess', 'scrape', 'nlp', 'memory', 'crud', 'e2e']
+
+def configure_environment(args, workdir):
+    """
+    Point the backend at offline resources. Must run before any backend
+    module is imported, since they read their configuration at import time.
+    """
+    if not args.real_models:
+        model_dir = build_tiny_model(args.model_dir)
+        os.environ['SENTIMENT_MODEL'] = model_dir
+        os.environ['HOAX_MODEL'] = model_dir
+    if args.database_url:
+        os.environ['DATABASE_URL'] = args.database_url
+    else:
+        os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    os.environ['CELERY_BROKER_URL'] = 'memory://'
+    os.environ['CELERY_RESULT_BACKEND'] = 'cache+memory://'
+
+def summarize(samples, scale=1000.0):
+    """Summary statistics of a list of durations in seconds (reported in ms)."""
+    ordered = sorted(samples)
+    pick = lambda q: ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+    return {
+        'n': len(ordered),
+        'mean': sum(ordered) / len(ordered) * scale,
+        'p50': pick(0.5) * scale,
+        'p95': pick(0.95) * scale,
+        'p99': pick(0.99) * scale,
+        'min': ordered[0] * scale,
+        'max': ordered[-1] * scale,
+    }
+
+def timed(fn, repeat, warmup=1):
+    """Run ``fn`` ``warmup`` + ``repeat`` times and return the timed durations."""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+def latency(samples):
+    stats = summarize(samples)
+    return {'value': stats['p50'], 'unit': 'ms', 'higher_is_better': False, 'stats': stats}
+
+def throughput(items, samples):
+    stats = summarize(samples)
+    return {
+        'value': items / (stats['p50'] / 1000.0),
+        'unit': 'items/s',
+        'higher_is_better': True,
+        'stats': stats,
+    }
+
+def load_texts():
+    from bs4 import BeautifulSoup
+
+    with open(os.path.join(FIXTURES_DIR, 'tweets.json'), encoding='utf-8') as f:
+        tweets = json.load(f)
+    texts = [tweet['text'] for tweet in tweets]
+    for name in ARTICLE_FIXTURES:
+        with open(os.path.join(FIXTURES_DIR, name), encoding='utf-8') as f:
+            soup = BeautifulSoup(f.read(), 'html.parser')
+        texts.append(' '.join(p.get_text().strip() for p in soup.find_all('p')))
+    return texts
+
+def bench_preprocess(args):
+    from services.preprocessor import preprocess_text
+
+    texts = load_texts()
+    samples = timed(lambda: [preprocess_text(text) for text in texts], args.repeat)
+    return {'preprocess_text': throughput(len(texts), samples)}
+
+def bench_scrape(args, server):
+    from services.scraper import scrape_article
+
+    results = {}
+    for name in ARTICLE_FIXTURES:
+        url = server.url(name)
+        results[f'scrape_article.{name}'] = latency(timed(lambda: scrape_article(url), args.repeat))
+    return results
+
+def bench_nlp(args):
+    import torch
+    from models.nlp_pipeline import NLPPipeline
+
+    torch.manual_seed(args.seed)
+    pipeline = NLPPipeline()
+    texts = [text for text in load_texts() if text]
+    long_text = ' '.join(texts)
+
+    results = {}
+
+    # Public per-item API
+    def score_all():
+        for text in texts:
+            pipeline.analyze_sentiment(text)
+            pipeline.classify_hoax(text)
+    results['pipeline.per_item'] = throughput(len(texts), timed(score_all, args.repeat))
+
+    # Batched API; the token cache is cleared so tokenization is measured too
+    def score_batch():
+        pipeline._token_cache.clear()
+        pipeline.analyze_batch(texts)
+    results['pipeline.analyze_batch'] = throughput(len(texts), timed(score_batch, args.repeat))
+    results['pipeline.analyze_batch.cached_tokens'] = throughput(
+        len(texts), timed(lambda: pipeline.analyze_batch(texts), args.repeat)
+    )
+
+    # Raw model throughput across batch sizes and sequence lengths
+    for seq_len in args.seq_lengths:
+        for batch_size in args.batch_sizes:
+            batch = [long_text] * batch_size
+
+            def tokenize():
+                return pipeline.sentiment_tokenizer(
+                    batch,
+                    return_tensors='pt',
+                    truncation=True,
+                    max_length=seq_len,
+                    padding='max_length'
+                ).to(pipeline.device)
+
+            inputs = tokenize()
+
+            def forward():
+                with torch.no_grad():
+                    pipeline.sentiment_model(**inputs)
+                    pipeline.hoax_model(**inputs)
+
+            key = f'bs{batch_size}.len{seq_len}'
+            results[f'tokenize.{key}'] = throughput(batch_size, timed(tokenize, args.repeat))
+            results[f'forward.{key}'] = throughput(batch_size, timed(forward, args.repeat))
+
+    return results
+
+def bench_memory(args):
+    from benchmarks.memory import compare_modes
+
+    reports = compare_modes(args.workers, repeat=2)
+    results = {}
+    for mode, report in reports.items():
+        for metric in ('rss', 'pss', 'uss'):
+            values = [worker[metric] for worker in report['workers']]
+            results[f'memory.{mode}.{metric}_per_worker'] = {
+                'value': sum(values) / len(values),
+                'unit': 'MB',
+                'higher_is_better': False,
+                'stats': {'n': len(values), 'min': min(values), 'max': max(values), 'parent': report['parent'][metric]},
+            }
+    return results
+
+def bench_crud(args):
+    from database.models import create_tables
+    from database.crud import create_analysis_job, update_job_status, save_analysis_results, get_job_results
+
+    create_tables()
+    payload = {
+        'articles': [
+            {'article_id': str(i), 'content': 'x' * 500, 'sentiment': {'label': 'neutral', 'score': 0.5}}
+            for i in range(50)
+        ],
+    }
+
+    job_ids = []
+
+    def create():
+        job_id = str(uuid.uuid4())
+        job_ids.append(job_id)
+        create_analysis_job(job_id, 'topic', 'benchmark')
+
+    results = {'crud.create_analysis_job': latency(timed(create, args.repeat))}
+
+    updates = iter(job_ids * 2)
+    results['crud.update_job_status'] = latency(
+        timed(lambda: update_job_status(next(updates), 'processing', 50), args.repeat)
+    )
+
+    saves = iter(job_ids)
+    results['crud.save_analysis_results'] = latency(
+        timed(lambda: save_analysis_results(next(saves), payload), args.repeat - 1)
+    )
+    results['crud.get_job_results'] = latency(
+        timed(lambda: get_job_results(job_ids[0]), args.repeat)
+    )
+    return results
+
+def bench_e2e(args, server):
+    from database.models import create_tables
+    from database.crud import get_job_status
+    import celery_worker
+
+    create_tables()
+    random.seed(args.seed)
+
+    def run(task, query):
+        job_id = str(uuid.uuid4())
+        task(job_id, query)
+        status = get_job_status(job_id)
+        if not status or status['status'] != 'completed':
+            raise RuntimeError(f'{task.name} did not complete for {query!r}')
+
+    url = server.url(ARTICLE_FIXTURES[0])
+    return {
+        'analyze_url_task': latency(timed(lambda: run(celery_worker.analyze_url_task, url), args.repeat)),
+        'analyze_topic_task': latency(timed(lambda: run(celery_worker.analyze_topic_task, 'banjir jakarta'), args.repeat)),
+    }
+
+def git_revision():
+    try:
+        commit = subprocess.check_output(['git', 'rev-parse', 'HEAD'], cwd=BACKEND_DIR, text=True).strip()
+        dirty = bool(subprocess.check_output(['git', 'status', '--porcelain'], cwd=BACKEND_DIR, text=True).strip())
+        return {'commit': commit, 'dirty': dirty}
+    except Exception:
+        return {'commit': None, 'dirty': None}
+
+def main():
+    parser = argparse.ArgumentParser(description='Offline benchmark suite for the Hoaxalyzer analysis pipeline.')
+    parser.add_argument('--output', default='bench_results.json', help='Path of the JSON report')
+    parser.add_argument('--only', nargs='+', choices=BENCHMARKS, default=BENCHMARKS, help='Benchmarks to run')
+    parser.add_argument('--repeat', type=int, default=5, help='Timed repetitions per measurement')
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 8, 32])
+    parser.add_argument('--seq-lengths', type=int, nargs='+', default=[64, 128, 512])
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=4, help='Forked workers in the memory benchmark')
+    parser.add_argument('--model-dir', default=os.path.join(tempfile.gettempdir(), 'hoaxalyzer-tiny-indobert'),
+                        help='Where the tiny random model is built (reused across runs)')
+    parser.add_argument('--real-models', action='store_true',
+                        help='Use SENTIMENT_MODEL / HOAX_MODEL from the environment instead of the tiny model')
+    parser.add_argument('--database-url', help='Database to benchmark crud against (default: temporary SQLite)')
+    args = parser.parse_args()
+    args.repeat = max(args.repeat, 2)
+
+    workdir = tempfile.mkdtemp(prefix='hoaxalyzer-bench-')
+    configure_environment(args, workdir)
+
+    import torch
+    import transformers
+
+    results = {}
+    with FixtureServer() as server:
+        for name in args.only:
+            print(f"Running {name} benchmarks...")
+            start = time.perf_counter()
+            if name == 'preprocess':
+                results.update(bench_preprocess(args))
+            elif name == 'scrape':
+                results.update(bench_scrape(args, server))
+            elif name == 'nlp':
+                results.update(bench_nlp(args))
+            elif name == 'memory':
+                results.update(bench_memory(args))
+            elif name == 'crud':
+                results.update(bench_crud(args))
+            elif name == 'e2e':
+                results.update(bench_e2e(args, server))
+            print(f"✓ {name} done in {time.perf_counter() - start:.1f}s")
+
+    report = {
+        'meta': {
+            **git_revision(),
+            'timestamp': datetime.utcnow().isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'torch': torch.__version__,
+            'transformers': transformers.__version__,
+            'models': 'real' if args.real_models else 'tiny',
+            'database': os.environ['DATABASE_URL'].split(':', 1)[0],
+            'repeat': args.repeat,
+            'seed': args.seed,
+        },
+        'results': results,
+    }
+
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"✓ Report written to {args.output}")
+
+if __name__ == "__main__":
+    main()
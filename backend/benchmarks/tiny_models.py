@@ -0,0 +1,65 @@
+import glob
+import json
+import os
+import re
+
+from benchmarks.fixture_server import FIXTURES_DIR
+
+SPECIAL_TOKENS = ['[PAD]', '[UNK]', '[CLS]', '[SEP]', '[MASK]']
+
+# Same architecture family as indobenchmark/indobert-base-p1, scaled down so
+# a forward pass is cheap but still exercises the real code paths.
+TINY_CONFIG = {
+    'hidden_size': 64,
+    'num_hidden_layers': 2,
+    'num_attention_heads': 2,
+    'intermediate_size': 128,
+    'max_position_embeddings': 512,
+}
+
+def _fixture_vocabulary():
+    words = set()
+    for path in glob.glob(os.path.join(FIXTURES_DIR, '*')):
+        with open(path, encoding='utf-8') as f:
+            text = f.read()
+        if path.endswith('.json'):
+            text = ' '.join(item['text'] for item in json.loads(text))
+        words.update(re.findall(r'[a-z]+', text.lower()))
+    # Wordpiece fallbacks keep unseen words from collapsing to [UNK]
+    letters = [chr(c) for c in range(ord('a'), ord('z') + 1)]
+    return SPECIAL_TOKENS + sorted(words) + letters + [f'##{c}' for c in letters]
+
+def build_tiny_model(output_dir: str, seed: int = 0) -> str:
+    """
+    Save a randomly initialized IndoBERT-config model and tokenizer.
+
+    The directory can be used as SENTIMENT_MODEL / HOAX_MODEL. Only the
+    encoder is saved, like the base IndoBERT checkpoint, so the pipeline
+    initializes its own classification heads.
+
+    Args:
+        output_dir: Directory to write the model to
+        seed: Random seed for the weights
+
+    Returns:
+        The output directory
+    """
+    import torch
+    from transformers import BertConfig, BertModel, BertTokenizerFast
+
+    if os.path.exists(os.path.join(output_dir, 'config.json')):
+        return output_dir
+
+    os.makedirs(output_dir, exist_ok=True)
+    vocab_file = os.path.join(output_dir, 'vocab.txt')
+    with open(vocab_file, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(_fixture_vocabulary()))
+
+    tokenizer = BertTokenizerFast(vocab_file=vocab_file, do_lower_case=True)
+    tokenizer.save_pretrained(output_dir)
+
+    torch.manual_seed(seed)
+    config = BertConfig(vocab_size=len(tokenizer), **TINY_CONFIG)
+    BertModel(config).save_pretrained(output_dir)
+
+    return output_dir
@@ -1,17 +1,41 @@
-from celery import Celery
+from billiard.process import current_process
+from celery import Celery, signals
+from celery.exceptions import SoftTimeLimitExceeded
+from celery.utils.log import get_task_logger
 import os
+import json
+import redis
+from typing import Optional
 from dotenv import load_dotenv
-from services.scraper import scrape_article
-from services.twitter_crawler import crawl_topic
+
+# Load .env before the modules below read their settings at import time;
+# main.py imports this module ahead of its own services imports
+load_dotenv()
+
+from services.scraper import scrape_article, scrape_articles
+from services.twitter_crawler import crawl_topic, advance_cursors
 from services.preprocessor import preprocess_text
+from services.topic_watch import overall_hoax_label, merge_into_aggregate
+from services.telemetry import JobTimer, job_timer, use_timer, span, record_queue_wait, record_job, prepare_multiproc_dir, start_metrics_server, mark_process_dead
+from services.admission import LANES, MAX_PRIORITY, release
+from services.tuning import configure_process
+from services.archive import ARCHIVE_URL, ARCHIVE_AFTER_DAYS
+from services.url_batch import URL_BATCH_MAX_SIZE, batching_enabled, URL_FETCH_CONCURRENCY, drain_url_batch, release_claims, requeue_stale_claims
+from services.quality import gate_items, quality_summary
 from models.nlp_pipeline import NLPPipeline
 from database.crud import (
     create_analysis_job,
     update_job_status,
-    save_analysis_results
+    save_analysis_results,
+    save_result_timings,
+    get_topic_watch,
+    claim_due_topic_watches,
+    update_topic_watch,
+    add_rollup_items,
+    archive_old_results,
 )
 
-load_dotenv()
+logger = get_task_logger(__name__)
 
 # Initialize Celery
 celery_app = Celery(
@@ -21,197 +45,614 @@ celery_app = Celery(
 )
 
 celery_app.conf.task_routes = {
-    'celery_worker.analyze_url_task': {'queue': 'analysis'},
-    'celery_worker.analyze_topic_task': {'queue': 'analysis'},
+    'celery_worker.analyze_url_task': {'queue': LANES['url']},
+    'celery_worker.analyze_url_batch_task': {'queue': LANES['url']},
+    'celery_worker.analyze_topic_task': {'queue': LANES['topic']},
+    'celery_worker.monitor_topic_task': {'queue': LANES['watch']},
+    'celery_worker.requeue_url_jobs_task': {'queue': LANES['watch']},
+    'celery_worker.archive_results_task': {'queue': LANES['watch']},
+}
+
+# Priority lanes: start workers with `-Q interactive,bulk,watch`; with the
+# 'priority' strategy an idle worker always drains the earlier queues first.
+# Within a queue, lower message priority is served first (Redis semantics),
+# which admission uses to interleave clients. Prefetching a single message
+# with late acks keeps a worker busy on a topic job from holding URL jobs.
+celery_app.conf.broker_transport_options = {
+    'queue_order_strategy': 'priority',
+    'priority_steps': list(range(MAX_PRIORITY + 1)),
+    'sep': ':',
+    # Extra options for other transports (e.g. the load test's filesystem broker)
+    **json.loads(os.getenv('CELERY_BROKER_TRANSPORT_OPTIONS') or '{}'),
+}
+celery_app.conf.worker_prefetch_multiplier = 1
+celery_app.conf.task_acks_late = True
+
+# Task time limits in seconds; the soft limit marks the job failed cleanly
+# (helpers that swallow errors re-raise SoftTimeLimitExceeded), the hard
+# limit kills the worker process if the task ignores it
+URL_SOFT_TIME_LIMIT = int(os.getenv('URL_SOFT_TIME_LIMIT', '60'))
+URL_TIME_LIMIT = int(os.getenv('URL_TIME_LIMIT', '90'))
+# A batch fetches concurrently and shares one forward pass, but explains
+# and saves each job in turn
+URL_BATCH_SOFT_TIME_LIMIT = URL_SOFT_TIME_LIMIT + 10 * URL_BATCH_MAX_SIZE
+URL_BATCH_TIME_LIMIT = URL_TIME_LIMIT + 10 * URL_BATCH_MAX_SIZE
+# Claimed jobs older than this belong to a batch that was killed
+URL_BATCH_CLAIM_LEASE = URL_BATCH_TIME_LIMIT + 30
+TOPIC_SOFT_TIME_LIMIT = int(os.getenv('TOPIC_SOFT_TIME_LIMIT', '600'))
+TOPIC_TIME_LIMIT = int(os.getenv('TOPIC_TIME_LIMIT', '660'))
+
+ADMITTED_TASKS = {
+    'celery_worker.analyze_url_task': 'url',
+    'celery_worker.analyze_topic_task': 'topic',
 }
 
+# Celery beat only dispatches due watches; each watch has its own interval
+celery_app.conf.beat_schedule = {
+    'run-topic-watches': {
+        'task': 'celery_worker.run_topic_watches_task',
+        'schedule': float(os.getenv('WATCH_POLL_SECONDS', '60')),
+    },
+}
+if batching_enabled():
+    celery_app.conf.beat_schedule['requeue-url-jobs'] = {
+        'task': 'celery_worker.requeue_url_jobs_task',
+        'schedule': 60.0,
+    }
+if ARCHIVE_URL:
+    celery_app.conf.beat_schedule['archive-results'] = {
+        'task': 'celery_worker.archive_results_task',
+        'schedule': float(os.getenv('ARCHIVE_INTERVAL_SECONDS', '3600')),
+    }
+
+# Thread budget per process: workers x torch threads stays within the CPU
+# quota instead of every prefork child using all cores for each matmul
+inference = configure_process()
+celery_app.conf.worker_concurrency = inference['workers']
+
 # Initialize NLP Pipeline
 nlp_pipeline = NLPPipeline()
 
-@celery_app.task(name='celery_worker.analyze_url_task')
-def analyze_url_task(job_id: str, url: str):
+@signals.worker_init.connect
+def start_worker_metrics(**kwargs):
+    """Expose worker metrics for Prometheus from the main worker process."""
+    prepare_multiproc_dir()
+    port = os.getenv('WORKER_METRICS_PORT')
+    if port:
+        start_metrics_server(int(port))
+
+@signals.worker_process_init.connect
+def configure_worker_process(**kwargs):
+    """Re-apply the thread budget (and pinning) in each prefork child."""
+    index = getattr(current_process(), 'index', None)
+    applied = configure_process(index, inference)
+    logger.info("Worker process %s: %s torch threads, cores %s", index, applied['threads'], applied.get('cores', 'any'))
+
+@signals.worker_process_shutdown.connect
+def cleanup_worker_metrics(pid=None, **kwargs):
+    mark_process_dead(pid or os.getpid())
+
+@signals.task_postrun.connect
+def release_admission(task=None, args=None, kwargs=None, **extra):
+    """Free the client's in-flight slot once an admitted job has finished."""
+    query_type = ADMITTED_TASKS.get(task.name if task else None)
+    if query_type and args:
+        release(query_type, (kwargs or {}).get('client_id'), args[0])
+
+@celery_app.task(
+    name='celery_worker.analyze_url_task',
+    soft_time_limit=URL_SOFT_TIME_LIMIT,
+    time_limit=URL_TIME_LIMIT,
+)
+def analyze_url_task(job_id: str, url: str, enqueued_at: Optional[float] = None, client_id: Optional[str] = None):
     """
     Celery task for analyzing a single URL.
     """
-    try:
-        # Create job record
-        create_analysis_job(job_id, 'url', url)
-        update_job_status(job_id, 'processing', 10)
-        
-        # Step 1: Scrape article
-        article_data = scrape_article(url)
-        if not article_data:
-            update_job_status(job_id, 'failed', 0)
+    with job_timer('analyze_url_task', enqueued_at) as timer:
+        try:
+            # Create job record
+            create_analysis_job(job_id, 'url', url)
+            update_job_status(job_id, 'processing', 10)
+            
+            # Step 1: Scrape article
+            article_data = scrape_article(url)
+            if not article_data:
+                finish_job(timer, job_id, 'failed')
+                return
+            
+            update_job_status(job_id, 'processing', 30)
+            
+            # Step 2: Preprocess text
+            with span('preprocess'):
+                cleaned_text = preprocess_text(article_data['content'])
+            if not is_usable_article(timer, job_id, url, article_data, cleaned_text):
+                return
+            update_job_status(job_id, 'processing', 50)
+            
+            # Step 3: Run NLP analysis
+            sentiment_results, hoax_results, cascade_stats = nlp_pipeline.analyze_batch([cleaned_text])
+            update_job_status(job_id, 'processing', 85)
+            
+            # Step 4: Explain and save results
+            complete_url_job(
+                timer, job_id, url, article_data, cleaned_text,
+                sentiment_results[0], hoax_results[0], cascade_stats
+            )
+            
+        except SoftTimeLimitExceeded:
+            logger.warning("analyze_url_task for job %s exceeded %ss", job_id, URL_SOFT_TIME_LIMIT)
+            finish_job(timer, job_id, 'failed')
+            return
+        except Exception:
+            logger.exception("Error in analyze_url_task for job %s", job_id)
+            finish_job(timer, job_id, 'failed')
             return
         
-        update_job_status(job_id, 'processing', 30)
-        
-        # Step 2: Preprocess text
-        cleaned_text = preprocess_text(article_data['content'])
-        update_job_status(job_id, 'processing', 50)
-        
-        # Step 3: Run NLP analysis
-        sentiment_result = nlp_pipeline.analyze_sentiment(cleaned_text)
-        update_job_status(job_id, 'processing', 70)
-        
-        hoax_result = nlp_pipeline.classify_hoax(cleaned_text)
-        update_job_status(job_id, 'processing', 85)
+        remember_url_claim(job_id, url, article_data, cleaned_text, hoax_results[0])
+
+@celery_app.task(
+    name='celery_worker.analyze_url_batch_task',
+    soft_time_limit=URL_BATCH_SOFT_TIME_LIMIT,
+    time_limit=URL_BATCH_TIME_LIMIT,
+)
+def analyze_url_batch_task():
+    """
+    Celery task for analyzing a batch of pending URL jobs.
+    
+    Claims up to URL_BATCH_MAX_SIZE jobs parked by the API (waiting at most
+    URL_BATCH_MAX_WAIT_MS for the batch to fill), fetches them concurrently
+    and scores them in one batched forward pass; each job still gets its own
+    row, explanation, status and timings.
+    """
+    with job_timer('analyze_url_batch_task') as batch_timer:
+        # Per-job stages go to each job's own timer; the shared fetch and
+        # forward passes are stored once per job as the 'batch' timings
+        jobs, timers, pending = [], {}, {}
+        try:
+            requeue_stale_url_jobs()
+            jobs = drain_url_batch()
+            if not jobs:
+                return
+            timers = {
+                job['job_id']: JobTimer(batch_timer.task, record_queue_wait(batch_timer.task, job['enqueued_at']))
+                for job in jobs
+            }
+            pending = {job['job_id']: job for job in jobs}
+            
+            for job in jobs:
+                update_job_status(job['job_id'], 'processing', 10)
+            
+            # Step 1: Scrape all articles concurrently
+            articles = scrape_articles([job['url'] for job in jobs], max_workers=URL_FETCH_CONCURRENCY)
+            fetched = []
+            for job, article_data in zip(jobs, articles):
+                if article_data:
+                    fetched.append((job, article_data))
+                    update_job_status(job['job_id'], 'processing', 30)
+                else:
+                    finish_job(timers[job['job_id']], job['job_id'], 'failed')
+                    pending.pop(job['job_id'])
+            if not fetched:
+                return
+            
+            # Step 2: Preprocess texts and skip unusable ones
+            usable = []
+            for job, article_data in fetched:
+                timer = timers[job['job_id']]
+                with use_timer(timer):
+                    with span('preprocess'):
+                        cleaned_text = preprocess_text(article_data['content'])
+                    if is_usable_article(timer, job['job_id'], job['url'], article_data, cleaned_text):
+                        usable.append((job, article_data, cleaned_text))
+                    else:
+                        pending.pop(job['job_id'])
+            if not usable:
+                return
+            
+            # Step 3: One batched NLP pass for the whole batch
+            sentiment_results, hoax_results, cascade_stats = nlp_pipeline.analyze_batch(
+                [cleaned_text for _, _, cleaned_text in usable]
+            )
+            
+            # Step 4: Fan results out to each job
+            for idx, (job, article_data, cleaned_text) in enumerate(usable):
+                update_job_status(job['job_id'], 'processing', 85)
+                with use_timer(timers[job['job_id']]) as timer:
+                    complete_url_job(
+                        timer, job['job_id'], job['url'], article_data, cleaned_text,
+                        sentiment_results[idx], hoax_results[idx], cascade_stats,
+                        batch={'size': len(jobs), 'timings': batch_timer.to_dict()}
+                    )
+                pending.pop(job['job_id'])
+                remember_url_claim(job['job_id'], job['url'], article_data, cleaned_text, hoax_results[idx])
+            
+        except SoftTimeLimitExceeded:
+            logger.warning("analyze_url_batch_task exceeded %ss with %s jobs left", URL_BATCH_SOFT_TIME_LIMIT, len(pending))
+            for job_id in pending:
+                finish_job(timers[job_id], job_id, 'failed')
+        except Exception:
+            logger.exception("Error in analyze_url_batch_task for jobs %s", list(pending))
+            for job_id in pending:
+                finish_job(timers[job_id], job_id, 'failed')
+        finally:
+            release_claims(list(timers))
+            for job in jobs:
+                release('url', job['client_id'], job['job_id'])
+
+@celery_app.task(name='celery_worker.requeue_url_jobs_task')
+def requeue_url_jobs_task():
+    """
+    Periodic task (Celery beat) that recovers URL jobs claimed by a batch
+    whose worker died, so they are not left pending without any batch.
+    """
+    if requeue_stale_url_jobs():
+        analyze_url_batch_task.apply_async(queue=LANES['url'])
+
+def requeue_stale_url_jobs():
+    """Helper function to park URL jobs held by a dead batch again."""
+    try:
+        requeued = requeue_stale_claims(URL_BATCH_CLAIM_LEASE)
+    except redis.RedisError:
+        logger.exception("Error requeuing claimed URL jobs")
+        return 0
+    if requeued:
+        logger.warning("Requeued %s URL jobs claimed by a batch that did not finish", requeued)
+    return requeued
+
+@celery_app.task(
+    name='celery_worker.analyze_topic_task',
+    soft_time_limit=TOPIC_SOFT_TIME_LIMIT,
+    time_limit=TOPIC_TIME_LIMIT,
+)
+def analyze_topic_task(job_id: str, keyword: str, enqueued_at: Optional[float] = None, client_id: Optional[str] = None):
+    """
+    Celery task for analyzing a topic/keyword.
+    """
+    with job_timer('analyze_topic_task', enqueued_at) as timer:
+        try:
+            # Create job record
+            create_analysis_job(job_id, 'topic', keyword)
+            update_job_status(job_id, 'processing', 10)
+            
+            # Step 1: Crawl data from multiple sources
+            with span('fetch'):
+                crawled_data = crawl_topic(keyword, max_items=50)
+            update_job_status(job_id, 'processing', 30)
+            
+            if not crawled_data:
+                finish_job(timer, job_id, 'failed')
+                return
+            
+            # Step 2: Preprocess all texts and skip unusable ones
+            processed_items = preprocess_items(crawled_data)
+            processed_items, gated_items = gate_items(processed_items, timer.task)
+            if not processed_items:
+                logger.warning("No usable items for job %s: %s", job_id, quality_summary([], gated_items)['reasons'])
+                fail_gated_job(timer, job_id, 'topic', keyword, gated_items)
+                return
+            update_job_status(job_id, 'processing', 50)
+            
+            # Step 3: Batch analysis
+            sentiment_results, hoax_results, cascade_stats = score_items(processed_items)
+            record_rollups(keyword, processed_items, sentiment_results, hoax_results)
+            update_job_status(job_id, 'processing', 80)
+            
+            # Step 4: Aggregate results
+            sentiment_counts = {
+                'positive': sum(1 for s in sentiment_results if s['label'] == 'positive'),
+                'negative': sum(1 for s in sentiment_results if s['label'] == 'negative'),
+                'neutral': sum(1 for s in sentiment_results if s['label'] == 'neutral'),
+            }
+            
+            avg_hoax_prob = sum(h['probability'] for h in hoax_results) / len(hoax_results)
+            
+            # Determine overall sentiment
+            overall_sentiment = max(sentiment_counts, key=sentiment_counts.get)
+            
+            # Determine overall hoax classification
+            overall_hoax = overall_hoax_label(avg_hoax_prob)
+            
+            # Generate explainability for overall classification
+            all_texts = ' '.join([item['cleaned_text'] for item in processed_items])
+            with span('explain'):
+                explainability = nlp_pipeline.explain_classification(
+                    all_texts[:5000],  # Limit text length
+                    {'label': overall_hoax, 'probability': avg_hoax_prob}
+                )
+            
+            update_job_status(job_id, 'processing', 95)
+            
+            # Step 5: Save results
+            results = {
+                'job_id': job_id,
+                'query_type': 'topic',
+                'query_input': keyword,
+                'status': 'completed',
+                'overall_sentiment': overall_sentiment,
+                'sentiment_breakdown': sentiment_counts,
+                'hoax_probability': avg_hoax_prob,
+                'hoax_label': overall_hoax,
+                'articles': [
+                    {
+                        'article_id': f"{job_id}_{idx}",
+                        'source_url': item.get('url', ''),
+                        'title': item.get('title', keyword),
+                        'content': item['text'][:500] + '...',
+                        'author': item.get('author'),
+                        'publication_date': item.get('date'),
+                        'sentiment': sentiment_results[idx],
+                        'hoax_classification': hoax_results[idx],
+                    }
+                    for idx, item in enumerate(processed_items)
+                ],
+                'source_breakdown': aggregate_sources(processed_items, sentiment_results),
+                'top_keywords': nlp_pipeline.extract_keywords(all_texts, top_n=15),
+                'explainability': explainability,
+                'total_items': len(processed_items),
+                'quality': quality_summary(processed_items, gated_items),
+                'cascade': cascade_stats,
+                'analyzed_at': str(datetime.now()),
+                'timings': timer.to_dict(),
+            }
+            
+            save_results(timer, job_id, results)
+            finish_job(timer, job_id, 'completed')
+            
+        except SoftTimeLimitExceeded:
+            logger.warning("analyze_topic_task for job %s exceeded %ss", job_id, TOPIC_SOFT_TIME_LIMIT)
+            finish_job(timer, job_id, 'failed')
+            return
+        except Exception:
+            logger.exception("Error in analyze_topic_task for job %s", job_id)
+            finish_job(timer, job_id, 'failed')
+            return
         
+        # Outside the try: a time limit while indexing must not mark the
+        # completed job failed
+        remember_claims(job_id, processed_items, hoax_results)
+
+@celery_app.task(name='celery_worker.run_topic_watches_task')
+def run_topic_watches_task():
+    """
+    Periodic task (Celery beat) that dispatches due topic watches.
+    """
+    for keyword in claim_due_topic_watches():
+        monitor_topic_task.delay(keyword)
+
+@celery_app.task(
+    name='celery_worker.monitor_topic_task',
+    soft_time_limit=TOPIC_SOFT_TIME_LIMIT,
+    time_limit=TOPIC_TIME_LIMIT,
+)
+def monitor_topic_task(keyword: str):
+    """
+    Celery task for an incremental run of a topic watch.
+    
+    Only items past the stored per-source cursors are crawled and scored,
+    then merged into the watch's rolling aggregate.
+    """
+    with job_timer('monitor_topic_task') as timer:
+        try:
+            run_topic_watch(keyword)
+            record_job(timer.task, 'completed')
+        except Exception:
+            logger.exception("Error in monitor_topic_task for %s", keyword)
+            record_job(timer.task, 'failed')
+
+@celery_app.task(name='celery_worker.archive_results_task')
+def archive_results_task():
+    """
+    Periodic task (Celery beat) that moves old results to the archive store.
+    """
+    try:
+        archived = archive_old_results(ARCHIVE_AFTER_DAYS)
+        if archived:
+            logger.info("Archived %s results older than %s days", archived, ARCHIVE_AFTER_DAYS)
+    except Exception:
+        logger.exception("Error archiving results")
+
+def complete_url_job(timer, job_id, url, article_data, cleaned_text, sentiment_result, hoax_result, cascade_stats, batch=None):
+    """
+    Helper function to explain, save and finish a scored URL job.
+    
+    ``batch`` describes the shared batch (its 'size' and the 'timings' of
+    its fetch and forward passes) when the job was scored in one.
+    """
+    with span('explain'):
         explainability = nlp_pipeline.explain_classification(
             cleaned_text, 
             hoax_result
         )
-        update_job_status(job_id, 'processing', 95)
-        
-        # Step 4: Save results
-        results = {
-            'job_id': job_id,
-            'query_type': 'url',
-            'query_input': url,
-            'status': 'completed',
-            'overall_sentiment': sentiment_result['label'],
-            'sentiment_breakdown': {
-                'positive': 1 if sentiment_result['label'] == 'positive' else 0,
-                'negative': 1 if sentiment_result['label'] == 'negative' else 0,
-                'neutral': 1 if sentiment_result['label'] == 'neutral' else 0,
-            },
-            'hoax_probability': hoax_result['probability'],
-            'hoax_label': hoax_result['label'],
-            'articles': [{
-                'article_id': job_id,
-                'source_url': url,
-                'title': article_data['title'],
-                'content': article_data['content'][:500] + '...',
-                'author': article_data.get('author'),
-                'publication_date': article_data.get('publication_date'),
-                'sentiment': sentiment_result,
-                'hoax_classification': hoax_result,
-            }],
-            'source_breakdown': [{
-                'source': 'Direct URL',
-                'count': 1,
-                'avg_sentiment': sentiment_result['score'],
-            }],
-            'top_keywords': nlp_pipeline.extract_keywords(cleaned_text, top_n=10),
-            'explainability': explainability,
-            'total_items': 1,
-            'analyzed_at': str(datetime.now()),
-        }
-        
+    update_job_status(job_id, 'processing', 95)
+    
+    results = {
+        'job_id': job_id,
+        'query_type': 'url',
+        'query_input': url,
+        'status': 'completed',
+        'overall_sentiment': sentiment_result['label'],
+        'sentiment_breakdown': {
+            'positive': 1 if sentiment_result['label'] == 'positive' else 0,
+            'negative': 1 if sentiment_result['label'] == 'negative' else 0,
+            'neutral': 1 if sentiment_result['label'] == 'neutral' else 0,
+        },
+        'hoax_probability': hoax_result['probability'],
+        'hoax_label': hoax_result['label'],
+        'articles': [{
+            'article_id': job_id,
+            'source_url': url,
+            'title': article_data['title'],
+            'content': article_data['content'][:500] + '...',
+            'author': article_data.get('author'),
+            'publication_date': article_data.get('publication_date'),
+            'sentiment': sentiment_result,
+            'hoax_classification': hoax_result,
+        }],
+        'source_breakdown': [{
+            'source': 'Direct URL',
+            'count': 1,
+            'avg_sentiment': sentiment_result['score'],
+        }],
+        'top_keywords': nlp_pipeline.extract_keywords(cleaned_text, top_n=10),
+        'explainability': explainability,
+        'total_items': 1,
+        'cascade': cascade_stats,
+        'analyzed_at': str(datetime.now()),
+        'timings': timer.to_dict(),
+    }
+    if batch:
+        results['batch_size'] = batch['size']
+        results['timings']['batch'] = batch['timings']
+    
+    save_results(timer, job_id, results)
+    finish_job(timer, job_id, 'completed')
+
+def remember_url_claim(job_id, url, article_data, cleaned_text, hoax_result):
+    """
+    Helper function to add a completed URL job's article to the claim index.
+    Runs outside the job's failure handling, so a time limit while indexing
+    cannot mark the completed job failed.
+    """
+    remember_claims(job_id, [{
+        'text': article_data['content'],
+        'cleaned_text': cleaned_text,
+        'url': url,
+    }], [hoax_result])
+
+def run_topic_watch(keyword: str):
+    """Helper function doing one incremental crawl-score-merge pass of a watch."""
+    watch = get_topic_watch(keyword)
+    if not watch or not watch['active']:
+        return
+    
+    with span('fetch'):
+        new_items = crawl_topic(keyword, max_items=50, cursors=watch['cursors'])
+    if not new_items:
+        update_topic_watch(keyword, watch['cursors'], watch['aggregate'], 0)
+        return
+    
+    # Cursors still advance past gated items, so they are not crawled again
+    processed_items, _ = gate_items(preprocess_items(new_items), 'monitor_topic_task')
+    if not processed_items:
+        update_topic_watch(keyword, advance_cursors(watch['cursors'], new_items), watch['aggregate'], len(new_items))
+        return
+    sentiment_results, hoax_results, _ = score_items(processed_items)
+    record_rollups(keyword, processed_items, sentiment_results, hoax_results)
+    
+    all_texts = ' '.join([item['cleaned_text'] for item in processed_items])
+    aggregate = merge_into_aggregate(
+        watch['aggregate'],
+        processed_items,
+        sentiment_results,
+        hoax_results,
+        nlp_pipeline.extract_keywords(all_texts, top_n=15),
+    )
+    
+    with span('db_write'):
+        update_topic_watch(
+            keyword,
+            advance_cursors(watch['cursors'], new_items),
+            aggregate,
+            len(new_items),
+        )
+
+def save_results(timer, job_id, results):
+    """
+    Helper function to save results. Their timings are written again once
+    the save is done, so the stored breakdown includes db_write.
+    """
+    with span('db_write'):
         save_analysis_results(job_id, results)
-        update_job_status(job_id, 'completed', 100)
-        
-    except Exception as e:
-        print(f"Error in analyze_url_task: {str(e)}")
-        update_job_status(job_id, 'failed', 0)
+    results['timings'].update(timer.to_dict())
+    save_result_timings(job_id, results['timings'])
 
-@celery_app.task(name='celery_worker.analyze_topic_task')
-def analyze_topic_task(job_id: str, keyword: str):
+def finish_job(timer, job_id, status):
+    """Helper function to set the final job status and record job metrics."""
+    update_job_status(job_id, status, 100 if status == 'completed' else 0)
+    record_job(timer.task, status)
+    logger.info("Job %s %s, timings: %s", job_id, status, timer.to_dict())
+
+def is_usable_article(timer, job_id, url, article_data, cleaned_text):
     """
-    Celery task for analyzing a topic/keyword.
+    Helper function to gate a scraped article. An unusable article fails
+    the job with results that only say why (see fail_gated_job).
     """
-    try:
-        # Create job record
-        create_analysis_job(job_id, 'topic', keyword)
-        update_job_status(job_id, 'processing', 10)
-        
-        # Step 1: Crawl data from multiple sources
-        crawled_data = crawl_topic(keyword, max_items=50)
-        update_job_status(job_id, 'processing', 30)
-        
-        if not crawled_data:
-            update_job_status(job_id, 'failed', 0)
-            return
-        
-        # Step 2: Preprocess all texts
-        processed_items = []
-        for item in crawled_data:
-            cleaned_text = preprocess_text(item['text'])
-            processed_items.append({
+    item = {'text': article_data['content'], 'cleaned_text': cleaned_text, 'url': url, 'title': article_data['title']}
+    _, gated = gate_items([item], timer.task)
+    if gated:
+        logger.warning("Article for job %s gated: %s", job_id, gated[0]['quality'])
+        fail_gated_job(timer, job_id, 'url', url, gated)
+        return False
+    return True
+
+def fail_gated_job(timer, job_id, query_type, query_input, gated):
+    """
+    Helper function to fail a job whose input was all gated, saving the
+    gate's reasons as its results so clients can see why.
+    """
+    reasons = quality_summary([], gated)['reasons']
+    results = {
+        'job_id': job_id,
+        'query_type': query_type,
+        'query_input': query_input,
+        'status': 'failed',
+        'error': 'No usable text to analyze: ' + ', '.join(sorted(reasons)),
+        'quality': quality_summary([], gated),
+        'total_items': 0,
+        'analyzed_at': str(datetime.now()),
+        'timings': timer.to_dict(),
+    }
+    if query_type == 'url':
+        results['quality']['reason'] = gated[0]['quality']['reason']
+        results['quality']['language'] = gated[0]['quality']['language']
+    save_results(timer, job_id, results)
+    finish_job(timer, job_id, 'failed')
+
+def preprocess_items(items):
+    """Helper function to attach cleaned text to crawled items."""
+    with span('preprocess'):
+        return [
+            {
                 **item,
-                'cleaned_text': cleaned_text
-            })
-        
-        update_job_status(job_id, 'processing', 50)
-        
-        # Step 3: Batch analysis
-        sentiment_results = []
-        hoax_results = []
-        
-        for item in processed_items:
-            sentiment = nlp_pipeline.analyze_sentiment(item['cleaned_text'])
-            hoax = nlp_pipeline.classify_hoax(item['cleaned_text'])
-            
-            sentiment_results.append(sentiment)
-            hoax_results.append(hoax)
-        
-        update_job_status(job_id, 'processing', 80)
-        
-        # Step 4: Aggregate results
-        sentiment_counts = {
-            'positive': sum(1 for s in sentiment_results if s['label'] == 'positive'),
-            'negative': sum(1 for s in sentiment_results if s['label'] == 'negative'),
-            'neutral': sum(1 for s in sentiment_results if s['label'] == 'neutral'),
-        }
-        
-        avg_hoax_prob = sum(h['probability'] for h in hoax_results) / len(hoax_results)
-        
-        # Determine overall sentiment
-        overall_sentiment = max(sentiment_counts, key=sentiment_counts.get)
-        
-        # Determine overall hoax classification
-        if avg_hoax_prob > 0.7:
-            overall_hoax = 'hoax'
-        elif avg_hoax_prob < 0.3:
-            overall_hoax = 'factual'
-        else:
-            overall_hoax = 'uncertain'
-        
-        # Generate explainability for overall classification
-        all_texts = ' '.join([item['cleaned_text'] for item in processed_items])
-        explainability = nlp_pipeline.explain_classification(
-            all_texts[:5000],  # Limit text length
-            {'label': overall_hoax, 'probability': avg_hoax_prob}
-        )
-        
-        update_job_status(job_id, 'processing', 95)
-        
-        # Step 5: Save results
-        results = {
-            'job_id': job_id,
-            'query_type': 'topic',
-            'query_input': keyword,
-            'status': 'completed',
-            'overall_sentiment': overall_sentiment,
-            'sentiment_breakdown': sentiment_counts,
-            'hoax_probability': avg_hoax_prob,
-            'hoax_label': overall_hoax,
-            'articles': [
-                {
-                    'article_id': f"{job_id}_{idx}",
-                    'source_url': item.get('url', ''),
-                    'title': item.get('title', keyword),
-                    'content': item['text'][:500] + '...',
-                    'author': item.get('author'),
-                    'publication_date': item.get('date'),
-                    'sentiment': sentiment_results[idx],
-                    'hoax_classification': hoax_results[idx],
-                }
-                for idx, item in enumerate(processed_items)
+                'cleaned_text': preprocess_text(item['text'])
+            }
+            for item in items
+        ]
+
+def score_items(items):
+    """Helper function to run sentiment and hoax models on preprocessed items."""
+    return nlp_pipeline.analyze_batch([item['cleaned_text'] for item in items])
+
+def record_rollups(keyword, items, sentiments, hoaxes):
+    """
+    Helper function to add scored items to the keyword's time-bucketed
+    rollups; items already counted by an earlier topic or watch run are
+    skipped.
+    """
+    try:
+        add_rollup_items(keyword, items, sentiments, hoaxes)
+    except SoftTimeLimitExceeded:
+        raise
+    except Exception:
+        # Rollups are derived data; never fail the analysis because of them
+        logger.exception("Error recording rollups for %s", keyword)
+
+def remember_claims(job_id, items, hoax_results):
+    """Helper function to add a finished job's confident items to the claim index."""
+    try:
+        nlp_pipeline.remember_claims(
+            [item['cleaned_text'] for item in items],
+            hoax_results,
+            [
+                {'text': item['text'][:300], 'source_url': item.get('url', ''), 'job_id': job_id}
+                for item in items
             ],
-            'source_breakdown': aggregate_sources(processed_items, sentiment_results),
-            'top_keywords': nlp_pipeline.extract_keywords(all_texts, top_n=15),
-            'explainability': explainability,
-            'total_items': len(processed_items),
-            'analyzed_at': str(datetime.now()),
-        }
-        
-        save_analysis_results(job_id, results)
-        update_job_status(job_id, 'completed', 100)
-        
-    except Exception as e:
-        print(f"Error in analyze_topic_task: {str(e)}")
-        update_job_status(job_id, 'failed', 0)
+        )
+    except SoftTimeLimitExceeded:
+        raise
+    except Exception:
+        # The index is an optimization; never fail the analysis because of it
+        logger.exception("Error updating claim index for job %s", job_id)
 
 def aggregate_sources(items, sentiments):
     """Helper function to aggregate source breakdown."""
@@ -1,16 +1,22 @@
+from sqlalchemy import text
 from sqlalchemy.orm import Session
-from database.models import AnalysisJobs, AnalysisResults, SessionLocal, AnalysisStatusEnum
-from datetime import datetime
-from typing import Dict, Optional
+from database.models import AnalysisJobs, AnalysisResults, TopicWatches, TopicRollups, TopicRollupItems, SessionLocal, AnalysisStatusEnum, QueryTypeEnum
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Optional
+from services.serialization import compact, json_serializer
+from services.archive import get_archive_store, archive_key, pack, load_archived
+from services.rollups import ROLLUP_ITEM_RETENTION_DAYS, build_rollup_deltas, rollup_item_key
 
 def get_session():
     """Get a database session."""
     return SessionLocal()
 
 def create_analysis_job(job_id: str, query_type: str, query_input: str):
-    """Create a new analysis job record."""
+    """Create a new analysis job record (a no-op if it already exists)."""
     db = get_session()
     try:
+        if db.get(AnalysisJobs, job_id) is not None:
+            return
         job = AnalysisJobs(
             job_id=job_id,
             query_type=query_type,
@@ -61,20 +67,335 @@ def save_analysis_results(job_id: str, results: Dict):
     try:
         result = AnalysisResults(
             job_id=job_id,
-            results_data=results
+            results_data=compact(results)
         )
         db.add(result)
         db.commit()
     finally:
         db.close()
 
+def save_result_timings(job_id: str, timings: Dict):
+    """
+    Replace the 'timings' section of saved results in place, so the stored
+    breakdown can include the save itself without rewriting the payload
+    from the client side.
+    """
+    db = get_session()
+    try:
+        if db.bind.dialect.name == 'postgresql':
+            statement = text(
+                "UPDATE analysis_results "
+                "SET results_data = jsonb_set(results_data::jsonb, '{timings}', CAST(:timings AS jsonb))::json "
+                "WHERE job_id = :job_id"
+            )
+        else:
+            statement = text(
+                "UPDATE analysis_results "
+                "SET results_data = json_set(results_data, '$.timings', json(:timings)) "
+                "WHERE job_id = :job_id"
+            )
+        db.execute(statement, {'job_id': job_id, 'timings': json_serializer(compact(timings))})
+        db.commit()
+    finally:
+        db.close()
+
 def get_job_results(job_id: str) -> Optional[Dict]:
-    """Get job analysis results."""
+    """Get job analysis results, hydrating archived ones from the blob store."""
     db = get_session()
     try:
         result = db.query(AnalysisResults).filter(AnalysisResults.job_id == job_id).first()
         if not result:
             return None
+        if result.archive_key:
+            return load_archived(result.archive_key)
         return result.results_data
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+def archive_old_results(older_than_days: int, batch_size: int = 100, limit: Optional[int] = None) -> int:
+    """
+    Move results older than ``older_than_days`` to the archive store.
+    
+    Each result is written as a zstd-compressed blob first; only then is
+    the row's payload replaced by a pointer, so a failure at any point
+    leaves the result readable. Rows are committed batch by batch.
+    
+    Returns:
+        Number of results archived
+    """
+    store = get_archive_store()
+    if store is None:
+        return 0
+    
+    cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+    archived = 0
+    db = get_session()
+    try:
+        while limit is None or archived < limit:
+            size = batch_size if limit is None else min(batch_size, limit - archived)
+            rows = (
+                db.query(AnalysisResults)
+                .filter(AnalysisResults.archive_key.is_(None), AnalysisResults.created_at < cutoff)
+                .order_by(AnalysisResults.created_at)
+                .limit(size)
+                .all()
+            )
+            if not rows:
+                break
+            
+            for row in rows:
+                row.archive_key = store.put(archive_key(row.job_id, row.created_at), pack(row.results_data))
+                row.results_data = None
+                row.archived_at = datetime.utcnow()
+            db.commit()
+            archived += len(rows)
+        return archived
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+def iter_job_results(
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    query_type: Optional[str] = None,
+    batch_size: int = 200,
+) -> Iterator[Dict]:
+    """
+    Stream completed jobs with their results, oldest first.
+    
+    Rows are fetched from a server-side cursor in batches of ``batch_size``
+    so an export never holds more than one batch in memory.
+    """
+    db = get_session()
+    try:
+        query = (
+            db.query(
+                AnalysisJobs.job_id,
+                AnalysisJobs.query_type,
+                AnalysisJobs.query_input,
+                AnalysisJobs.created_at,
+                AnalysisJobs.completed_at,
+                AnalysisResults.results_data,
+                AnalysisResults.archive_key,
+            )
+            .join(AnalysisResults, AnalysisResults.job_id == AnalysisJobs.job_id)
+            .filter(AnalysisJobs.status == AnalysisStatusEnum.completed)
+        )
+        if since:
+            query = query.filter(AnalysisJobs.created_at >= since)
+        if until:
+            query = query.filter(AnalysisJobs.created_at < until)
+        if query_type:
+            query = query.filter(AnalysisJobs.query_type == QueryTypeEnum[query_type])
+        
+        query = query.order_by(AnalysisJobs.created_at).execution_options(yield_per=batch_size)
+        for row in query:
+            yield {
+                'job_id': row.job_id,
+                'query_type': row.query_type.value,
+                'query_input': row.query_input,
+                'created_at': row.created_at.isoformat(),
+                'completed_at': row.completed_at.isoformat() if row.completed_at else None,
+                # Archived results bypass the hot cache; an export reads each once
+                'results': load_archived(row.archive_key, use_cache=False) if row.archive_key else row.results_data,
+            }
+    finally:
+        db.close()
+
+def create_topic_watch(keyword: str, interval_seconds: int) -> Dict:
+    """Create a topic watch, or reactivate an existing one."""
+    db = get_session()
+    try:
+        watch = db.query(TopicWatches).filter(TopicWatches.keyword == keyword).first()
+        if watch:
+            watch.active = True
+            watch.interval_seconds = interval_seconds
+        else:
+            watch = TopicWatches(
+                keyword=keyword,
+                interval_seconds=interval_seconds,
+                cursors={},
+                aggregate={},
+            )
+            db.add(watch)
+        db.commit()
+        return _watch_to_dict(watch)
+    finally:
+        db.close()
+
+def get_topic_watch(keyword: str) -> Optional[Dict]:
+    """Get a topic watch with its cursors and rolling aggregate."""
+    db = get_session()
+    try:
+        watch = db.query(TopicWatches).filter(TopicWatches.keyword == keyword).first()
+        if not watch:
+            return None
+        return _watch_to_dict(watch)
+    finally:
+        db.close()
+
+def deactivate_topic_watch(keyword: str) -> bool:
+    """Stop scheduling runs for a topic watch. Returns False if unknown."""
+    db = get_session()
+    try:
+        watch = db.query(TopicWatches).filter(TopicWatches.keyword == keyword).first()
+        if not watch:
+            return False
+        watch.active = False
+        db.commit()
+        return True
+    finally:
+        db.close()
+
+def claim_due_topic_watches() -> List[str]:
+    """
+    Return keywords of active watches whose interval has elapsed.
+    
+    The returned watches are stamped with the current time so that the
+    next beat tick does not dispatch them again while they are running.
+    """
+    db = get_session()
+    try:
+        now = datetime.utcnow()
+        due = []
+        for watch in db.query(TopicWatches).filter(TopicWatches.active == True).all():
+            if watch.last_run_at is None or watch.last_run_at + timedelta(seconds=watch.interval_seconds) <= now:
+                watch.last_run_at = now
+                due.append(watch.keyword)
+        db.commit()
+        return due
+    finally:
+        db.close()
+
+def update_topic_watch(keyword: str, cursors: Dict, aggregate: Dict, new_items: int):
+    """Store advanced cursors and the merged aggregate after a watch run."""
+    db = get_session()
+    try:
+        watch = db.query(TopicWatches).filter(TopicWatches.keyword == keyword).first()
+        if watch:
+            watch.cursors = cursors
+            watch.aggregate = aggregate
+            watch.last_new_items = new_items
+            db.commit()
+    finally:
+        db.close()
+
+def add_rollup_items(keyword: str, items: List[Dict], sentiments: List[Dict], hoaxes: List[Dict]) -> int:
+    """
+    Add scored items to the hourly/daily buckets of a keyword, counting
+    each item once.
+    
+    Topic runs re-crawl and re-score the same window, so item ids are
+    claimed in topic_rollup_items first (INSERT ... ON CONFLICT DO NOTHING
+    RETURNING) and only newly claimed items are folded into the buckets.
+    Claims and bucket increments commit together; buckets are updated with
+    an atomic INSERT ... ON CONFLICT DO UPDATE so concurrent workers can
+    add to the same bucket without lost updates.
+    
+    Returns:
+        Number of items newly counted
+    """
+    if not items:
+        return 0
+    
+    db = get_session()
+    try:
+        if db.bind.dialect.name == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+        
+        now = datetime.utcnow()
+        keys = [rollup_item_key(item) for item in items]
+        stmt = insert(TopicRollupItems).values([
+            {'keyword': keyword, 'source': source, 'item_id': item_id, 'counted_at': now}
+            for source, item_id in dict.fromkeys(keys)
+        ])
+        stmt = stmt.on_conflict_do_nothing(index_elements=['keyword', 'source', 'item_id'])
+        claimed = {tuple(row) for row in db.execute(stmt.returning(TopicRollupItems.source, TopicRollupItems.item_id))}
+        
+        new_items, new_sentiments, new_hoaxes = [], [], []
+        for key, item, sentiment, hoax in zip(keys, items, sentiments, hoaxes):
+            if key in claimed:
+                # Duplicates within one crawl are counted once as well
+                claimed.discard(key)
+                new_items.append(item)
+                new_sentiments.append(sentiment)
+                new_hoaxes.append(hoax)
+        
+        deltas = build_rollup_deltas(new_items, new_sentiments, new_hoaxes, now)
+        for (source, granularity, bucket_start), delta in deltas.items():
+            stmt = insert(TopicRollups).values(
+                keyword=keyword,
+                source=source,
+                granularity=granularity,
+                bucket_start=bucket_start,
+                updated_at=now,
+                **delta
+            )
+            stmt = stmt.on_conflict_do_update(
+                index_elements=['keyword', 'source', 'granularity', 'bucket_start'],
+                set_={
+                    **{field: getattr(TopicRollups, field) + stmt.excluded[field] for field in delta},
+                    'updated_at': now,
+                },
+            )
+            db.execute(stmt)
+        
+        # Ids older than any re-crawled window are not needed anymore
+        db.query(TopicRollupItems).filter(
+            TopicRollupItems.keyword == keyword,
+            TopicRollupItems.counted_at < now - timedelta(days=ROLLUP_ITEM_RETENTION_DAYS),
+        ).delete(synchronize_session=False)
+        db.commit()
+        return len(new_items)
+    finally:
+        db.close()
+
+def query_rollups(
+    keyword: str,
+    granularity: str,
+    start: datetime,
+    end: datetime,
+    source: Optional[str] = None,
+) -> List[Dict]:
+    """Get rollup buckets of a keyword within [start, end), oldest first."""
+    db = get_session()
+    try:
+        query = db.query(TopicRollups).filter(
+            TopicRollups.keyword == keyword,
+            TopicRollups.granularity == granularity,
+            TopicRollups.bucket_start >= start,
+            TopicRollups.bucket_start < end,
+        )
+        if source:
+            query = query.filter(TopicRollups.source == source)
+        
+        return [
+            {
+                'bucket_start': row.bucket_start.isoformat(),
+                'source': row.source,
+                'count': row.count,
+                'positive': row.positive,
+                'negative': row.negative,
+                'neutral': row.neutral,
+                'sentiment_score_sum': row.sentiment_score_sum,
+                'hoax_prob_sum': row.hoax_prob_sum,
+            }
+            for row in query.order_by(TopicRollups.bucket_start).all()
+        ]
+    finally:
+        db.close()
+
+def _watch_to_dict(watch: TopicWatches) -> Dict:
+    return {
+        'keyword': watch.keyword,
+        'active': watch.active,
+        'interval_seconds': watch.interval_seconds,
+        'cursors': watch.cursors or {},
+        'aggregate': watch.aggregate or {},
+        'last_run_at': watch.last_run_at.isoformat() if watch.last_run_at else None,
+        'last_new_items': watch.last_new_items or 0,
+    }
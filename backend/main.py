@@ -1,9 +1,31 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query, Request, Response, Header
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from brotli_asgi import BrotliMiddleware
 from pydantic import BaseModel
-from celery_worker import analyze_url_task, analyze_topic_task
+from celery_worker import celery_app, analyze_url_task, analyze_url_batch_task, analyze_topic_task
 import uuid
-from database.crud import get_job_status, get_job_results
+import time
+import hashlib
+from urllib.parse import parse_qs
+from datetime import datetime, timedelta
+from typing import Optional
+from database.crud import (
+    create_analysis_job,
+    get_job_status,
+    get_job_results,
+    iter_job_results,
+    create_topic_watch,
+    get_topic_watch,
+    deactivate_topic_watch,
+    query_rollups,
+)
+from services.topic_watch import summarize_aggregate
+from services.rollups import GRANULARITIES, summarize_rollups
+from services.telemetry import metrics_payload, prepare_multiproc_dir
+from services.export import iter_ndjson, iter_parquet
+from services.admission import AdmissionRejected, admit, release
+from services.url_batch import batching_enabled, enqueue_url_job
 from database.models import create_tables
 
 # Author: Parrosz
@@ -12,7 +34,8 @@ from database.models import create_tables
 app = FastAPI(
     title="Hoaxalyzer API",
     version="1.0.0",
-    description="Intelligent misinformation detection platform - Created by Parrosz"
+    description="Intelligent misinformation detection platform - Created by Parrosz",
+    default_response_class=ORJSONResponse,
 )
 
 # CORS configuration
@@ -24,10 +47,27 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+class CompressionMiddleware(BrotliMiddleware):
+    """
+    Brotli when the client accepts it, gzip otherwise. Parquet exports are
+    sent as they are: their pages are zstd-compressed already, so a second
+    pass only burns CPU on every streamed chunk.
+    """
+    
+    def _is_handler_excluded(self, scope) -> bool:
+        if scope.get("path") == "/api/v1/export":
+            query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+            if query.get("format") == ["parquet"]:
+                return True
+        return super()._is_handler_excluded(scope)
+
+app.add_middleware(CompressionMiddleware, minimum_size=1000, gzip_fallback=True)
+
 # Initialize database tables
 @app.on_event("startup")
 async def startup_event():
     create_tables()
+    prepare_multiproc_dir()
 
 # Request models
 class URLAnalysisRequest(BaseModel):
@@ -36,6 +76,10 @@ class URLAnalysisRequest(BaseModel):
 class TopicAnalysisRequest(BaseModel):
     keyword: str
 
+class TopicWatchRequest(BaseModel):
+    keyword: str
+    interval_seconds: int = 300
+
 # Response models
 class JobResponse(BaseModel):
     job_id: str
@@ -46,9 +90,15 @@ class JobResponse(BaseModel):
 async def health_check():
     return {"status": "healthy", "service": "Hoaxalyzer API", "author": "Parrosz"}
 
+# Prometheus metrics endpoint
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    body, content_type = metrics_payload()
+    return Response(content=body, media_type=content_type)
+
 # Submit URL analysis
 @app.post("/api/v1/analyze/url", response_model=JobResponse)
-async def submit_url_analysis(request: URLAnalysisRequest):
+async def submit_url_analysis(request: URLAnalysisRequest, http_request: Request):
     """
     Submit a single URL for analysis.
     
@@ -58,20 +108,25 @@ async def submit_url_analysis(request: URLAnalysisRequest):
     3. Run sentiment analysis
     4. Run hoax classification
     5. Generate explainability report
+    
+    Returns 429 with Retry-After when the interactive lane is saturated or
+    the client is over its fair share.
     """
     try:
         job_id = str(uuid.uuid4())
         
         # Submit async task to Celery
-        analyze_url_task.delay(job_id, request.url)
+        submit_job(analyze_url_task, 'url', request.url, job_id, http_request)
         
         return JobResponse(job_id=job_id, status="pending")
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 # Submit topic analysis
 @app.post("/api/v1/analyze/topic", response_model=JobResponse)
-async def submit_topic_analysis(request: TopicAnalysisRequest):
+async def submit_topic_analysis(request: TopicAnalysisRequest, http_request: Request):
     """
     Submit a topic/keyword for analysis.
     
@@ -83,28 +138,77 @@ async def submit_topic_analysis(request: TopicAnalysisRequest):
     5. Run hoax classification on each
     6. Aggregate results
     7. Generate visualizations data
+    
+    Returns 429 with Retry-After when the bulk lane is saturated or the
+    client is over its fair share.
     """
     try:
         job_id = str(uuid.uuid4())
         
         # Submit async task to Celery
-        analyze_topic_task.delay(job_id, request.keyword)
+        submit_job(analyze_topic_task, 'topic', request.keyword, job_id, http_request)
         
         return JobResponse(job_id=job_id, status="pending")
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+def client_id_for(http_request: Request) -> str:
+    """Identify the caller for fair share: X-Client-ID header, else remote address."""
+    client_id = http_request.headers.get("x-client-id")
+    if client_id:
+        return client_id[:64]
+    return http_request.client.host if http_request.client else "unknown"
+
+def submit_job(task, query_type: str, query_input: str, job_id: str, http_request: Request):
+    """Admit a job into its priority lane and queue it, or reject with 429."""
+    client_id = client_id_for(http_request)
+    try:
+        lane = admit(celery_app, query_type, client_id, job_id)
+    except AdmissionRejected as e:
+        raise HTTPException(
+            status_code=429,
+            detail=e.reason,
+            headers={"Retry-After": str(e.retry_after)},
+        )
+    
+    try:
+        enqueued_at = time.time()
+        # URL jobs are parked for the batch path; every submission queues a
+        # batch task and the first one to run drains the parked jobs. The
+        # job row exists before it is parked, so a parked job is never 404.
+        if query_type == "url" and batching_enabled():
+            create_analysis_job(job_id, query_type, query_input)
+            if enqueue_url_job(job_id, query_input, enqueued_at, client_id):
+                analyze_url_batch_task.apply_async(queue=lane["queue"], priority=lane["priority"])
+                return
+        task.apply_async(
+            args=[job_id, query_input],
+            kwargs={"enqueued_at": enqueued_at, "client_id": client_id},
+            queue=lane["queue"],
+            priority=lane["priority"],
+        )
+    except Exception:
+        release(query_type, client_id, job_id)
+        raise
+
 # Get job status and results
 @app.get("/api/v1/results/{job_id}")
-async def get_results(job_id: str):
+async def get_results(job_id: str, if_none_match: Optional[str] = Header(None)):
     """
     Get the status and results of an analysis job.
     
+    Responses carry an ETag derived from the job status, so pollers that
+    send If-None-Match get a 304 without the results being loaded or
+    serialized again.
+    
     Returns:
     - job_id: The unique job identifier
     - status: pending, processing, completed, or failed
     - progress: Percentage completion (0-100)
-    - results: Full analysis results (only when completed)
+    - results: Full analysis results when completed; for a job failed by
+      the quality gate, the gate's reasons ('error' and 'quality')
     """
     try:
         status_info = get_job_status(job_id)
@@ -112,6 +216,11 @@ async def get_results(job_id: str):
         if not status_info:
             raise HTTPException(status_code=404, detail="Job not found")
         
+        etag = job_etag(status_info)
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if if_none_match and etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers=headers)
+        
         response = {
             "job_id": job_id,
             "status": status_info["status"],
@@ -121,13 +230,174 @@ async def get_results(job_id: str):
         if status_info["status"] == "completed":
             results = get_job_results(job_id)
             response["results"] = results
+        elif status_info["status"] == "failed":
+            # Only jobs failed by the quality gate have results (the reason)
+            results = get_job_results(job_id)
+            if results:
+                response["results"] = results
+        
+        return ORJSONResponse(response, headers=headers)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+def job_etag(status_info: dict) -> str:
+    """
+    ETag for a job's current state (results never change once completed).
+    
+    The tag is weak: the same state is served as brotli, gzip or identity
+    depending on Accept-Encoding, so the bytes are not always the same.
+    """
+    state = f"{status_info['job_id']}:{status_info['status']}:{status_info.get('progress')}:{status_info.get('completed_at')}"
+    return 'W/"' + hashlib.sha1(state.encode("utf-8")).hexdigest()[:20] + '"'
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Weak comparison of If-None-Match against an ETag (RFC 9110 13.1.2)."""
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
+
+# Bulk export of results
+@app.get("/api/v1/export")
+def export_results(
+    format: str = Query("ndjson"),
+    query_type: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+):
+    """
+    Stream completed results across many jobs.
+    
+    - ndjson: one job (with its full results) per line
+    - parquet: one row per analyzed article/tweet (zstd compressed)
+    
+    Jobs are read in batches from a server-side cursor, so the export is
+    never held in memory as a whole.
+    """
+    if format not in ("ndjson", "parquet"):
+        raise HTTPException(status_code=422, detail="format must be ndjson or parquet")
+    if query_type not in (None, "url", "topic"):
+        raise HTTPException(status_code=422, detail="query_type must be url or topic")
+    
+    rows = iter_job_results(
+        since=since.replace(tzinfo=None) if since else None,
+        until=until.replace(tzinfo=None) if until else None,
+        query_type=query_type,
+    )
+    stamp = datetime.utcnow().strftime("%Y%m%dT%H%M%S")
+    
+    if format == "parquet":
+        return StreamingResponse(
+            iter_parquet(rows),
+            media_type="application/vnd.apache.parquet",
+            headers={"Content-Disposition": f'attachment; filename="hoaxalyzer-{stamp}.parquet"'},
+        )
+    return StreamingResponse(
+        iter_ndjson(rows),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="hoaxalyzer-{stamp}.ndjson"'},
+    )
+
+# Start watching a topic
+@app.post("/api/v1/watch/topic")
+async def submit_topic_watch(request: TopicWatchRequest):
+    """
+    Start (or resume) incremental monitoring of a topic/keyword.
+    
+    Celery beat runs the watch every `interval_seconds`. Each run only
+    crawls and scores items newer than the per-source cursors and merges
+    them into a rolling aggregate.
+    """
+    if request.interval_seconds < 60:
+        raise HTTPException(status_code=422, detail="interval_seconds must be at least 60")
+    try:
+        watch = create_topic_watch(request.keyword, request.interval_seconds)
+        return {
+            "keyword": watch["keyword"],
+            "active": watch["active"],
+            "interval_seconds": watch["interval_seconds"],
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+# Get rolling results of a topic watch
+@app.get("/api/v1/watch/{keyword}")
+async def get_topic_watch_results(keyword: str):
+    """
+    Get the rolling aggregate of a watched topic.
+    
+    The results use the same shape as a completed topic analysis.
+    """
+    try:
+        watch = get_topic_watch(keyword)
+        if not watch:
+            raise HTTPException(status_code=404, detail="Watch not found")
         
-        return response
+        return {
+            "keyword": keyword,
+            "active": watch["active"],
+            "interval_seconds": watch["interval_seconds"],
+            "last_run_at": watch["last_run_at"],
+            "last_new_items": watch["last_new_items"],
+            "results": summarize_aggregate(keyword, watch["aggregate"]),
+        }
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+# Stop watching a topic
+@app.delete("/api/v1/watch/{keyword}")
+async def delete_topic_watch(keyword: str):
+    """Stop scheduled runs for a watched topic. The aggregate is kept."""
+    try:
+        if not deactivate_topic_watch(keyword):
+            raise HTTPException(status_code=404, detail="Watch not found")
+        return {"keyword": keyword, "active": False}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+# Query time-bucketed rollups of a topic
+@app.get("/api/v1/rollups/{keyword}")
+async def get_topic_rollups(
+    keyword: str,
+    granularity: str = Query("day"),
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    source: Optional[str] = None,
+):
+    """
+    Get hourly or daily rollups of a keyword over a time range.
+    
+    Answered from precomputed buckets, without loading any results blobs.
+    Defaults to the last 30 days.
+    
+    Returns:
+    - buckets: Per-source counts, sentiment distribution and sums per bucket
+    - summary: Totals and per-source averages over the whole range
+    """
+    if granularity not in GRANULARITIES:
+        raise HTTPException(status_code=422, detail=f"granularity must be one of {', '.join(GRANULARITIES)}")
+    try:
+        end = (end or datetime.utcnow()).replace(tzinfo=None)
+        start = (start or end - timedelta(days=30)).replace(tzinfo=None)
+        
+        buckets = query_rollups(keyword, granularity, start, end, source)
+        return {
+            "keyword": keyword,
+            "granularity": granularity,
+            "start": start.isoformat(),
+            "end": end.isoformat(),
+            "buckets": buckets,
+            "summary": summarize_rollups(buckets),
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
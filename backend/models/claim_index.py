@@ -0,0 +1,196 @@
+import fcntl
+import json
+import os
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+import numpy as np
+
+class ClaimIndex:
+    """
+    On-disk approximate nearest-neighbour index of labeled claims.
+
+    Layout of the index directory:
+    - meta.json: embedding dimension
+    - vectors.f32: L2-normalized embeddings, appended row by row and
+      memory-mapped read-only (shared between worker processes)
+    - claims.jsonl: one metadata record per row (text, label, source)
+    - centroids.npy / assignments.i32: IVF coarse quantizer and the list
+      each row belongs to; before ``train`` is called search is exact
+
+    Inserts append under a file lock, so every worker process can add
+    claims; other processes pick them up on their next search.
+    """
+
+    def __init__(self, path: str, dim: Optional[int] = None):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+
+        meta_path = os.path.join(path, 'meta.json')
+        if os.path.exists(meta_path):
+            with open(meta_path) as f:
+                self.dim = json.load(f)['dim']
+        elif dim:
+            self.dim = dim
+            with open(meta_path, 'w') as f:
+                json.dump({'dim': dim}, f)
+        else:
+            raise ValueError(f"Claim index at {path} does not exist and no dimension was given")
+
+        self.vectors = np.zeros((0, self.dim), dtype=np.float32)
+        self.claims = []
+        self.centroids = None
+        self.lists = {}
+        self._claims_offset = 0
+        self._centroids_mtime = None
+        self.refresh()
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    @contextmanager
+    def _lock(self):
+        with open(self._file('lock'), 'w') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def __len__(self) -> int:
+        return len(self.claims)
+
+    def refresh(self):
+        """Map rows appended (by this or another process) since the last load."""
+        vectors_path = self._file('vectors.f32')
+        if not os.path.exists(vectors_path):
+            return
+
+        rows = os.path.getsize(vectors_path) // (4 * self.dim)
+        centroids_path = self._file('centroids.npy')
+        centroids_mtime = os.path.getmtime(centroids_path) if os.path.exists(centroids_path) else None
+        if rows == len(self.claims) and centroids_mtime == self._centroids_mtime:
+            return
+
+        with open(self._file('claims.jsonl')) as f:
+            f.seek(self._claims_offset)
+            for line in iter(f.readline, ''):
+                if not line.endswith('\n') or len(self.claims) >= rows:
+                    break
+                self.claims.append(json.loads(line))
+                self._claims_offset = f.tell()
+        rows = len(self.claims)
+        if rows:
+            self.vectors = np.memmap(vectors_path, dtype=np.float32, mode='r', shape=(rows, self.dim))
+
+        self._centroids_mtime = centroids_mtime
+        if centroids_mtime is not None:
+            self.centroids = np.load(centroids_path)
+            assignments = np.fromfile(self._file('assignments.i32'), dtype=np.int32)[:rows]
+            order = np.argsort(assignments, kind='stable')
+            bounds = np.searchsorted(assignments[order], np.arange(len(self.centroids) + 1))
+            self.lists = {
+                centroid: order[bounds[centroid]:bounds[centroid + 1]]
+                for centroid in range(len(self.centroids))
+            }
+
+    def add(self, vectors: np.ndarray, claims: List[Dict]):
+        """
+        Append claims to the index.
+
+        Args:
+            vectors: Array of shape (n, dim); normalized here
+            claims: Metadata dicts with at least 'text' and 'label'
+        """
+        if len(claims) == 0:
+            return
+        vectors = _normalize(np.asarray(vectors, dtype=np.float32).reshape(len(claims), self.dim))
+
+        with self._lock():
+            # Another process may have appended since our last refresh
+            self.refresh()
+            with open(self._file('claims.jsonl'), 'a') as f:
+                for claim in claims:
+                    f.write(json.dumps(claim, ensure_ascii=False) + '\n')
+            with open(self._file('vectors.f32'), 'ab') as f:
+                f.write(vectors.tobytes())
+            if self.centroids is not None:
+                with open(self._file('assignments.i32'), 'ab') as f:
+                    f.write(self._assign(vectors).astype(np.int32).tobytes())
+            self.refresh()
+
+    def train(self, nlist: Optional[int] = None, iterations: int = 20, seed: int = 0):
+        """
+        Build the IVF coarse quantizer with k-means over the stored vectors.
+
+        Args:
+            nlist: Number of inverted lists (default: ~sqrt of the index size)
+            iterations: k-means iterations
+            seed: Random seed for centroid initialization
+        """
+        with self._lock():
+            self.refresh()
+            rows = len(self.claims)
+            if rows == 0:
+                return
+            nlist = min(nlist or max(1, int(np.sqrt(rows))), rows)
+
+            rng = np.random.default_rng(seed)
+            sample = np.asarray(self.vectors[rng.choice(rows, size=min(rows, nlist * 256), replace=False)])
+            centroids = sample[rng.choice(len(sample), size=nlist, replace=False)].copy()
+            for _ in range(iterations):
+                nearest = (sample @ centroids.T).argmax(axis=1)
+                for centroid in range(nlist):
+                    members = sample[nearest == centroid]
+                    if len(members):
+                        centroids[centroid] = members.mean(axis=0)
+                centroids = _normalize(centroids)
+
+            np.save(self._file('centroids.npy'), centroids)
+            self.centroids = centroids
+            self._assign(np.asarray(self.vectors)).astype(np.int32).tofile(self._file('assignments.i32'))
+            self.claims = []
+            self._claims_offset = 0
+            self.refresh()
+
+    def _assign(self, vectors: np.ndarray) -> np.ndarray:
+        return (vectors @ self.centroids.T).argmax(axis=1)
+
+    def search(self, vector: np.ndarray, k: int = 1, nprobe: int = 8) -> List[Dict]:
+        """
+        Find the most similar stored claims.
+
+        Args:
+            vector: Query embedding of shape (dim,)
+            k: Number of neighbours to return
+            nprobe: Inverted lists scanned (ignored before training)
+
+        Returns:
+            List of claim dicts with an added 'similarity' (cosine), best first
+        """
+        self.refresh()
+        if not self.claims:
+            return []
+        query = _normalize(np.asarray(vector, dtype=np.float32).reshape(1, self.dim))[0]
+
+        if self.centroids is not None:
+            probes = np.argsort(self.centroids @ query)[::-1][:nprobe]
+            candidates = np.concatenate([self.lists.get(int(probe), np.empty(0, dtype=np.int64)) for probe in probes])
+            # Rows appended after the last train/refresh of assignments
+            unassigned = np.arange(sum(len(ids) for ids in self.lists.values()), len(self.claims))
+            candidates = np.concatenate([candidates, unassigned]).astype(np.int64)
+        else:
+            candidates = np.arange(len(self.claims))
+
+        if len(candidates) == 0:
+            return []
+        scores = np.asarray(self.vectors[candidates]) @ query
+        top = np.argsort(scores)[::-1][:k]
+        return [
+            {**self.claims[int(candidates[i])], 'similarity': float(scores[i])}
+            for i in top
+        ]
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
@@ -1,8 +1,20 @@
 import os
+import hashlib
+import logging
+import random
+from array import array
+from collections import OrderedDict
 from transformers import AutoTokenizer, AutoModelForSequenceClassification
 import torch
-from typing import Dict, List
+from typing import Dict, List, Optional, Sequence, Tuple
 import numpy as np
+from celery.exceptions import SoftTimeLimitExceeded
+from services.telemetry import span, model_call, record_cache, record_cascade
+from services.tuning import inference_config
+from models.claim_index import ClaimIndex
+from models.shared_weights import load_shared_model
+
+logger = logging.getLogger(__name__)
 
 class NLPPipeline:
     """
@@ -11,6 +23,9 @@ class NLPPipeline:
     Includes:
     - Sentiment analysis using IndoBERT
     - Hoax classification using fine-tuned IndoBERT
+    - Claim matching against an index of known hoaxes/facts
+    - Optional cascade: TF-IDF + logistic regression first, IndoBERT only
+      for uncertain items
     - Keyword extraction
     - Explainability generation using LIME
     """
@@ -21,22 +36,83 @@ class NLPPipeline:
         
         # Load sentiment model
         sentiment_model_name = os.getenv('SENTIMENT_MODEL', 'indobenchmark/indobert-base-p1')
-        self.sentiment_tokenizer = AutoTokenizer.from_pretrained(sentiment_model_name)
-        self.sentiment_model = AutoModelForSequenceClassification.from_pretrained(
+        self.sentiment_tokenizer = self._load_fast_tokenizer(sentiment_model_name)
+        self.sentiment_model = self._load_model(
             sentiment_model_name,
             num_labels=3  # positive, negative, neutral
-        ).to(self.device)
+        )
         
         # Load hoax classification model
         hoax_model_name = os.getenv('HOAX_MODEL', 'indobenchmark/indobert-base-p1')
-        self.hoax_tokenizer = AutoTokenizer.from_pretrained(hoax_model_name)
-        self.hoax_model = AutoModelForSequenceClassification.from_pretrained(
+        self.hoax_model = self._load_model(
             hoax_model_name,
             num_labels=2  # hoax, factual
-        ).to(self.device)
+        )
+        
+        # Both models usually come from the same checkpoint; share the
+        # tokenizer then, so each text is tokenized once for both
+        if hoax_model_name == sentiment_model_name:
+            self.hoax_tokenizer = self.sentiment_tokenizer
+        else:
+            self.hoax_tokenizer = self._load_fast_tokenizer(hoax_model_name)
+            if self.hoax_tokenizer.get_vocab() == self.sentiment_tokenizer.get_vocab():
+                self.hoax_tokenizer = self.sentiment_tokenizer
         
         self.sentiment_labels = ['negative', 'neutral', 'positive']
         self.hoax_labels = ['factual', 'hoax']
+        
+        # Inference settings: texts longer than one window are split into up
+        # to NLP_MAX_CHUNKS windows whose predictions are averaged
+        self.max_length = 512
+        self.max_chunks = int(os.getenv('NLP_MAX_CHUNKS', '1'))
+        self.batch_size = inference_config()['batch_size']
+        self.token_cache_size = int(os.getenv('TOKEN_CACHE_SIZE', '4096'))
+        # Keyword weights by occlusion instead of placeholders (1 + top_n extra passes)
+        self.explain_occlusion = os.getenv('EXPLAIN_OCCLUSION', 'false').lower() in ('1', 'true', 'yes')
+        self._token_cache = OrderedDict()
+        
+        # Optional claim matching index (embeddings from the hoax encoder)
+        self.claim_index = None
+        claim_index_dir = os.getenv('CLAIM_INDEX_DIR')
+        if claim_index_dir:
+            self.claim_index = ClaimIndex(claim_index_dir, dim=self.hoax_model.config.hidden_size)
+        self.claim_match_threshold = float(os.getenv('CLAIM_MATCH_THRESHOLD', '0.92'))
+        self.claim_augment_threshold = float(os.getenv('CLAIM_AUGMENT_THRESHOLD', '0.80'))
+        self.claim_nprobe = int(os.getenv('CLAIM_INDEX_NPROBE', '8'))
+        self.claim_insert_confidence = float(os.getenv('CLAIM_INSERT_CONFIDENCE', '0.95'))
+        self._embedding_cache = OrderedDict()
+        
+        # Optional cascade, trained by scripts/train_cascade.py
+        self.cascade = None
+        cascade_model_path = os.getenv('CASCADE_MODEL_PATH')
+        if cascade_model_path:
+            import joblib
+            self.cascade = joblib.load(cascade_model_path)
+        self.cascade_low = float(os.getenv('CASCADE_LOW', '0.4'))
+        self.cascade_high = float(os.getenv('CASCADE_HIGH', '0.6'))
+        self.cascade_sentiment_confidence = float(os.getenv('CASCADE_SENTIMENT_CONFIDENCE', '0.6'))
+        self.cascade_audit_rate = float(os.getenv('CASCADE_AUDIT_RATE', '0.02'))
+    
+    def _load_model(self, model_name: str, num_labels: int):
+        """
+        Load a classifier. On CPU with MODEL_WEIGHTS_DIR set, weights are
+        memory-mapped so all worker processes share one physical copy.
+        """
+        weights_dir = os.getenv('MODEL_WEIGHTS_DIR')
+        if weights_dir and self.device.type == 'cpu':
+            return load_shared_model(model_name, num_labels, weights_dir)
+        return AutoModelForSequenceClassification.from_pretrained(
+            model_name,
+            num_labels=num_labels
+        ).to(self.device)
+    
+    @staticmethod
+    def _load_fast_tokenizer(model_name: str):
+        """Load the Rust-backed tokenizer; the slow Python one is not accepted."""
+        tokenizer = AutoTokenizer.from_pretrained(model_name, use_fast=True)
+        if not tokenizer.is_fast:
+            raise RuntimeError(f"No fast tokenizer available for {model_name}")
+        return tokenizer
     
     def analyze_sentiment(self, text: str) -> Dict:
         """
@@ -48,32 +124,36 @@ class NLPPipeline:
         Returns:
             Dict with 'label' (positive/negative/neutral) and 'score'
         """
+        return self.analyze_sentiment_batch([text])[0]
+    
+    def analyze_sentiment_batch(self, texts: List[str]) -> List[Dict]:
+        """
+        Analyze sentiment of many texts in batched forward passes.
+        
+        Args:
+            texts: Input texts (already preprocessed)
+        
+        Returns:
+            List of dicts with 'label' and 'score', aligned with texts
+        """
         try:
-            # Tokenize
-            inputs = self.sentiment_tokenizer(
-                text,
-                return_tensors='pt',
-                truncation=True,
-                max_length=512,
-                padding=True
-            ).to(self.device)
+            token_ids = self.encode(texts, self.sentiment_tokenizer)
+            predictions, _ = self._predict('sentiment', self.sentiment_model, self.sentiment_tokenizer, token_ids)
             
-            # Get predictions
-            with torch.no_grad():
-                outputs = self.sentiment_model(**inputs)
-                predictions = torch.softmax(outputs.logits, dim=-1)
-            
-            # Get label and score
-            label_idx = predictions.argmax().item()
-            score = predictions[0][label_idx].item()
-            
-            return {
-                'label': self.sentiment_labels[label_idx],
-                'score': score
-            }
-        except Exception as e:
-            print(f"Error in sentiment analysis: {str(e)}")
-            return {'label': 'neutral', 'score': 0.33}
+            results = []
+            for prediction in predictions:
+                label_idx = int(prediction.argmax())
+                results.append({
+                    'label': self.sentiment_labels[label_idx],
+                    'score': float(prediction[label_idx])
+                })
+            return results
+        except SoftTimeLimitExceeded:
+            # Never turn a task time limit into placeholder scores
+            raise
+        except Exception:
+            logger.exception("Error in sentiment analysis")
+            return [{'label': 'neutral', 'score': 0.33} for _ in texts]
     
     def classify_hoax(self, text: str) -> Dict:
         """
@@ -85,40 +165,436 @@ class NLPPipeline:
         Returns:
             Dict with 'label' (hoax/factual), 'probability', and 'confidence'
         """
+        return self.classify_hoax_batch([text])[0]
+    
+    def classify_hoax_batch(self, texts: List[str]) -> List[Dict]:
+        """
+        Classify many texts as hoax or factual in batched forward passes.
+        
+        With a claim index, texts whose encoder states are already cached
+        (resubmitted URLs, re-crawled topic items) are matched first, and a
+        match at or above CLAIM_MATCH_THRESHOLD skips the classifier. Other
+        texts cannot be matched before classification: their embedding comes
+        from the same encoder pass as the prediction (the classification
+        head on top costs next to nothing), so embedding them separately
+        would only add a second pass for texts that do not match.
+        
+        Args:
+            texts: Input texts (already preprocessed)
+        
+        Returns:
+            List of classify_hoax results, aligned with texts
+        """
         try:
-            # Tokenize
-            inputs = self.hoax_tokenizer(
-                text,
-                return_tensors='pt',
-                truncation=True,
-                max_length=512,
-                padding=True
-            ).to(self.device)
-            
-            # Get predictions
-            with torch.no_grad():
-                outputs = self.hoax_model(**inputs)
-                predictions = torch.softmax(outputs.logits, dim=-1)
-            
-            # Get probability for hoax class
-            hoax_prob = predictions[0][1].item()
+            results = [None] * len(texts)
+            if self.claim_index is not None:
+                for idx, text in enumerate(texts):
+                    embedding = self._embedding_cache.get(self._text_key(text))
+                    match = self._match_claim(embedding) if embedding is not None else None
+                    if match is not None and match['similarity'] >= self.claim_match_threshold:
+                        results[idx] = self._hoax_result(None, None, match)
             
-            # Determine label
-            if hoax_prob > 0.6:
-                label = 'hoax'
-            elif hoax_prob < 0.4:
-                label = 'factual'
+            pending = [idx for idx, result in enumerate(results) if result is None]
+            if pending:
+                token_ids = self.encode([texts[idx] for idx in pending], self.hoax_tokenizer)
+                # Encoder states come from the same pass when matching claims
+                predictions, embeddings = self._predict(
+                    'hoax', self.hoax_model, self.hoax_tokenizer, token_ids,
+                    with_embeddings=self.claim_index is not None
+                )
+                for row, idx in enumerate(pending):
+                    # Get probability for hoax class
+                    hoax_prob = float(predictions[row][1])
+                    confidence = float(predictions[row].max())
+                    match = None
+                    if embeddings is not None:
+                        self._cache_embedding(texts[idx], embeddings[row])
+                        match = self._match_claim(embeddings[row])
+                    results[idx] = self._hoax_result(hoax_prob, confidence, match)
+            return results
+        except SoftTimeLimitExceeded:
+            raise
+        except Exception:
+            logger.exception("Error in hoax classification")
+            return [{'label': 'uncertain', 'probability': 0.5, 'confidence': 0.5} for _ in texts]
+    
+    def _hoax_result(self, hoax_prob: Optional[float], confidence: Optional[float], match: Optional[Dict]) -> Dict:
+        """Build a classify_hoax result; a known claim overrides or pulls the probability."""
+        if match is not None:
+            hoax_prob = self._apply_claim_match(match, hoax_prob)
+            confidence = max(hoax_prob, 1 - hoax_prob)
+        result = {
+            'label': self._hoax_label(hoax_prob),
+            'probability': hoax_prob,
+            'confidence': confidence
+        }
+        if match is not None:
+            result['matched_claim'] = match
+        return result
+    
+    def encode(self, texts: List[str], tokenizer=None) -> List[array]:
+        """
+        Tokenize texts once, reusing cached input ids by text hash.
+        
+        Ids are stored without special tokens, so the same encoding serves
+        both models, long-document chunking and explainability. They are
+        truncated to what inference reads (``max_chunks`` windows) and kept
+        as int32 arrays, which keeps TOKEN_CACHE_SIZE entries small. Texts
+        missing from the cache are tokenized together in one call to the
+        fast tokenizer.
+        
+        Args:
+            texts: Input texts
+            tokenizer: Tokenizer to use (default: the shared sentiment tokenizer)
+        
+        Returns:
+            List of token id arrays, aligned with texts
+        """
+        tokenizer = tokenizer or self.sentiment_tokenizer
+        token_ids = [None] * len(texts)
+        missing = OrderedDict()
+        
+        for idx, text in enumerate(texts):
+            text_key = self._text_key(text)
+            key = (id(tokenizer), text_key)
+            cached = self._token_cache.get(key)
+            # Both models look a text up; the job counts it once
+            record_cache('tokens', cached is not None, key=text_key)
+            if cached is not None:
+                self._token_cache.move_to_end(key)
+                token_ids[idx] = cached
             else:
-                label = 'uncertain'
-            
-            return {
-                'label': label,
+                missing.setdefault(key, []).append(idx)
+        
+        if missing:
+            with span('tokenize'):
+                encoded = tokenizer(
+                    [texts[indices[0]] for indices in missing.values()],
+                    add_special_tokens=False,
+                    truncation=True,
+                    max_length=self.max_chunks * self._window(tokenizer),
+                    return_attention_mask=False,
+                    return_token_type_ids=False,
+                    verbose=False
+                )['input_ids']
+            for (key, indices), ids in zip(missing.items(), encoded):
+                ids = array('i', ids)
+                self._token_cache[key] = ids
+                for idx in indices:
+                    token_ids[idx] = ids
+            while len(self._token_cache) > self.token_cache_size:
+                self._token_cache.popitem(last=False)
+        
+        return token_ids
+    
+    def _window(self, tokenizer) -> int:
+        """Text tokens per window, leaving room for the special tokens."""
+        return self.max_length - tokenizer.num_special_tokens_to_add()
+    
+    def _predict(
+        self,
+        model_name: str,
+        model,
+        tokenizer,
+        token_ids: List[Sequence[int]],
+        with_embeddings: bool = False,
+    ) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """
+        Run a model over encoded texts and return per-text class probabilities.
+        
+        Each text is split into windows of at most ``max_length`` tokens
+        (special tokens included, at most ``max_chunks`` windows). Windows
+        are sorted by length and batched to minimize padding; per-text
+        results are the token-count weighted mean over its windows.
+        
+        Returns:
+            Tuple of (probabilities, mean-pooled embeddings or None)
+        """
+        window = self._window(tokenizer)
+        windows, owners = [], []
+        for owner, ids in enumerate(token_ids):
+            for start in range(0, max(len(ids), 1), window)[:self.max_chunks]:
+                windows.append(tokenizer.build_inputs_with_special_tokens(list(ids[start:start + window])))
+                owners.append(owner)
+        
+        probabilities = np.zeros((len(windows), model.config.num_labels), dtype=np.float32)
+        embeddings = np.zeros((len(windows), model.config.hidden_size), dtype=np.float32) if with_embeddings else None
+        order = sorted(range(len(windows)), key=lambda idx: len(windows[idx]))
+        
+        for start in range(0, len(order), self.batch_size):
+            batch = order[start:start + self.batch_size]
+            inputs = self._pad([windows[idx] for idx in batch], tokenizer)
+            with model_call(model_name, len(batch)), torch.no_grad():
+                outputs = model(**inputs, output_hidden_states=with_embeddings)
+                probabilities[batch] = torch.softmax(outputs.logits, dim=-1).cpu().numpy()
+                if with_embeddings:
+                    embeddings[batch] = self._mean_pool(outputs.hidden_states[-1], inputs['attention_mask'])
+        
+        # Fold windows back into their texts
+        weights = np.array([len(w) for w in windows], dtype=np.float32)[:, None]
+        totals = np.zeros((len(token_ids), 1), dtype=np.float32)
+        np.add.at(totals, owners, weights)
+        doc_probabilities = np.zeros((len(token_ids), probabilities.shape[1]), dtype=np.float32)
+        np.add.at(doc_probabilities, owners, probabilities * weights)
+        doc_probabilities /= totals
+        
+        doc_embeddings = None
+        if with_embeddings:
+            doc_embeddings = np.zeros((len(token_ids), embeddings.shape[1]), dtype=np.float32)
+            np.add.at(doc_embeddings, owners, embeddings * weights)
+            doc_embeddings /= totals
+        return doc_probabilities, doc_embeddings
+    
+    def _pad(self, windows: List[List[int]], tokenizer) -> Dict[str, torch.Tensor]:
+        """Right-pad token id windows into model input tensors."""
+        length = max(len(w) for w in windows)
+        input_ids = torch.full((len(windows), length), tokenizer.pad_token_id, dtype=torch.long)
+        attention_mask = torch.zeros((len(windows), length), dtype=torch.long)
+        for row, ids in enumerate(windows):
+            input_ids[row, :len(ids)] = torch.tensor(ids, dtype=torch.long)
+            attention_mask[row, :len(ids)] = 1
+        return {
+            'input_ids': input_ids.to(self.device),
+            'attention_mask': attention_mask.to(self.device),
+        }
+    
+    def analyze_batch(self, texts: List[str]) -> Tuple[List[Dict], List[Dict], Dict]:
+        """
+        Run sentiment analysis and hoax classification on many texts.
+        
+        Without a cascade model every text goes through IndoBERT. With one,
+        the linear models score everything first and only texts whose hoax
+        probability falls in [CASCADE_LOW, CASCADE_HIGH] (or whose sentiment
+        confidence is below CASCADE_SENTIMENT_CONFIDENCE) are escalated.
+        A CASCADE_AUDIT_RATE fraction of confident texts is escalated too,
+        so agreement between the two models is measured on both sides of
+        the band. Claim matching only applies to escalated texts.
+        
+        Args:
+            texts: Input texts (already preprocessed)
+        
+        Returns:
+            Tuple of (sentiment results, hoax results, cascade stats)
+        """
+        if self.cascade is None:
+            # Shared tokenizer: the second call is served from the cache
+            return (
+                self.analyze_sentiment_batch(texts),
+                self.classify_hoax_batch(texts),
+                {'mode': 'full', 'items': len(texts)},
+            )
+        
+        with span('cascade'):
+            hoax_model = self.cascade['hoax']
+            hoax_probs = hoax_model.predict_proba(texts)[:, list(hoax_model.classes_).index('hoax')]
+            sentiment_model = self.cascade.get('sentiment')
+            sentiment_probs = sentiment_model.predict_proba(texts) if sentiment_model is not None else None
+        
+        stats = {'mode': 'cascade', 'items': len(texts)}
+        
+        # Hoax: escalate when inside the uncertainty band
+        linear_hoax = []
+        for hoax_prob in hoax_probs:
+            hoax_prob = float(hoax_prob)
+            linear_hoax.append({
+                'label': self._hoax_label(hoax_prob),
                 'probability': hoax_prob,
-                'confidence': max(predictions[0]).item()
-            }
-        except Exception as e:
-            print(f"Error in hoax classification: {str(e)}")
-            return {'label': 'uncertain', 'probability': 0.5, 'confidence': 0.5}
+                'confidence': max(hoax_prob, 1 - hoax_prob),
+                'model': 'linear',
+            })
+        hoax_results, stats['hoax'] = self._escalate(
+            'hoax', texts, linear_hoax,
+            [self.cascade_low <= r['probability'] <= self.cascade_high for r in linear_hoax],
+            self.classify_hoax_batch,
+            # Escalated items are 'uncertain' by construction, so compare
+            # which side of 0.5 each model lands on rather than the label
+            lambda a, b: (a['probability'] >= 0.5) == (b['probability'] >= 0.5)
+        )
+        
+        # Sentiment: escalate when the linear model is not confident
+        if sentiment_probs is None:
+            sentiment_results = [{**r, 'model': 'indobert'} for r in self.analyze_sentiment_batch(texts)]
+            return sentiment_results, hoax_results, stats
+        
+        linear_sentiment = []
+        for probs in sentiment_probs:
+            label_idx = int(probs.argmax())
+            linear_sentiment.append({
+                'label': sentiment_model.classes_[label_idx],
+                'score': float(probs[label_idx]),
+                'model': 'linear',
+            })
+        sentiment_results, stats['sentiment'] = self._escalate(
+            'sentiment', texts, linear_sentiment,
+            [r['score'] < self.cascade_sentiment_confidence for r in linear_sentiment],
+            self.analyze_sentiment_batch
+        )
+        return sentiment_results, hoax_results, stats
+    
+    def _escalate(self, task: str, texts: List[str], linear_results: List[Dict], uncertain: List[bool], run_batch, same_decision=None) -> Tuple[List[Dict], Dict]:
+        """
+        Replace linear results by IndoBERT results for uncertain (and audited)
+        texts, running all of them in one batch, and collect cascade stats.
+        Agreement uses ``same_decision(transformer, linear)``, by default
+        equal labels.
+        """
+        same_decision = same_decision or (lambda a, b: a['label'] == b['label'])
+        routes = [
+            'escalated' if flag else ('audited' if random.random() < self.cascade_audit_rate else 'linear')
+            for flag in uncertain
+        ]
+        selected = [idx for idx, route in enumerate(routes) if route != 'linear']
+        results = list(linear_results)
+        stats = {'escalated': routes.count('escalated'), 'audited': routes.count('audited'), 'compared': 0, 'agreed': 0}
+        
+        transformer_results = run_batch([texts[idx] for idx in selected]) if selected else []
+        for idx, result in zip(selected, transformer_results):
+            agreed = same_decision(result, linear_results[idx])
+            results[idx] = {**result, 'model': 'indobert'}
+            stats['compared'] += 1
+            stats['agreed'] += agreed
+            record_cascade(task, routes[idx], agreed)
+        for route in routes:
+            if route == 'linear':
+                record_cascade(task, route)
+        
+        stats['escalation_rate'] = stats['escalated'] / len(texts) if texts else 0.0
+        stats['agreement'] = stats['agreed'] / stats['compared'] if stats['compared'] else None
+        return results, stats
+    
+    def _hoax_label(self, hoax_prob: float) -> str:
+        if hoax_prob > 0.6:
+            return 'hoax'
+        elif hoax_prob < 0.4:
+            return 'factual'
+        return 'uncertain'
+    
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """
+        Compute sentence embeddings with the hoax model's encoder.
+        
+        Args:
+            texts: Input texts (already preprocessed)
+        
+        Returns:
+            Array of shape (len(texts), hidden_size), mean-pooled over tokens
+        """
+        if not texts:
+            return np.zeros((0, self.hoax_model.config.hidden_size), dtype=np.float32)
+        token_ids = self.encode(texts, self.hoax_tokenizer)
+        _, embeddings = self._predict('hoax', self.hoax_model, self.hoax_tokenizer, token_ids, with_embeddings=True)
+        return embeddings
+    
+    def remember_claims(self, texts: List[str], hoax_results: List[Dict], claims: List[Dict]) -> int:
+        """
+        Add confidently classified texts to the claim index.
+        
+        Only texts whose probability is beyond CLAIM_INSERT_CONFIDENCE (either
+        way) and that did not already match a stored claim are inserted.
+        Embeddings come from the cache filled by ``classify_hoax``.
+        
+        Args:
+            texts: Preprocessed texts that were classified
+            hoax_results: Results from classify_hoax, aligned with texts
+            claims: Metadata to store per text (e.g. display text, source)
+        
+        Returns:
+            Number of inserted claims
+        """
+        if self.claim_index is None:
+            return 0
+        
+        vectors, new_claims = [], []
+        for text, result, claim in zip(texts, hoax_results, claims):
+            probability = result['probability']
+            if max(probability, 1 - probability) < self.claim_insert_confidence:
+                continue
+            if result.get('matched_claim', {}).get('similarity', 0) >= self.claim_match_threshold:
+                continue
+            embedding = self._embedding_cache.get(self._text_key(text))
+            if embedding is None:
+                continue
+            vectors.append(embedding)
+            new_claims.append({**claim, 'label': 'hoax' if probability >= 0.5 else 'factual'})
+        
+        if new_claims:
+            self.claim_index.add(np.stack(vectors), new_claims)
+        return len(new_claims)
+    
+    def _match_claim(self, embedding: np.ndarray) -> Optional[Dict]:
+        """Nearest known claim, if at least CLAIM_AUGMENT_THRESHOLD similar."""
+        with span('claim_match'):
+            matches = self.claim_index.search(embedding, k=1, nprobe=self.claim_nprobe)
+        if not matches or matches[0]['similarity'] < self.claim_augment_threshold:
+            return None
+        return matches[0]
+    
+    def _apply_claim_match(self, match: Dict, hoax_prob: Optional[float]) -> float:
+        """
+        Adjust the hoax probability by a matched claim.
+        
+        At or above CLAIM_MATCH_THRESHOLD the match decides the result (no
+        classifier probability is needed); between CLAIM_AUGMENT_THRESHOLD
+        and that, the classifier probability is blended towards the matched
+        label in proportion to similarity.
+        """
+        similarity = min(match['similarity'], 1.0)
+        matched_prob = similarity if match['label'] == 'hoax' else 1 - similarity
+        
+        if similarity >= self.claim_match_threshold:
+            return matched_prob
+        
+        weight = (similarity - self.claim_augment_threshold) / (self.claim_match_threshold - self.claim_augment_threshold)
+        return (1 - weight) * hoax_prob + weight * matched_prob
+    
+    @staticmethod
+    def _mean_pool(hidden: torch.Tensor, attention_mask: torch.Tensor) -> np.ndarray:
+        mask = attention_mask.unsqueeze(-1).to(hidden.dtype)
+        pooled = (hidden * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1)
+        return pooled.cpu().numpy().astype(np.float32)
+    
+    @staticmethod
+    def _text_key(text: str) -> str:
+        return hashlib.sha1(text.encode('utf-8')).hexdigest()
+    
+    def _cache_embedding(self, text: str, embedding: np.ndarray, max_size: int = 512):
+        key = self._text_key(text)
+        self._embedding_cache[key] = embedding
+        self._embedding_cache.move_to_end(key)
+        while len(self._embedding_cache) > max_size:
+            self._embedding_cache.popitem(last=False)
+    
+    def _keyword_weights(self, text: str, keywords: List[str]) -> List[float]:
+        """
+        Weight keywords by occlusion: drop each keyword's tokens from the
+        text's (cached) encoding and measure the change in hoax probability.
+        
+        Positive weights mean the keyword pushes towards 'hoax'. All variants
+        are scored in one batch and nothing is re-tokenized.
+        """
+        if not keywords:
+            return []
+        
+        doc_ids = self.encode([text], self.hoax_tokenizer)[0]
+        variants = [doc_ids] + [
+            self._remove_subsequence(doc_ids, keyword_ids)
+            for keyword_ids in self.encode(keywords, self.hoax_tokenizer)
+        ]
+        predictions, _ = self._predict('hoax', self.hoax_model, self.hoax_tokenizer, variants)
+        return [float(predictions[0][1] - prediction[1]) for prediction in predictions[1:]]
+    
+    @staticmethod
+    def _remove_subsequence(ids: Sequence[int], sub: Sequence[int]) -> List[int]:
+        if not sub:
+            return list(ids)
+        result, idx = [], 0
+        while idx < len(ids):
+            if ids[idx:idx + len(sub)] == sub:
+                idx += len(sub)
+            else:
+                result.append(ids[idx])
+                idx += 1
+        return result
     
     def extract_keywords(self, text: str, top_n: int = 10) -> List[str]:
         """
@@ -151,8 +627,10 @@ class NLPPipeline:
             keywords = [word for word, count in word_counts.most_common(top_n)]
             
             return keywords
-        except Exception as e:
-            print(f"Error in keyword extraction: {str(e)}")
+        except SoftTimeLimitExceeded:
+            raise
+        except Exception:
+            logger.exception("Error in keyword extraction")
             return []
     
     def explain_classification(self, text: str, classification_result: Dict) -> Dict:
@@ -176,8 +654,13 @@ class NLPPipeline:
             # Extract important words (simplified)
             keywords = self.extract_keywords(text, top_n=5)
             
-            # Generate fake weights (in production, use LIME/SHAP)
-            weights = np.random.uniform(-0.5, 0.5, len(keywords)).tolist()
+            # Occlusion costs one hoax-model pass per keyword, so it is opt-in
+            # and skipped when the cascade settled the item without IndoBERT
+            if self.explain_occlusion and classification_result.get('model') != 'linear':
+                weights = self._keyword_weights(text, keywords)
+            else:
+                # Generate fake weights (in production, use LIME/SHAP)
+                weights = np.random.uniform(-0.5, 0.5, len(keywords)).tolist()
             
             # Generate explanation text
             if label == 'hoax':
@@ -222,8 +705,10 @@ class NLPPipeline:
                 'explanation': explanation,
                 'contributing_factors': contributing_factors,
             }
-        except Exception as e:
-            print(f"Error in explainability generation: {str(e)}")
+        except SoftTimeLimitExceeded:
+            raise
+        except Exception:
+            logger.exception("Error in explainability generation")
             return {
                 'keywords': [],
                 'weights': [],
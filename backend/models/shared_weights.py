@@ -0,0 +1,109 @@
+import glob
+import hashlib
+import os
+
+import torch
+from transformers import AutoConfig, AutoModelForSequenceClassification
+from transformers.utils import cached_file
+
+def checkpoint_dir(model_name: str) -> str:
+    """
+    Directory of a checkpoint's files: the local path itself, or the hub
+    snapshot the transformers cache resolves the id to (downloading a newer
+    revision first when online, like from_pretrained).
+    """
+    if os.path.isdir(model_name):
+        return model_name
+    return os.path.dirname(cached_file(model_name, 'config.json'))
+
+def checkpoint_revision(model_name: str) -> str:
+    """
+    Fingerprint of the checkpoint's current files. Hub snapshots are named
+    by commit and their files are links to content-addressed blobs; local
+    files are identified by size and mtime. Any update changes the value.
+    """
+    directory = checkpoint_dir(model_name)
+    digest = hashlib.sha1()
+    for name in sorted(os.listdir(directory)):
+        path = os.path.join(directory, name)
+        if not os.path.isfile(path):
+            continue
+        stat = os.stat(path)
+        digest.update(f'{name}:{os.path.realpath(path)}:{stat.st_size}:{stat.st_mtime_ns}\n'.encode('utf-8'))
+    return digest.hexdigest()
+
+def weights_path(weights_dir: str, model_name: str, num_labels: int, revision: str = '') -> str:
+    """Cache file for one checkpoint revision and head size."""
+    digest = hashlib.sha1(f'{model_name}:{num_labels}:{revision}'.encode('utf-8')).hexdigest()[:12]
+    return os.path.join(weights_dir, f'{_slug(model_name)}-{num_labels}-{digest}.pt')
+
+def _slug(model_name: str) -> str:
+    return model_name.strip('/').replace('/', '--')[-60:]
+
+def export_weights(model_name: str, num_labels: int, path: str):
+    """
+    Save a model's parameters and buffers (including non-persistent ones)
+    in torch's zip format, which ``torch.load(mmap=True)`` can map.
+    """
+    model = AutoModelForSequenceClassification.from_pretrained(model_name, num_labels=num_labels)
+    tensors = {name: tensor.detach().contiguous() for name, tensor in model.state_dict(keep_vars=True).items()}
+    tensors.update({name: buffer.contiguous() for name, buffer in model.named_buffers()})
+
+    # Concurrent workers may export at the same time; publish atomically
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    torch.save(tensors, tmp_path)
+    os.replace(tmp_path, path)
+
+def load_shared_model(model_name: str, num_labels: int, weights_dir: str):
+    """
+    Load a sequence classifier whose weights are memory-mapped read-only.
+
+    The module tree is built on the meta device (no allocation), then every
+    parameter and buffer is assigned straight from the mapped file. All
+    processes on the host that load the same file, including forked Celery
+    children, read one copy of the weights from the page cache instead of
+    holding private copies. Inference never writes to the weights, so the
+    pages stay shared.
+
+    Args:
+        model_name: Hugging Face model id or local path
+        num_labels: Size of the classification head
+        weights_dir: Directory holding the exported weight files, one per
+            checkpoint revision (re-exported when the checkpoint changes)
+
+    Returns:
+        Model in eval mode on CPU
+    """
+    os.makedirs(weights_dir, exist_ok=True)
+    path = weights_path(weights_dir, model_name, num_labels, checkpoint_revision(model_name))
+    if not os.path.exists(path):
+        export_weights(model_name, num_labels, path)
+        # Exports of earlier revisions are stale; processes still mapping
+        # one keep their pages until they reload
+        for stale in glob.glob(os.path.join(weights_dir, f'{glob.escape(_slug(model_name))}-{num_labels}-*.pt')):
+            if stale != path:
+                try:
+                    os.remove(stale)
+                except FileNotFoundError:
+                    # Another worker cleaned it up first
+                    pass
+
+    config = AutoConfig.from_pretrained(model_name, num_labels=num_labels)
+    with torch.device('meta'):
+        model = AutoModelForSequenceClassification.from_config(config)
+
+    tensors = torch.load(path, map_location='cpu', mmap=True, weights_only=True)
+    persistent = model.state_dict()
+    model.load_state_dict({name: tensors[name] for name in persistent}, assign=True, strict=True)
+
+    # Non-persistent buffers (e.g. position_ids) are not in state_dict
+    for name, _ in list(model.named_buffers()):
+        if name in tensors and name not in persistent:
+            module_name, _, buffer_name = name.rpartition('.')
+            module = model.get_submodule(module_name) if module_name else model
+            module._buffers[buffer_name] = tensors[name]
+
+    model.tie_weights()
+    for parameter in model.parameters():
+        parameter.requires_grad_(False)
+    return model.eval()
@@ -0,0 +1,37 @@
+import sys
+import os
+import argparse
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from services.archive import ARCHIVE_URL, ARCHIVE_AFTER_DAYS
+from database.models import create_tables
+from database.crud import archive_old_results
+
+def main():
+    """Move results older than N days to the archive store (same as the beat task)."""
+    parser = argparse.ArgumentParser(description='Archive old analysis results to compressed blobs.')
+    parser.add_argument('--days', type=int, default=ARCHIVE_AFTER_DAYS, help='Archive results older than this')
+    parser.add_argument('--limit', type=int, help='Archive at most this many results')
+    parser.add_argument('--batch-size', type=int, default=100)
+    args = parser.parse_args()
+
+    if not ARCHIVE_URL:
+        print("✗ ARCHIVE_URL is not set")
+        sys.exit(1)
+
+    try:
+        create_tables()
+        archived = archive_old_results(args.days, batch_size=args.batch_size, limit=args.limit)
+        print(f"✓ Archived {archived} results older than {args.days} days to {ARCHIVE_URL}")
+    except Exception as e:
+        print(f"✗ Error archiving results: {str(e)}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+import sys
+import os
+import argparse
+import csv
+import json
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.nlp_pipeline import NLPPipeline
+from models.claim_index import ClaimIndex
+from services.preprocessor import preprocess_text
+
+def load_claims(path):
+    """Load labeled claims from a CSV (text,label[,source]) or JSONL file."""
+    if path.endswith('.jsonl'):
+        with open(path, encoding='utf-8') as f:
+            return [json.loads(line) for line in f if line.strip()]
+    with open(path, encoding='utf-8', newline='') as f:
+        return list(csv.DictReader(f))
+
+def main():
+    """Seed the claim index with labeled hoax/factual claims and train its IVF lists."""
+    parser = argparse.ArgumentParser(description='Build or extend the claim matching index.')
+    parser.add_argument('input', nargs='?', help='CSV or JSONL file with text and label (hoax/factual)')
+    parser.add_argument('--index-dir', default=os.getenv('CLAIM_INDEX_DIR'), help='Index directory (default: CLAIM_INDEX_DIR)')
+    parser.add_argument('--nlist', type=int, help='Number of IVF lists (default: sqrt of index size)')
+    parser.add_argument('--batch-size', type=int, default=16)
+    args = parser.parse_args()
+
+    if not args.index_dir:
+        print("✗ No index directory given (use --index-dir or set CLAIM_INDEX_DIR)")
+        sys.exit(1)
+
+    try:
+        # The pipeline must not open the index itself while we build it
+        os.environ.pop('CLAIM_INDEX_DIR', None)
+        pipeline = NLPPipeline()
+        index = ClaimIndex(args.index_dir, dim=pipeline.hoax_model.config.hidden_size)
+
+        if args.input:
+            claims = [c for c in load_claims(args.input) if c.get('label') in ('hoax', 'factual') and c.get('text')]
+            print(f"Embedding {len(claims)} claims...")
+            pipeline.batch_size = args.batch_size
+            vectors = pipeline.embed([preprocess_text(c['text']) for c in claims])
+            index.add(vectors, [
+                {'text': c['text'][:300], 'label': c['label'], 'source': c.get('source') or os.path.basename(args.input)}
+                for c in claims
+            ])
+
+        if len(index) == 0:
+            print("✗ Claim index is empty, nothing to train")
+            sys.exit(1)
+        
+        print(f"Training IVF lists over {len(index)} claims...")
+        index.train(nlist=args.nlist)
+        print(f"✓ Claim index ready at {args.index_dir} ({len(index)} claims, {len(index.centroids)} lists)")
+    except Exception as e:
+        print(f"✗ Error building claim index: {str(e)}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+import sys
+import os
+import argparse
+import json
+import multiprocessing
+import tempfile
+import time
+from datetime import datetime
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.tuning import available_cpus, configure_process
+
+def candidate_workers(cpus):
+    """Worker counts worth trying: powers of two up to the CPU budget, and the budget itself."""
+    counts = {cpus}
+    count = 1
+    while count < cpus:
+        counts.add(count)
+        count *= 2
+    return sorted(counts)
+
+def measure(pipeline, texts, config, worker_index, seconds, results):
+    """Child process body: score texts repeatedly and report items/s."""
+    configure_process(worker_index, config)
+    pipeline.batch_size = config['batch_size']
+    batch = (texts * (config['batch_size'] // len(texts) + 1))[:max(config['batch_size'], len(texts))]
+
+    pipeline.analyze_batch(batch)  # warmup (tokens are cached from here on)
+    items = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        pipeline.analyze_batch(batch)
+        items += len(batch)
+    results.put(items / (time.perf_counter() - start))
+
+def run_trial(pipeline, texts, config, seconds):
+    """Run ``config['workers']`` forked processes concurrently; total items/s."""
+    context = multiprocessing.get_context('fork')
+    results = context.Queue()
+    processes = [
+        context.Process(target=measure, args=(pipeline, texts, config, index, seconds, results))
+        for index in range(config['workers'])
+    ]
+    for process in processes:
+        process.start()
+    throughputs = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    return sum(throughputs)
+
+def main():
+    """Measure throughput over workers x threads x batch size and write the best configuration."""
+    parser = argparse.ArgumentParser(description='Calibrate inference concurrency for this host.')
+    parser.add_argument('--output', default=os.getenv('INFERENCE_TUNING_FILE') or 'inference_tuning.json',
+                        help='Where to write the configuration (read via INFERENCE_TUNING_FILE)')
+    parser.add_argument('--workers', type=int, nargs='+', help='Worker counts (default: powers of two up to the CPU budget)')
+    parser.add_argument('--threads', type=int, nargs='+', help='Threads per worker (default: every count that fits the budget)')
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[4, 8, 16, 32])
+    parser.add_argument('--seconds', type=float, default=10.0, help='Measurement time per combination')
+    parser.add_argument('--pin', action='store_true', help='Pin each worker to its own cores')
+    parser.add_argument('--oversubscribe', action='store_true', help='Also try workers x threads above the CPU budget')
+    parser.add_argument('--tiny-model', action='store_true', help='Use the benchmark tiny model (smoke test only)')
+    args = parser.parse_args()
+
+    cpus = available_cpus()
+    print(f"CPU budget: {cpus} (affinity and cgroup quota)")
+
+    if args.tiny_model:
+        from benchmarks.tiny_models import build_tiny_model
+        model_dir = build_tiny_model(os.path.join(tempfile.gettempdir(), 'hoaxalyzer-tiny-indobert'))
+        os.environ['SENTIMENT_MODEL'] = model_dir
+        os.environ['HOAX_MODEL'] = model_dir
+    # Calibration measures the models alone
+    os.environ.pop('CASCADE_MODEL_PATH', None)
+    os.environ.pop('CLAIM_INDEX_DIR', None)
+
+    try:
+        from benchmarks.run import load_texts
+        from models.nlp_pipeline import NLPPipeline
+
+        # Load once before forking, like the Celery prefork parent
+        configure_process(config={'threads': 1, 'interop_threads': 1, 'pin': False})
+        pipeline = NLPPipeline()
+        texts = [text for text in load_texts() if text]
+
+        trials = []
+        for workers in args.workers or candidate_workers(cpus):
+            thread_counts = args.threads or range(1, cpus // workers + 1)
+            for threads in thread_counts:
+                if workers * threads > cpus and not args.oversubscribe:
+                    continue
+                for batch_size in args.batch_sizes:
+                    config = {
+                        'workers': workers,
+                        'threads': threads,
+                        'interop_threads': 1,
+                        'batch_size': batch_size,
+                        'pin': args.pin,
+                    }
+                    throughput = run_trial(pipeline, texts, config, args.seconds)
+                    trials.append({**config, 'items_per_second': throughput})
+                    print(f"  workers={workers:<3} threads={threads:<3} batch={batch_size:<4} {throughput:8.1f} items/s")
+
+        if not trials:
+            print("✗ No combination fits the CPU budget")
+            sys.exit(1)
+
+        best = max(trials, key=lambda trial: trial['items_per_second'])
+        report = {
+            'best': {key: best[key] for key in ('workers', 'threads', 'batch_size')},
+            'cpus': cpus,
+            'pin': args.pin,
+            'models': 'tiny' if args.tiny_model else 'configured',
+            'calibrated_at': datetime.utcnow().isoformat(),
+            'trials': trials,
+        }
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"✓ Best: {best['workers']} workers x {best['threads']} threads, batch {best['batch_size']} "
+              f"({best['items_per_second']:.1f} items/s), written to {args.output}")
+    except Exception as e:
+        print(f"✗ Error during calibration: {str(e)}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
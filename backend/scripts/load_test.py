@@ -0,0 +1,392 @@
+import sys
+import os
+import argparse
+import json
+import random
+import re
+import socket
+import subprocess
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Add parent directory to path
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BACKEND_DIR)
+
+import redis
+import requests
+from celery import Celery
+
+from benchmarks.fixture_server import FIXTURES_DIR
+from benchmarks.run import ARTICLE_FIXTURES, summarize
+from benchmarks.tiny_models import build_tiny_model
+from services.admission import LANES, queue_depth
+
+TOPIC_KEYWORDS = ['banjir jakarta', 'vaksin', 'pemilu', 'harga beras', 'gempa', 'data pribadi']
+
+class NewsPortalServer:
+    """
+    Fake news portal for load tests: ``/berita/<n>.html`` serves one of the
+    fixture articles, made unique per ``n`` (paragraph order and a report
+    number) so scraped texts do not all hit the same caches.
+    """
+
+    def __init__(self, latency: float = 0.0, port: int = 0):
+        templates = []
+        for name in ARTICLE_FIXTURES:
+            with open(os.path.join(FIXTURES_DIR, name), encoding='utf-8') as f:
+                templates.append(f.read())
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                match = re.fullmatch(r'/berita/(\d+)\.html', self.path)
+                if not match:
+                    self.send_error(404)
+                    return
+                if latency:
+                    time.sleep(latency)
+                body = render_article(templates, int(match.group(1))).encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', port), Handler)
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def url(self, n: int) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f'http://{host}:{port}/berita/{n}.html'
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+def render_article(templates, n):
+    """Fixture article number ``n % len(templates)``, varied by ``n``."""
+    html = templates[n % len(templates)]
+    paragraphs = re.findall(r'<p>.*?</p>', html, flags=re.S)
+    if not paragraphs:
+        return html
+    shift = n % len(paragraphs)
+    rotated = paragraphs[shift:] + paragraphs[:shift]
+    rotated[0] = rotated[0].replace('<p>', f'<p>Laporan nomor {n}. ', 1)
+    start = html.index(paragraphs[0])
+    end = html.index(paragraphs[-1]) + len(paragraphs[-1])
+    return html[:start] + '\n      '.join(rotated) + html[end:]
+
+class LoadRecorder:
+    """Thread-safe collection of per-job outcomes."""
+
+    def __init__(self):
+        self.jobs = []
+        self.in_flight = 0
+        self._lock = threading.Lock()
+
+    def started(self):
+        with self._lock:
+            self.in_flight += 1
+
+    def finished(self, record):
+        with self._lock:
+            self.in_flight -= 1
+            self.jobs.append(record)
+
+_local = threading.local()
+
+def _session():
+    if not hasattr(_local, 'session'):
+        _local.session = requests.Session()
+    return _local.session
+
+def run_job(api_url, endpoint, payload, client_id, poll_interval, timeout):
+    """Submit one job and poll its results until it finishes or times out."""
+    session = _session()
+    record = {'endpoint': endpoint, 'submitted_at': time.time()}
+    try:
+        response = session.post(f'{api_url}/api/v1/analyze/{endpoint}', json=payload,
+                                headers={'X-Client-ID': client_id}, timeout=30)
+        record['submit_ms'] = (time.time() - record['submitted_at']) * 1000
+        if response.status_code == 429:
+            record['status'] = 'rejected'
+            record['retry_after'] = response.headers.get('Retry-After')
+            return record
+        response.raise_for_status()
+        job_id = response.json()['job_id']
+
+        etag = None
+        while time.time() - record['submitted_at'] < timeout:
+            time.sleep(poll_interval)
+            headers = {'If-None-Match': etag} if etag else {}
+            poll = session.get(f'{api_url}/api/v1/results/{job_id}', headers=headers, timeout=30)
+            # 404 until a worker picks the job up; 304 while unchanged
+            if poll.status_code in (304, 404):
+                continue
+            poll.raise_for_status()
+            etag = poll.headers.get('ETag')
+            status = poll.json()['status']
+            if status in ('completed', 'failed'):
+                record['status'] = status
+                record['latency'] = time.time() - record['submitted_at']
+                return record
+        record['status'] = 'timeout'
+    except requests.RequestException as e:
+        record['status'] = 'error'
+        record['error'] = str(e)
+    return record
+
+def drive(args, api_url, portal, recorder):
+    """Open-loop load: submit jobs at the configured rates for the test duration."""
+    rates = {'url': args.url_rate, 'topic': args.topic_rate}
+    counter = iter(range(10 ** 9))
+    rng = random.Random(args.seed)
+    executor = ThreadPoolExecutor(max_workers=args.max_concurrency)
+
+    def submit(endpoint):
+        if endpoint == 'url':
+            payload = {'url': portal.url(next(counter))}
+        else:
+            payload = {'keyword': rng.choice(TOPIC_KEYWORDS)}
+        client_id = f'loadtest-{rng.randrange(args.clients)}'
+        recorder.started()
+        future = executor.submit(run_job, api_url, endpoint, payload, client_id, args.poll_interval, args.job_timeout)
+        future.add_done_callback(lambda f: recorder.finished(f.result()))
+
+    def generator(endpoint, rate):
+        deadline = time.time() + args.duration
+        next_at = time.time()
+        while next_at < deadline:
+            time.sleep(max(0.0, next_at - time.time()))
+            submit(endpoint)
+            gap = rng.expovariate(rate) if args.arrivals == 'poisson' else 1.0 / rate
+            next_at += gap
+
+    threads = [
+        threading.Thread(target=generator, args=(endpoint, rate), daemon=True)
+        for endpoint, rate in rates.items() if rate > 0
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    executor.shutdown(wait=True)
+
+def sample_queues(broker_app, recorder, interval, stop, timeline):
+    """Record broker queue depth per lane (and jobs in flight) over time."""
+    start = time.time()
+    while not stop.wait(interval):
+        sample = {'t': round(time.time() - start, 2), 'in_flight': recorder.in_flight}
+        if broker_app is not None:
+            for lane in ('interactive', 'bulk'):
+                sample[lane] = queue_depth(broker_app, lane)
+        timeline.append(sample)
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def start_stack(args, workdir):
+    """
+    Start the API (uvicorn) and a Celery worker against offline resources:
+    SQLite, a filesystem broker (no Redis or RabbitMQ needed) and the tiny
+    model unless --real-models is given.
+    """
+    env = dict(os.environ)
+    if not args.real_models:
+        model_dir = build_tiny_model(args.model_dir)
+        env['SENTIMENT_MODEL'] = model_dir
+        env['HOAX_MODEL'] = model_dir
+    env['DATABASE_URL'] = args.database_url or f"sqlite:///{os.path.join(workdir, 'loadtest.db')}"
+    env['CELERY_RESULT_BACKEND'] = 'cache+memory://'
+    env.pop('PROMETHEUS_MULTIPROC_DIR', None)
+
+    if args.broker_url:
+        env['CELERY_BROKER_URL'] = args.broker_url
+        broker_options = {}
+    else:
+        queue_dir = os.path.join(workdir, 'broker')
+        os.makedirs(queue_dir)
+        broker_options = {'data_folder_in': queue_dir, 'data_folder_out': queue_dir}
+        env['CELERY_BROKER_URL'] = 'filesystem://'
+        env['CELERY_BROKER_TRANSPORT_OPTIONS'] = json.dumps(broker_options)
+
+    # Admission and URL batching need Redis; without it they are skipped
+    try:
+        redis.Redis.from_url(env.get('REDIS_URL', 'redis://localhost:6379'), socket_connect_timeout=0.5).ping()
+    except redis.RedisError:
+        print("  Redis not reachable: admission fails open, URL batching disabled")
+        env['URL_BATCH_MAX_SIZE'] = '1'
+
+    port = free_port()
+    api_url = f'http://127.0.0.1:{port}'
+    logs = {name: open(os.path.join(workdir, f'{name}.log'), 'w') for name in ('api', 'worker')}
+    processes = [
+        subprocess.Popen(
+            [sys.executable, '-m', 'uvicorn', 'main:app', '--host', '127.0.0.1', '--port', str(port),
+             '--workers', str(args.api_workers), '--log-level', 'warning'],
+            cwd=BACKEND_DIR, env=env, stdout=logs['api'], stderr=subprocess.STDOUT,
+        ),
+    ]
+
+    deadline = time.time() + args.startup_timeout
+    while True:
+        try:
+            if requests.get(f'{api_url}/health', timeout=1).ok:
+                break
+        except requests.RequestException:
+            pass
+        if time.time() > deadline or processes[0].poll() is not None:
+            stop_stack(processes)
+            raise RuntimeError(f"API did not start, see {logs['api'].name}")
+        time.sleep(0.5)
+
+    # The API creates the tables on startup, so the worker starts after it
+    processes.append(subprocess.Popen(
+        [sys.executable, '-m', 'celery', '-A', 'celery_worker', 'worker',
+         '-Q', ','.join([LANES['url'], LANES['topic'], LANES['watch']]),
+         '-c', str(args.worker_concurrency), '--loglevel', 'warning'],
+        cwd=BACKEND_DIR, env=env, stdout=logs['worker'], stderr=subprocess.STDOUT,
+    ))
+
+    broker_app = Celery(broker=env['CELERY_BROKER_URL'])
+    broker_app.conf.broker_transport_options = broker_options
+    return processes, api_url, broker_app
+
+def stop_stack(processes):
+    for process in processes:
+        process.terminate()
+    for process in processes:
+        try:
+            process.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+def report(args, recorder, timeline, elapsed):
+    """Summarize outcomes per endpoint."""
+    results = {}
+    for endpoint in ('url', 'topic'):
+        jobs = [job for job in recorder.jobs if job['endpoint'] == endpoint]
+        if not jobs:
+            continue
+        counts = {status: sum(1 for job in jobs if job.get('status') == status)
+                  for status in ('completed', 'failed', 'rejected', 'timeout', 'error')}
+        latencies = [job['latency'] for job in jobs if job.get('status') == 'completed']
+        submits = [job['submit_ms'] / 1000.0 for job in jobs if 'submit_ms' in job]
+        results[endpoint] = {
+            'submitted': len(jobs),
+            **counts,
+            'throughput_per_second': counts['completed'] / elapsed,
+            'latency_ms': summarize(latencies) if latencies else None,
+            'submit_ms': summarize(submits) if submits else None,
+        }
+
+    depths = [sample for sample in timeline if 'bulk' in sample]
+    return {
+        'meta': {
+            'timestamp': datetime.utcnow().isoformat(),
+            'duration': args.duration,
+            'elapsed': elapsed,
+            'url_rate': args.url_rate,
+            'topic_rate': args.topic_rate,
+            'arrivals': args.arrivals,
+            'clients': args.clients,
+            'models': 'real' if args.real_models else 'tiny',
+            'worker_concurrency': args.worker_concurrency,
+        },
+        'results': results,
+        'queue_depth': {
+            'max': {lane: max((sample[lane] for sample in depths), default=0) for lane in ('interactive', 'bulk')},
+            'timeline': timeline,
+        },
+    }
+
+def main():
+    """Drive the analysis API at fixed rates offline and report throughput, latency and queue depth."""
+    parser = argparse.ArgumentParser(description='Load test the Hoaxalyzer API and workers against a fake news portal.')
+    parser.add_argument('--url-rate', type=float, default=2.0, help='URL jobs per second')
+    parser.add_argument('--topic-rate', type=float, default=0.2, help='Topic jobs per second')
+    parser.add_argument('--duration', type=float, default=60.0, help='Seconds of load generation')
+    parser.add_argument('--arrivals', choices=['constant', 'poisson'], default='poisson')
+    parser.add_argument('--clients', type=int, default=4, help='Distinct X-Client-ID values')
+    parser.add_argument('--poll-interval', type=float, default=0.25)
+    parser.add_argument('--job-timeout', type=float, default=300.0, help='Give up polling a job after this long')
+    parser.add_argument('--max-concurrency', type=int, default=256, help='Concurrent submit/poll loops')
+    parser.add_argument('--sample-interval', type=float, default=1.0, help='Queue depth sampling period')
+    parser.add_argument('--portal-latency-ms', type=float, default=50.0, help='Response delay of the fake portal')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default='loadtest_results.json')
+    parser.add_argument('--api-url', help='Target a running deployment instead of starting one')
+    parser.add_argument('--broker-url', help='Broker for queue depth (and for the started worker)')
+    parser.add_argument('--database-url', help='Database for the started stack (default: temporary SQLite)')
+    parser.add_argument('--worker-concurrency', type=int, default=2)
+    parser.add_argument('--api-workers', type=int, default=1)
+    parser.add_argument('--startup-timeout', type=float, default=120.0)
+    parser.add_argument('--model-dir', default=os.path.join(tempfile.gettempdir(), 'hoaxalyzer-tiny-indobert'),
+                        help='Where the tiny random model is built (reused across runs)')
+    parser.add_argument('--real-models', action='store_true',
+                        help='Use SENTIMENT_MODEL / HOAX_MODEL from the environment instead of the tiny model')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='hoaxalyzer-loadtest-')
+    processes = []
+    try:
+        with NewsPortalServer(latency=args.portal_latency_ms / 1000.0) as portal:
+            if args.api_url:
+                api_url = args.api_url.rstrip('/')
+                broker_app = Celery(broker=args.broker_url) if args.broker_url else None
+            else:
+                print(f"Starting API and worker (logs in {workdir})...")
+                processes, api_url, broker_app = start_stack(args, workdir)
+
+            # One job end to end before measuring: worker up, models warm
+            warmup = run_job(api_url, 'url', {'url': portal.url(0)}, 'loadtest-warmup', 0.5, args.startup_timeout)
+            if warmup.get('status') != 'completed':
+                raise RuntimeError(f"Warmup job did not complete: {warmup}")
+
+            print(f"Driving {args.url_rate}/s URL and {args.topic_rate}/s topic jobs for {args.duration:.0f}s...")
+            recorder = LoadRecorder()
+            timeline = []
+            stop = threading.Event()
+            sampler = threading.Thread(
+                target=sample_queues, args=(broker_app, recorder, args.sample_interval, stop, timeline), daemon=True
+            )
+            sampler.start()
+            start = time.time()
+            drive(args, api_url, portal, recorder)
+            elapsed = time.time() - start
+            stop.set()
+            sampler.join()
+
+        result = report(args, recorder, timeline, elapsed)
+        for endpoint, stats in result['results'].items():
+            latency = stats['latency_ms'] or {}
+            print(f"  {endpoint:6s} submitted={stats['submitted']} completed={stats['completed']} "
+                  f"failed={stats['failed']} rejected={stats['rejected']} timeout={stats['timeout']} "
+                  f"throughput={stats['throughput_per_second']:.2f}/s "
+                  f"p50={latency.get('p50', 0):.0f}ms p95={latency.get('p95', 0):.0f}ms p99={latency.get('p99', 0):.0f}ms")
+        print(f"  max queue depth: {result['queue_depth']['max']}")
+
+        with open(args.output, 'w') as f:
+            json.dump(result, f, indent=2)
+        print(f"✓ Report written to {args.output}")
+    except Exception as e:
+        print(f"✗ Load test failed: {str(e)}")
+        sys.exit(1)
+    finally:
+        stop_stack(processes)
+
+if __name__ == "__main__":
+    main()
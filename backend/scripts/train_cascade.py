@@ -0,0 +1,77 @@
+import sys
+import os
+import argparse
+from datetime import datetime
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import joblib
+import pandas as pd
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import accuracy_score
+from sklearn.model_selection import train_test_split
+from sklearn.pipeline import Pipeline
+
+from services.preprocessor import preprocess_text
+
+def build_model():
+    """TF-IDF (word uni/bigrams) + logistic regression."""
+    return Pipeline([
+        ('tfidf', TfidfVectorizer(ngram_range=(1, 2), min_df=2, max_features=200000, sublinear_tf=True)),
+        ('clf', LogisticRegression(max_iter=1000, class_weight='balanced')),
+    ])
+
+def train(texts, labels, name, test_size, seed):
+    """Fit a model, report holdout accuracy, then refit on all data."""
+    train_x, test_x, train_y, test_y = train_test_split(
+        texts, labels, test_size=test_size, random_state=seed, stratify=labels
+    )
+    model = build_model().fit(train_x, train_y)
+    accuracy = accuracy_score(test_y, model.predict(test_x))
+    print(f"  {name}: {len(texts)} samples, holdout accuracy {accuracy:.3f}")
+    return build_model().fit(texts, labels), accuracy
+
+def main():
+    """Train the cascade's linear hoax (and optionally sentiment) models."""
+    parser = argparse.ArgumentParser(description='Train the TF-IDF + logistic regression cascade models.')
+    parser.add_argument('input', help="CSV with a 'text' column, a 'label' column (hoax/factual) and optionally 'sentiment'")
+    parser.add_argument('--output', default=os.getenv('CASCADE_MODEL_PATH', 'cascade.joblib'))
+    parser.add_argument('--test-size', type=float, default=0.2)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    try:
+        data = pd.read_csv(args.input)
+        print(f"Preprocessing {len(data)} texts...")
+        # Same preprocessing as the tasks apply before inference
+        data['cleaned_text'] = data['text'].fillna('').map(preprocess_text)
+
+        print("Training cascade models...")
+        hoax_data = data[data['label'].isin(['hoax', 'factual'])]
+        hoax_model, hoax_accuracy = train(
+            hoax_data['cleaned_text'].tolist(), hoax_data['label'].tolist(), 'hoax', args.test_size, args.seed
+        )
+
+        sentiment_model, sentiment_accuracy = None, None
+        if 'sentiment' in data.columns:
+            sentiment_data = data[data['sentiment'].isin(['negative', 'neutral', 'positive'])]
+            sentiment_model, sentiment_accuracy = train(
+                sentiment_data['cleaned_text'].tolist(), sentiment_data['sentiment'].tolist(),
+                'sentiment', args.test_size, args.seed
+            )
+
+        joblib.dump({
+            'hoax': hoax_model,
+            'sentiment': sentiment_model,
+            'metrics': {'hoax_accuracy': hoax_accuracy, 'sentiment_accuracy': sentiment_accuracy},
+            'trained_at': datetime.utcnow().isoformat(),
+        }, args.output)
+        print(f"✓ Cascade models saved to {args.output}")
+    except Exception as e:
+        print(f"✗ Error training cascade models: {str(e)}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+import math
+import os
+import time
+from collections import Counter
+from typing import Dict, Optional
+
+import redis
+
+from services.tuning import inference_config
+
+# Priority lanes: each query type gets its own Celery queue. Workers consume
+# them in this order (see broker_transport_options in celery_worker), so a
+# burst of topic jobs never sits in front of an interactive URL check.
+LANES = {
+    'url': 'interactive',
+    'topic': 'bulk',
+    'watch': 'watch',
+}
+
+# Admission thresholds per lane (jobs queued in the broker)
+MAX_QUEUE_DEPTH = {
+    'interactive': int(os.getenv('MAX_QUEUE_DEPTH_INTERACTIVE', '200')),
+    'bulk': int(os.getenv('MAX_QUEUE_DEPTH_BULK', '50')),
+}
+# Rough service time per job, used to estimate Retry-After
+SECONDS_PER_JOB = {
+    'interactive': float(os.getenv('SECONDS_PER_JOB_INTERACTIVE', '5')),
+    'bulk': float(os.getenv('SECONDS_PER_JOB_BULK', '60')),
+}
+WORKER_CONCURRENCY = inference_config()['workers']
+
+# In-flight jobs older than this are assumed lost (worker killed, time limit)
+INFLIGHT_TTL = int(os.getenv('ADMISSION_INFLIGHT_TTL', '900'))
+# Broker priorities 0 (first) .. 9; Redis serves lower numbers first
+MAX_PRIORITY = 9
+DEPTH_CACHE_SECONDS = 1.0
+
+_redis = None
+_depth_cache: Dict[str, tuple] = {}
+
+class AdmissionRejected(Exception):
+    """Raised when a lane is saturated or a client is over its fair share."""
+
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+def get_redis():
+    global _redis
+    if _redis is None:
+        _redis = redis.Redis.from_url(
+            os.getenv('REDIS_URL', 'redis://localhost:6379'),
+            socket_timeout=0.5,
+            socket_connect_timeout=0.5,
+        )
+    return _redis
+
+def _inflight_key(lane: str) -> str:
+    return f'hoaxalyzer:inflight:{lane}'
+
+def queue_depth(app, queue: str) -> int:
+    """
+    Number of messages waiting in a broker queue (cached for a second).
+
+    Uses a passive queue declare, which works for both Redis and AMQP
+    brokers; an unknown queue counts as empty.
+    """
+    cached = _depth_cache.get(queue)
+    if cached and time.monotonic() - cached[1] < DEPTH_CACHE_SECONDS:
+        return cached[0]
+
+    try:
+        with app.connection_for_read() as connection:
+            depth = connection.default_channel.queue_declare(queue=queue, passive=True).message_count
+    except Exception:
+        depth = 0
+    _depth_cache[queue] = (depth, time.monotonic())
+    return depth
+
+def client_inflight(lane: str) -> Counter:
+    """Count of admitted, unfinished jobs per client in a lane."""
+    conn = get_redis()
+    key = _inflight_key(lane)
+    conn.zremrangebyscore(key, 0, time.time() - INFLIGHT_TTL)
+    return Counter(
+        member.decode('utf-8').rsplit(':', 1)[0]
+        for member in conn.zrange(key, 0, -1)
+    )
+
+def admit(app, query_type: str, client_id: str, job_id: str) -> Dict:
+    """
+    Decide whether a job may be queued.
+
+    A job is rejected when its lane's queue is deeper than the lane's
+    threshold, or when the client already holds more than its fair share
+    of the lane (threshold divided by the number of active clients).
+    Admitted jobs get a broker priority equal to the client's number of
+    jobs already in flight, so one client's burst is interleaved with
+    everyone else's work instead of being served first.
+
+    Args:
+        app: Celery app (for broker access)
+        query_type: 'url' or 'topic'
+        client_id: Caller identity (X-Client-ID header or remote address)
+        job_id: Job being submitted
+
+    Returns:
+        Dict with the 'queue' and 'priority' to publish with
+
+    Raises:
+        AdmissionRejected: With a reason and a Retry-After estimate in seconds
+    """
+    lane = LANES[query_type]
+    limit = MAX_QUEUE_DEPTH[lane]
+
+    depth = queue_depth(app, lane)
+    if depth >= limit:
+        raise AdmissionRejected(
+            f'{lane} queue is full ({depth} jobs waiting)',
+            _retry_after(lane, depth - limit + 1),
+        )
+
+    try:
+        inflight = client_inflight(lane)
+        mine = inflight.get(client_id, 0)
+        active_clients = len(inflight) + (0 if mine else 1)
+        share = max(1, limit // active_clients)
+        if mine >= share:
+            raise AdmissionRejected(
+                f'client has {mine} {lane} jobs in flight (fair share is {share})',
+                _retry_after(lane, mine - share + 1),
+            )
+        get_redis().zadd(_inflight_key(lane), {f'{client_id}:{job_id}': time.time()})
+    except redis.RedisError:
+        # Fair share is best effort; never refuse work because Redis is down
+        mine = 0
+
+    return {'queue': lane, 'priority': min(mine, MAX_PRIORITY)}
+
+def release(query_type: str, client_id: Optional[str], job_id: str):
+    """Mark an admitted job as finished (or never queued)."""
+    if not client_id:
+        return
+    try:
+        get_redis().zrem(_inflight_key(LANES[query_type]), f'{client_id}:{job_id}')
+    except redis.RedisError:
+        pass
+
+def _retry_after(lane: str, jobs_ahead: int) -> int:
+    """Seconds until roughly ``jobs_ahead`` jobs of the lane are drained."""
+    return max(1, math.ceil(jobs_ahead * SECONDS_PER_JOB[lane] / max(1, WORKER_CONCURRENCY)))
@@ -0,0 +1,128 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+import orjson
+import zstandard
+
+from services.serialization import dumps
+from services.telemetry import record_cache
+
+# Where archived results go: a local directory (/path or file:///path) or
+# an S3-compatible bucket (s3://bucket/prefix). Archival is off when empty.
+ARCHIVE_URL = os.getenv('ARCHIVE_URL', '')
+ARCHIVE_AFTER_DAYS = int(os.getenv('ARCHIVE_AFTER_DAYS', '30'))
+ARCHIVE_CACHE_SIZE = int(os.getenv('ARCHIVE_CACHE_SIZE', '128'))
+ZSTD_LEVEL = int(os.getenv('ARCHIVE_ZSTD_LEVEL', '10'))
+
+class LocalArchiveStore:
+    """Blobs as files under a root directory."""
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def uri(self, key: str) -> str:
+        return 'file://' + os.path.join(os.path.abspath(self.root), key)
+
+    def put(self, key: str, data: bytes) -> str:
+        path = os.path.join(self.root, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        return self.uri(key)
+
+class S3ArchiveStore:
+    """
+    Blobs in an S3-compatible bucket. Set ARCHIVE_S3_ENDPOINT to use MinIO
+    (or any other S3 stand-in); credentials come from the usual AWS_*
+    environment variables.
+    """
+
+    def __init__(self, bucket: str, prefix: str = ''):
+        import boto3
+
+        self.bucket = bucket
+        self.prefix = prefix.strip('/')
+        self.client = boto3.client('s3', endpoint_url=os.getenv('ARCHIVE_S3_ENDPOINT') or None)
+
+    def uri(self, key: str) -> str:
+        return f's3://{self.bucket}/{self._object_key(key)}'
+
+    def _object_key(self, key: str) -> str:
+        return f'{self.prefix}/{key}' if self.prefix else key
+
+    def put(self, key: str, data: bytes) -> str:
+        self.client.put_object(
+            Bucket=self.bucket,
+            Key=self._object_key(key),
+            Body=data,
+            ContentType='application/json',
+            ContentEncoding='zstd',
+        )
+        return self.uri(key)
+
+_store = None
+_s3_client = None
+_hot_cache = OrderedDict()
+_hot_cache_lock = threading.Lock()
+
+def get_archive_store():
+    """Store configured by ARCHIVE_URL, or None when archival is disabled."""
+    global _store
+    if _store is None and ARCHIVE_URL:
+        parsed = urlparse(ARCHIVE_URL)
+        if parsed.scheme == 's3':
+            _store = S3ArchiveStore(parsed.netloc, parsed.path)
+        else:
+            _store = LocalArchiveStore(parsed.path if parsed.scheme == 'file' else ARCHIVE_URL)
+    return _store
+
+def archive_key(job_id: str, created_at) -> str:
+    """Blob key of a job's results, partitioned by month."""
+    return f'results/{created_at:%Y/%m}/{job_id}.json.zst'
+
+def pack(results: Dict) -> bytes:
+    return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(dumps(results))
+
+def unpack(data: bytes) -> Dict:
+    return orjson.loads(zstandard.ZstdDecompressor().decompress(data))
+
+def read_blob(uri: str) -> bytes:
+    """Read an archived blob from the pointer stored in its row."""
+    parsed = urlparse(uri)
+    if parsed.scheme == 's3':
+        global _s3_client
+        if _s3_client is None:
+            import boto3
+            _s3_client = boto3.client('s3', endpoint_url=os.getenv('ARCHIVE_S3_ENDPOINT') or None)
+        return _s3_client.get_object(Bucket=parsed.netloc, Key=parsed.path.lstrip('/'))['Body'].read()
+    with open(parsed.path, 'rb') as f:
+        return f.read()
+
+def load_archived(uri: str, use_cache: bool = True) -> Optional[Dict]:
+    """
+    Hydrate archived results, keeping the most recently read ones in a
+    small in-process cache (old jobs that are viewed tend to be viewed
+    repeatedly while a dashboard polls them).
+    """
+    if use_cache:
+        with _hot_cache_lock:
+            cached = _hot_cache.get(uri)
+            if cached is not None:
+                _hot_cache.move_to_end(uri)
+        record_cache('archive', cached is not None)
+        if cached is not None:
+            return cached
+
+    results = unpack(read_blob(uri))
+
+    if use_cache:
+        with _hot_cache_lock:
+            _hot_cache[uri] = results
+            while len(_hot_cache) > ARCHIVE_CACHE_SIZE:
+                _hot_cache.popitem(last=False)
+    return results
@@ -0,0 +1,84 @@
+import tempfile
+from typing import Dict, Iterable, Iterator, List
+
+from services.serialization import dumps
+
+# One row per analyzed article/tweet in columnar exports
+ARTICLE_COLUMNS = [
+    ('job_id', 'string'),
+    ('query_type', 'string'),
+    ('query_input', 'string'),
+    ('analyzed_at', 'string'),
+    ('article_id', 'string'),
+    ('source_url', 'string'),
+    ('title', 'string'),
+    ('author', 'string'),
+    ('publication_date', 'string'),
+    ('sentiment_label', 'string'),
+    ('sentiment_score', 'float64'),
+    ('hoax_label', 'string'),
+    ('hoax_probability', 'float64'),
+    ('hoax_confidence', 'float64'),
+]
+
+def iter_ndjson(rows: Iterable[Dict]) -> Iterator[bytes]:
+    """Stream job rows as newline-delimited JSON, one job per line."""
+    for row in rows:
+        yield dumps(row) + b'\n'
+
+def article_rows(row: Dict) -> List[Dict]:
+    """Flatten a job row into per-article rows for columnar export."""
+    results = row.get('results') or {}
+    flattened = []
+    for article in results.get('articles', []):
+        sentiment = article.get('sentiment') or {}
+        hoax = article.get('hoax_classification') or {}
+        flattened.append({
+            'job_id': row['job_id'],
+            'query_type': row['query_type'],
+            'query_input': row['query_input'],
+            'analyzed_at': results.get('analyzed_at'),
+            'article_id': article.get('article_id'),
+            'source_url': article.get('source_url'),
+            'title': article.get('title'),
+            'author': article.get('author'),
+            'publication_date': article.get('publication_date'),
+            'sentiment_label': sentiment.get('label'),
+            'sentiment_score': sentiment.get('score'),
+            'hoax_label': hoax.get('label'),
+            'hoax_probability': hoax.get('probability'),
+            'hoax_confidence': hoax.get('confidence'),
+        })
+    return flattened
+
+def iter_parquet(rows: Iterable[Dict], row_group_size: int = 5000, chunk_size: int = 1 << 20) -> Iterator[bytes]:
+    """
+    Stream article rows as a Parquet file.
+
+    Rows are written in row groups to a spooled temporary file, so memory
+    stays bounded by one row group; the finished file is then streamed in
+    chunks (Parquet needs its footer before a reader can use it).
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([(name, pa.type_for_alias(kind)) for name, kind in ARTICLE_COLUMNS])
+
+    with tempfile.SpooledTemporaryFile(max_size=16 << 20) as buffer:
+        writer = pq.ParquetWriter(buffer, schema, compression='zstd')
+        pending = []
+        for row in rows:
+            pending.extend(article_rows(row))
+            if len(pending) >= row_group_size:
+                writer.write_table(pa.Table.from_pylist(pending, schema=schema))
+                pending = []
+        if pending:
+            writer.write_table(pa.Table.from_pylist(pending, schema=schema))
+        writer.close()
+
+        buffer.seek(0)
+        while True:
+            chunk = buffer.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
@@ -0,0 +1,128 @@
+import os
+import re
+from collections import Counter
+from typing import Dict, List, Tuple
+
+from services.preprocessor import stopword_factory
+from services.telemetry import record_quality
+
+# off: score everything; flag: skip inference but list gated items (with
+# their reason) in the results; drop: skip them and only count them
+QUALITY_GATE = os.getenv('QUALITY_GATE', 'flag')
+QUALITY_MIN_WORDS = int(os.getenv('QUALITY_MIN_WORDS', '4'))
+QUALITY_MIN_LATIN_RATIO = 0.6
+LANGUAGE_MIN_RATIO = 0.08
+
+INDONESIAN_WORDS = set(stopword_factory.get_stop_words())
+ENGLISH_WORDS = {
+    'the', 'and', 'of', 'to', 'is', 'in', 'that', 'it', 'for', 'was', 'on',
+    'are', 'with', 'as', 'this', 'be', 'at', 'by', 'from', 'have', 'has',
+    'an', 'or', 'not', 'but', 'what', 'all', 'were', 'we', 'you', 'they',
+    'their', 'will', 'would', 'there', 'been', 'which', 'about', 'its',
+}
+
+BOILERPLATE_PATTERNS = [
+    ('lorem_ipsum', re.compile(r'lorem ipsum|dolor sit amet|consectetur adipiscing', re.I)),
+    ('cookie_banner', re.compile(r'(we|this site) uses? cookies|accept (all )?cookies|menggunakan (cookie|kuki)|setuju(i)? (penggunaan )?cookie', re.I)),
+    ('javascript_required', re.compile(r'enable javascript|javascript is disabled|aktifkan javascript', re.I)),
+    ('error_page', re.compile(r'404 not found|page not found|halaman tidak ditemukan|access denied|akses ditolak', re.I)),
+    ('paywall', re.compile(r'subscribe to (continue|read)|berlangganan untuk (membaca|melanjutkan)', re.I)),
+]
+
+def detect_language(text: str) -> str:
+    """
+    Cheap language identification by function-word ratio.
+
+    Returns:
+        'id' (Indonesian), 'en' (English), 'other' (mostly non-Latin
+        script) or 'unknown' (too little evidence, e.g. short slangy tweets)
+    """
+    letters = [char for char in text if char.isalpha()]
+    if letters and sum(1 for char in letters if char.isascii()) / len(letters) < QUALITY_MIN_LATIN_RATIO:
+        return 'other'
+
+    words = re.findall(r'[a-z]+', text.lower())
+    if len(words) < 3:
+        return 'unknown'
+    indonesian = sum(1 for word in words if word in INDONESIAN_WORDS) / len(words)
+    english = sum(1 for word in words if word in ENGLISH_WORDS) / len(words)
+    if english > indonesian and english >= LANGUAGE_MIN_RATIO:
+        return 'en'
+    if indonesian >= LANGUAGE_MIN_RATIO:
+        return 'id'
+    return 'unknown'
+
+def check_quality(text: str, cleaned_text: str) -> Dict:
+    """
+    Decide whether an item is worth running through the models.
+
+    Args:
+        text: Raw text (language and boilerplate are judged on it, since
+            preprocessing removes stopwords and punctuation)
+        cleaned_text: Preprocessed text that would be scored
+
+    Returns:
+        Dict with 'usable', 'reason' (None when usable) and 'language'
+    """
+    text = text or ''
+    language = detect_language(text)
+
+    reason = None
+    if len(cleaned_text.split()) < QUALITY_MIN_WORDS:
+        reason = 'too_short'
+    else:
+        for name, pattern in BOILERPLATE_PATTERNS:
+            if pattern.search(text):
+                reason = name
+                break
+    if reason is None:
+        words = cleaned_text.split()
+        if len(words) >= 20 and len(set(words)) / len(words) < 0.3:
+            reason = 'repetitive'
+        elif language in ('en', 'other'):
+            reason = 'language'
+
+    return {'usable': reason is None, 'reason': reason, 'language': language}
+
+def gate_items(items: List[Dict], task: str = 'none') -> Tuple[List[Dict], List[Dict]]:
+    """
+    Split preprocessed items into usable and gated ones.
+
+    Each item gets a 'quality' dict (see ``check_quality``). With
+    QUALITY_GATE=off every item is usable.
+
+    Returns:
+        Tuple of (usable items, gated items)
+    """
+    if QUALITY_GATE == 'off':
+        return items, []
+
+    usable, gated = [], []
+    for item in items:
+        quality = check_quality(item.get('text', ''), item['cleaned_text'])
+        item = {**item, 'quality': quality}
+        (usable if quality['usable'] else gated).append(item)
+        record_quality(task, quality['reason'] or 'usable')
+    return usable, gated
+
+def quality_summary(items: List[Dict], gated: List[Dict]) -> Dict:
+    """Results section describing what the gate skipped and why."""
+    summary = {
+        'mode': QUALITY_GATE,
+        'scored': len(items),
+        'gated': len(gated),
+        'reasons': dict(Counter(item['quality']['reason'] for item in gated)),
+    }
+    if QUALITY_GATE == 'flag':
+        summary['items'] = [
+            {
+                'source': item.get('source'),
+                'source_url': item.get('url', ''),
+                'title': item.get('title'),
+                'content': (item.get('text') or '')[:200],
+                'reason': item['quality']['reason'],
+                'language': item['quality']['language'],
+            }
+            for item in gated
+        ]
+    return summary
@@ -0,0 +1,108 @@
+import hashlib
+import os
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+GRANULARITIES = ('hour', 'day')
+
+# Counted item ids are remembered this long; topic runs re-crawl a window of
+# recent items, so an item must not come back after its id is forgotten
+ROLLUP_ITEM_RETENTION_DAYS = int(os.getenv('ROLLUP_ITEM_RETENTION_DAYS', '45'))
+
+ROLLUP_FIELDS = ('count', 'positive', 'negative', 'neutral', 'sentiment_score_sum', 'hoax_prob_sum')
+
+def parse_item_date(date: Optional[str], default: datetime) -> datetime:
+    """Parse an item's ISO publication date, falling back to ``default``."""
+    if not date:
+        return default
+    try:
+        parsed = datetime.fromisoformat(date.replace('Z', '+00:00'))
+    except ValueError:
+        return default
+    return parsed.replace(tzinfo=None)
+
+def rollup_item_key(item: Dict) -> Tuple[str, str]:
+    """
+    Identity of a crawled item for de-duplicating rollups: (source, id),
+    with a hash of the URL or text for items without an id.
+    """
+    item_id = item.get('id')
+    if not item_id:
+        basis = item.get('url') or item.get('text') or ''
+        item_id = 'sha1:' + hashlib.sha1(basis.encode('utf-8')).hexdigest()
+    return item.get('source', 'Unknown'), str(item_id)
+
+def bucket_start(moment: datetime, granularity: str) -> datetime:
+    """Truncate a datetime to the start of its hour or day bucket."""
+    if granularity == 'hour':
+        return moment.replace(minute=0, second=0, microsecond=0)
+    return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+
+def build_rollup_deltas(
+    items: List[Dict],
+    sentiments: List[Dict],
+    hoaxes: List[Dict],
+    now: Optional[datetime] = None,
+) -> Dict[Tuple[str, str, datetime], Dict]:
+    """
+    Fold scored items into per-(source, granularity, bucket) increments.
+
+    Items are bucketed by publication date, or by ``now`` when the date is
+    missing or unparseable.
+
+    Args:
+        items: Crawled items (with 'source' and 'date')
+        sentiments: Sentiment results aligned with items
+        hoaxes: Hoax classification results aligned with items
+        now: Fallback timestamp (defaults to utcnow)
+
+    Returns:
+        Dict keyed by (source, granularity, bucket_start) with counter fields
+    """
+    now = now or datetime.utcnow()
+    deltas = {}
+
+    for item, sentiment, hoax in zip(items, sentiments, hoaxes):
+        moment = parse_item_date(item.get('date'), now)
+        source = item.get('source', 'Unknown')
+
+        for granularity in GRANULARITIES:
+            key = (source, granularity, bucket_start(moment, granularity))
+            delta = deltas.setdefault(key, {field: 0 for field in ROLLUP_FIELDS})
+            delta['count'] += 1
+            delta[sentiment['label']] += 1
+            delta['sentiment_score_sum'] += sentiment['score']
+            delta['hoax_prob_sum'] += hoax['probability']
+
+    return deltas
+
+def summarize_rollups(rows: List[Dict]) -> Dict:
+    """
+    Compute totals and per-source averages over a list of rollup rows.
+    """
+    totals = {field: 0 for field in ROLLUP_FIELDS}
+    by_source = {}
+
+    for row in rows:
+        source_totals = by_source.setdefault(row['source'], {field: 0 for field in ROLLUP_FIELDS})
+        for field in ROLLUP_FIELDS:
+            totals[field] += row[field]
+            source_totals[field] += row[field]
+
+    def _finish(counts):
+        count = counts['count']
+        return {
+            'count': count,
+            'sentiment_breakdown': {
+                'positive': counts['positive'],
+                'negative': counts['negative'],
+                'neutral': counts['neutral'],
+            },
+            'avg_sentiment': counts['sentiment_score_sum'] / count if count else 0.0,
+            'avg_hoax_probability': counts['hoax_prob_sum'] / count if count else 0.0,
+        }
+
+    return {
+        'total': _finish(totals),
+        'by_source': {source: _finish(counts) for source, counts in by_source.items()},
+    }
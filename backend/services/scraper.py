@@ -1,7 +1,14 @@
 from bs4 import BeautifulSoup
 import requests
-from typing import Dict, Optional
+import contextvars
+import logging
+from celery.exceptions import SoftTimeLimitExceeded
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
 from datetime import datetime
+from services.telemetry import span
+
+logger = logging.getLogger(__name__)
 
 def scrape_article(url: str) -> Optional[Dict]:
     """
@@ -20,81 +27,113 @@ def scrape_article(url: str) -> Optional[Dict]:
         }
         
         # Fetch the page
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
-        
-        # Parse HTML
-        soup = BeautifulSoup(response.content, 'html.parser')
+        with span('fetch'):
+            response = requests.get(url, headers=headers, timeout=10)
+            response.raise_for_status()
         
-        # Extract title
-        title = None
-        title_tag = soup.find('h1') or soup.find('title')
-        if title_tag:
-            title = title_tag.get_text().strip()
+        with span('parse'):
+            return _extract_article(response.content, url)
         
-        # Extract main content
-        # Try common content containers
-        content = None
-        content_selectors = [
-            {'name': 'article'},
-            {'class': 'article-content'},
-            {'class': 'post-content'},
-            {'class': 'entry-content'},
-            {'id': 'content'},
+    except SoftTimeLimitExceeded:
+        # The task ran out of time; let it fail the job instead of skipping the URL
+        raise
+    except Exception:
+        logger.exception("Error scraping URL %s", url)
+        return None
+
+def scrape_articles(urls: List[str], max_workers: int = 8) -> List[Optional[Dict]]:
+    """
+    Scrape several URLs concurrently.
+    
+    Args:
+        urls: Article URLs to scrape
+        max_workers: Maximum concurrent fetches
+    
+    Returns:
+        List of scrape_article results (None for failures), aligned with urls
+    """
+    if len(urls) <= 1:
+        return [scrape_article(url) for url in urls]
+    
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(urls))) as executor:
+        # Each fetch runs in a copy of the caller's context so its spans are
+        # attributed to the current job timer
+        futures = [
+            executor.submit(contextvars.copy_context().run, scrape_article, url)
+            for url in urls
         ]
-        
-        for selector in content_selectors:
-            content_tag = soup.find(**selector)
-            if content_tag:
-                # Get all paragraph text
-                paragraphs = content_tag.find_all('p')
-                content = ' '.join([p.get_text().strip() for p in paragraphs])
-                break
-        
-        # Fallback: get all paragraphs
-        if not content:
-            paragraphs = soup.find_all('p')
+        return [future.result() for future in futures]
+
+def _extract_article(html: bytes, url: str) -> Optional[Dict]:
+    """Extract article fields from fetched HTML."""
+    # Parse HTML
+    soup = BeautifulSoup(html, 'html.parser')
+    
+    # Extract title
+    title = None
+    title_tag = soup.find('h1') or soup.find('title')
+    if title_tag:
+        title = title_tag.get_text().strip()
+    
+    # Extract main content
+    # Try common content containers
+    content = None
+    content_selectors = [
+        {'name': 'article'},
+        {'class': 'article-content'},
+        {'class': 'post-content'},
+        {'class': 'entry-content'},
+        {'id': 'content'},
+    ]
+    
+    for selector in content_selectors:
+        content_tag = soup.find(**selector)
+        if content_tag:
+            # Get all paragraph text
+            paragraphs = content_tag.find_all('p')
             content = ' '.join([p.get_text().strip() for p in paragraphs])
-        
-        # Extract author
-        author = None
-        author_selectors = [
-            {'class': 'author'},
-            {'class': 'by-author'},
-            {'rel': 'author'},
-        ]
-        
-        for selector in author_selectors:
-            author_tag = soup.find(**selector)
-            if author_tag:
-                author = author_tag.get_text().strip()
-                break
-        
-        # Extract publication date
-        date = None
-        date_selectors = [
-            {'class': 'date'},
-            {'class': 'published'},
-            {'property': 'article:published_time'},
-        ]
-        
-        for selector in date_selectors:
-            date_tag = soup.find(**selector)
-            if date_tag:
-                date = date_tag.get('content') or date_tag.get_text().strip()
-                break
-        
-        if not title or not content:
-            return None
-        
-        return {
-            'title': title,
-            'content': content,
-            'author': author,
-            'publication_date': date,
-            'url': url,
-        }
-        
-    except Exception as e:
-        print(f"Error scraping URL {url}: {str(e)}")
-        return None
\ No newline at end of file
+            break
+    
+    # Fallback: get all paragraphs
+    if not content:
+        paragraphs = soup.find_all('p')
+        content = ' '.join([p.get_text().strip() for p in paragraphs])
+    
+    # Extract author
+    author = None
+    author_selectors = [
+        {'class': 'author'},
+        {'class': 'by-author'},
+        {'rel': 'author'},
+    ]
+    
+    for selector in author_selectors:
+        author_tag = soup.find(**selector)
+        if author_tag:
+            author = author_tag.get_text().strip()
+            break
+    
+    # Extract publication date
+    date = None
+    date_selectors = [
+        {'class': 'date'},
+        {'class': 'published'},
+        {'property': 'article:published_time'},
+    ]
+    
+    for selector in date_selectors:
+        date_tag = soup.find(**selector)
+        if date_tag:
+            date = date_tag.get('content') or date_tag.get_text().strip()
+            break
+    
+    if not title or not content:
+        return None
+    
+    return {
+        'title': title,
+        'content': content,
+        'author': author,
+        'publication_date': date,
+        'url': url,
+    }
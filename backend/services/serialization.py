@@ -0,0 +1,31 @@
+from typing import Any
+
+import orjson
+
+ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+def dumps(obj: Any) -> bytes:
+    """Serialize to JSON bytes with orjson."""
+    return orjson.dumps(obj, option=ORJSON_OPTIONS)
+
+def json_serializer(obj: Any) -> str:
+    """JSON serializer for SQLAlchemy JSON columns."""
+    return dumps(obj).decode('utf-8')
+
+json_deserializer = orjson.loads
+
+def compact(obj: Any, ndigits: int = 4) -> Any:
+    """
+    Round floats in a results payload.
+
+    Scores and probabilities carry ~17 significant digits after softmax;
+    four decimals are plenty for display and aggregation and shrink the
+    stored and served JSON noticeably.
+    """
+    if isinstance(obj, float):
+        return round(obj, ndigits)
+    if isinstance(obj, dict):
+        return {key: compact(value, ndigits) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [compact(value, ndigits) for value in obj]
+    return obj
@@ -0,0 +1,287 @@
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+from celery.exceptions import SoftTimeLimitExceeded
+from prometheus_client import (
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    CONTENT_TYPE_LATEST,
+    generate_latest,
+    multiprocess,
+)
+
+# Set PROMETHEUS_MULTIPROC_DIR for Celery prefork workers (and multi-worker
+# uvicorn) so metrics from every child process are aggregated on scrape.
+MULTIPROC_DIR = os.getenv('PROMETHEUS_MULTIPROC_DIR')
+
+logger = logging.getLogger(__name__)
+
+STAGE_SECONDS = Histogram(
+    'hoaxalyzer_stage_seconds',
+    'Time spent per pipeline stage',
+    ['task', 'stage'],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120),
+)
+QUEUE_WAIT_SECONDS = Histogram(
+    'hoaxalyzer_queue_wait_seconds',
+    'Time between job submission and a worker starting it',
+    ['task'],
+    buckets=(0.01, 0.05, 0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600),
+)
+MODEL_LATENCY_SECONDS = Histogram(
+    'hoaxalyzer_model_latency_seconds',
+    'Forward pass latency per model call',
+    ['model'],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+BATCH_SIZE = Histogram(
+    'hoaxalyzer_batch_size',
+    'Number of texts per model call',
+    ['model'],
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256),
+)
+CACHE_REQUESTS = Counter(
+    'hoaxalyzer_cache_requests_total',
+    'Cache lookups by cache and result (hit/miss)',
+    ['cache', 'result'],
+)
+CASCADE_DECISIONS = Counter(
+    'hoaxalyzer_cascade_decisions_total',
+    'Cascade routing per item: linear only, escalated or audited',
+    ['task', 'route'],
+)
+CASCADE_AGREEMENT = Counter(
+    'hoaxalyzer_cascade_agreement_total',
+    'Linear vs IndoBERT decision agreement (hoax: same side of 0.5; sentiment: same label) on items scored by both',
+    ['task', 'agreed'],
+)
+QUALITY_ITEMS = Counter(
+    'hoaxalyzer_quality_items_total',
+    'Items seen by the quality gate, by outcome (usable or gate reason)',
+    ['task', 'outcome'],
+)
+JOBS = Counter(
+    'hoaxalyzer_jobs_total',
+    'Finished jobs by task and final status',
+    ['task', 'status'],
+)
+
+@contextmanager
+def _best_effort():
+    """
+    Run a metric update without letting it fail the job around it (e.g.
+    the multiprocess directory was removed); the failure is only logged.
+    """
+    try:
+        yield
+    except SoftTimeLimitExceeded:
+        raise
+    except Exception:
+        logger.warning("Dropping a metric update", exc_info=True)
+
+_current_timer: ContextVar[Optional['JobTimer']] = ContextVar('hoaxalyzer_job_timer', default=None)
+
+class JobTimer:
+    """
+    Collects per-stage wall time for one job.
+
+    Stages may be entered several times (e.g. one forward pass per item),
+    also from several threads (concurrent fetches); their durations and
+    call counts are accumulated.
+    """
+
+    def __init__(self, task: str, queue_wait: Optional[float] = None):
+        self.task = task
+        self.queue_wait = queue_wait
+        self.started = time.perf_counter()
+        self.stages = {}
+        self._lookups = set()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, stage: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - start)
+
+    def record(self, stage: str, seconds: float):
+        with self._lock:
+            totals = self.stages.setdefault(stage, {'seconds': 0.0, 'count': 0})
+            totals['seconds'] += seconds
+            totals['count'] += 1
+        with _best_effort():
+            STAGE_SECONDS.labels(task=self.task, stage=stage).observe(seconds)
+
+    def first_lookup(self, cache: str, key: str) -> bool:
+        """True the first time this job looks ``key`` up in ``cache``."""
+        with self._lock:
+            if (cache, key) in self._lookups:
+                return False
+            self._lookups.add((cache, key))
+            return True
+
+    def to_dict(self) -> Dict:
+        return {
+            'queue_wait_seconds': self.queue_wait,
+            'total_seconds': time.perf_counter() - self.started,
+            'stages': {
+                stage: {'seconds': round(totals['seconds'], 6), 'count': totals['count']}
+                for stage, totals in self.stages.items()
+            },
+        }
+
+@contextmanager
+def job_timer(task: str, enqueued_at: Optional[float] = None):
+    """
+    Start timing a job; nested ``span`` calls anywhere in the call stack
+    (scraper, pipeline, crud) are attributed to it.
+
+    Args:
+        task: Task name used as metric label
+        enqueued_at: Unix timestamp of submission, for queue wait time
+    """
+    with use_timer(JobTimer(task, record_queue_wait(task, enqueued_at))) as timer:
+        yield timer
+
+@contextmanager
+def use_timer(timer: JobTimer):
+    """Attribute spans to ``timer`` (e.g. one job's timer inside a batch)."""
+    token = _current_timer.set(timer)
+    try:
+        yield timer
+    finally:
+        _current_timer.reset(token)
+
+def record_queue_wait(task: str, enqueued_at: Optional[float]) -> Optional[float]:
+    """Observe and return the seconds a job waited since submission."""
+    if enqueued_at is None:
+        return None
+    queue_wait = max(0.0, time.time() - enqueued_at)
+    with _best_effort():
+        QUEUE_WAIT_SECONDS.labels(task=task).observe(queue_wait)
+    return queue_wait
+
+@contextmanager
+def span(stage: str):
+    """Time a stage of the current job (or just observe it outside a job)."""
+    timer = _current_timer.get()
+    if timer is not None:
+        with timer.span(stage):
+            yield
+        return
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        with _best_effort():
+            STAGE_SECONDS.labels(task='none', stage=stage).observe(time.perf_counter() - start)
+
+@contextmanager
+def model_call(model: str, batch_size: int):
+    """Time a forward pass as the 'forward' stage and record model metrics."""
+    with _best_effort():
+        BATCH_SIZE.labels(model=model).observe(batch_size)
+    start = time.perf_counter()
+    with span('forward'):
+        yield
+    with _best_effort():
+        MODEL_LATENCY_SECONDS.labels(model=model).observe(time.perf_counter() - start)
+
+def record_cache(cache: str, hit: bool, key: Optional[str] = None):
+    """
+    Count a cache lookup; hit rate is hits / (hits + misses). With ``key``,
+    only the first lookup of it within the current job is counted.
+    """
+    timer = _current_timer.get()
+    if key is not None and timer is not None and not timer.first_lookup(cache, key):
+        return
+    with _best_effort():
+        CACHE_REQUESTS.labels(cache=cache, result='hit' if hit else 'miss').inc()
+
+def record_cascade(task: str, route: str, agreed: Optional[bool] = None):
+    """Count a cascade decision and, when both models ran, their agreement."""
+    with _best_effort():
+        CASCADE_DECISIONS.labels(task=task, route=route).inc()
+        if agreed is not None:
+            CASCADE_AGREEMENT.labels(task=task, agreed='yes' if agreed else 'no').inc()
+
+def record_quality(task: str, outcome: str):
+    """Count a quality gate decision for an item."""
+    with _best_effort():
+        QUALITY_ITEMS.labels(task=task, outcome=outcome).inc()
+
+def record_job(task: str, status: str):
+    """Count a finished job by its final status."""
+    with _best_effort():
+        JOBS.labels(task=task, status=status).inc()
+
+def metrics_payload():
+    """
+    Render metrics in the Prometheus text format.
+
+    Returns:
+        Tuple of (body, content type)
+    """
+    if MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    from prometheus_client import REGISTRY
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
+
+def start_metrics_server(port: int):
+    """Expose /metrics on a separate port (used by the Celery worker)."""
+    from prometheus_client import REGISTRY, start_http_server
+
+    if MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    start_http_server(port, registry=registry)
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+def prepare_multiproc_dir():
+    """
+    Create PROMETHEUS_MULTIPROC_DIR and remove the files of processes that
+    no longer run, i.e. those left by a previous run of the service.
+
+    Called at API startup and from the main worker process before it forks.
+    Files of live processes are kept, so a restarted sibling (another
+    uvicorn worker, or the API sharing the directory with the worker)
+    does not wipe metrics that are still being written.
+    """
+    if not MULTIPROC_DIR:
+        return
+    os.makedirs(MULTIPROC_DIR, exist_ok=True)
+    for name in os.listdir(MULTIPROC_DIR):
+        # <type>_<pid>.db, e.g. counter_4242.db or gauge_livesum_4242.db
+        stem, _, pid = os.path.splitext(name)[0].rpartition('_')
+        if name.endswith('.db') and stem and pid.isdigit() and not _pid_alive(int(pid)):
+            try:
+                os.remove(os.path.join(MULTIPROC_DIR, name))
+            except FileNotFoundError:
+                pass
+
+def mark_process_dead(pid: int):
+    """Drop live gauges of an exited child process in multiprocess mode."""
+    if MULTIPROC_DIR:
+        with _best_effort():
+            multiprocess.mark_process_dead(pid)
@@ -0,0 +1,142 @@
+import os
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+# Number of days of scored items kept in a watch's rolling aggregate
+WATCH_WINDOW_DAYS = int(os.getenv('WATCH_WINDOW_DAYS', '7'))
+
+# Number of most recent articles kept for display
+WATCH_RECENT_ARTICLES = 50
+
+def overall_hoax_label(avg_hoax_prob: float) -> str:
+    """Map an average hoax probability to the overall topic label."""
+    if avg_hoax_prob > 0.7:
+        return 'hoax'
+    elif avg_hoax_prob < 0.3:
+        return 'factual'
+    return 'uncertain'
+
+def merge_into_aggregate(
+    aggregate: Optional[Dict],
+    items: List[Dict],
+    sentiments: List[Dict],
+    hoaxes: List[Dict],
+    keywords: List[str],
+    now: Optional[datetime] = None,
+) -> Dict:
+    """
+    Merge newly scored items into a watch's rolling aggregate.
+
+    The aggregate keeps one bucket per publication day, so merging costs
+    O(new items) and days falling out of the window are simply dropped.
+
+    Args:
+        aggregate: Existing aggregate (may be None or empty)
+        items: Newly crawled items (with 'source', 'date', 'text', ...)
+        sentiments: Sentiment results aligned with items
+        hoaxes: Hoax classification results aligned with items
+        keywords: Top keywords extracted from the new items
+        now: Reference time for the window (defaults to utcnow)
+
+    Returns:
+        The merged aggregate
+    """
+    now = now or datetime.utcnow()
+    aggregate = dict(aggregate or {})
+    days = {day: dict(bucket) for day, bucket in aggregate.get('days', {}).items()}
+
+    for item, sentiment, hoax in zip(items, sentiments, hoaxes):
+        day = (item.get('date') or now.isoformat())[:10]
+        bucket = days.setdefault(day, {
+            'count': 0,
+            'positive': 0,
+            'negative': 0,
+            'neutral': 0,
+            'hoax_prob_sum': 0.0,
+            'sources': {},
+        })
+        bucket['count'] += 1
+        bucket[sentiment['label']] += 1
+        bucket['hoax_prob_sum'] += hoax['probability']
+
+        sources = dict(bucket['sources'])
+        source = item.get('source', 'Unknown')
+        stats = dict(sources.get(source, {'count': 0, 'sentiment_sum': 0.0}))
+        stats['count'] += 1
+        stats['sentiment_sum'] += sentiment['score']
+        sources[source] = stats
+        bucket['sources'] = sources
+
+    cutoff = (now - timedelta(days=WATCH_WINDOW_DAYS)).date().isoformat()
+    aggregate['days'] = {day: bucket for day, bucket in days.items() if day >= cutoff}
+
+    new_articles = [
+        {
+            'article_id': item.get('id') or item.get('url', ''),
+            'source_url': item.get('url', ''),
+            'title': item.get('title', ''),
+            'content': item['text'][:500] + '...',
+            'author': item.get('author'),
+            'publication_date': item.get('date'),
+            'sentiment': sentiment,
+            'hoax_classification': hoax,
+        }
+        for item, sentiment, hoax in zip(items, sentiments, hoaxes)
+    ]
+    recent = new_articles + aggregate.get('recent_articles', [])
+    recent.sort(key=lambda article: article.get('publication_date') or '', reverse=True)
+    aggregate['recent_articles'] = recent[:WATCH_RECENT_ARTICLES]
+
+    keyword_counts = Counter(aggregate.get('keyword_counts', {}))
+    keyword_counts.update(keywords)
+    aggregate['keyword_counts'] = dict(keyword_counts.most_common(200))
+
+    aggregate['updated_at'] = now.isoformat()
+    return aggregate
+
+def summarize_aggregate(keyword: str, aggregate: Dict) -> Dict:
+    """
+    Turn a rolling aggregate into the same shape as topic job results.
+    """
+    days = (aggregate or {}).get('days', {})
+
+    sentiment_counts = {'positive': 0, 'negative': 0, 'neutral': 0}
+    hoax_prob_sum = 0.0
+    total_items = 0
+    source_stats = {}
+
+    for bucket in days.values():
+        total_items += bucket['count']
+        hoax_prob_sum += bucket['hoax_prob_sum']
+        for label in sentiment_counts:
+            sentiment_counts[label] += bucket[label]
+        for source, stats in bucket['sources'].items():
+            merged = source_stats.setdefault(source, {'count': 0, 'sentiment_sum': 0.0})
+            merged['count'] += stats['count']
+            merged['sentiment_sum'] += stats['sentiment_sum']
+
+    avg_hoax_prob = hoax_prob_sum / total_items if total_items else 0.0
+    keyword_counts = Counter((aggregate or {}).get('keyword_counts', {}))
+
+    return {
+        'query_type': 'topic',
+        'query_input': keyword,
+        'overall_sentiment': max(sentiment_counts, key=sentiment_counts.get),
+        'sentiment_breakdown': sentiment_counts,
+        'hoax_probability': avg_hoax_prob,
+        'hoax_label': overall_hoax_label(avg_hoax_prob) if total_items else 'uncertain',
+        'articles': (aggregate or {}).get('recent_articles', []),
+        'source_breakdown': [
+            {
+                'source': source,
+                'count': stats['count'],
+                'avg_sentiment': stats['sentiment_sum'] / stats['count'],
+            }
+            for source, stats in source_stats.items()
+        ],
+        'top_keywords': [word for word, count in keyword_counts.most_common(15)],
+        'total_items': total_items,
+        'window_days': WATCH_WINDOW_DAYS,
+        'analyzed_at': (aggregate or {}).get('updated_at'),
+    }
@@ -0,0 +1,122 @@
+import json
+import math
+import os
+from typing import Dict, List, Optional
+
+# Written by scripts/calibrate_inference.py; environment variables win
+TUNING_FILE = os.getenv('INFERENCE_TUNING_FILE', '')
+
+def available_cpus() -> int:
+    """
+    CPUs this process may actually use: the affinity mask, further capped
+    by a cgroup CPU quota (containers with --cpus / Kubernetes limits).
+    """
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+
+    quota = cgroup_cpu_quota()
+    if quota is not None:
+        cpus = min(cpus, max(1, math.floor(quota)))
+    return max(1, cpus)
+
+def cgroup_cpu_quota() -> Optional[float]:
+    """CPU quota in cores from cgroup v2 (cpu.max) or v1 (cfs quota), if limited."""
+    try:
+        with open('/sys/fs/cgroup/cpu.max') as f:
+            quota, period = f.read().split()[:2]
+        if quota != 'max':
+            return int(quota) / int(period)
+        return None
+    except (OSError, ValueError):
+        pass
+
+    try:
+        with open('/sys/fs/cgroup/cpu/cpu.cfs_quota_us') as f:
+            quota = int(f.read())
+        with open('/sys/fs/cgroup/cpu/cpu.cfs_period_us') as f:
+            period = int(f.read())
+        if quota > 0 and period > 0:
+            return quota / period
+    except (OSError, ValueError):
+        pass
+    return None
+
+def load_tuning_file(path: str = TUNING_FILE) -> Dict:
+    if not path or not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f).get('best', {})
+
+def inference_config() -> Dict:
+    """
+    Resolve worker count, threads per worker and batch size.
+
+    Precedence: environment variables, then the calibration file, then a
+    default that splits the available CPUs evenly between the workers so
+    workers x threads never exceeds the CPU budget.
+
+    Returns:
+        Dict with 'cpus', 'workers', 'threads', 'interop_threads',
+        'batch_size' and 'pin' (core pinning)
+    """
+    cpus = available_cpus()
+    calibrated = load_tuning_file()
+
+    # Default: one worker per 4 cores; IndoBERT gains little past ~4 threads
+    workers = int(os.getenv('WORKER_CONCURRENCY') or calibrated.get('workers') or max(1, cpus // 4))
+    threads = int(os.getenv('TORCH_THREADS') or calibrated.get('threads') or max(1, cpus // max(1, workers)))
+    return {
+        'cpus': cpus,
+        'workers': workers,
+        'threads': threads,
+        'interop_threads': int(os.getenv('TORCH_INTEROP_THREADS', '1')),
+        'batch_size': int(os.getenv('NLP_BATCH_SIZE') or calibrated.get('batch_size') or 16),
+        'pin': os.getenv('CPU_PINNING', 'false').lower() in ('1', 'true', 'yes'),
+    }
+
+def core_slice(worker_index: int, threads: int) -> List[int]:
+    """Disjoint set of ``threads`` cores for a worker (wrapping if oversubscribed)."""
+    cores = sorted(os.sched_getaffinity(0))
+    start = (worker_index * threads) % len(cores)
+    return [cores[(start + offset) % len(cores)] for offset in range(min(threads, len(cores)))]
+
+def configure_process(worker_index: Optional[int] = None, config: Optional[Dict] = None) -> Dict:
+    """
+    Apply the thread budget (and optional pinning) to the current process.
+
+    Call once in every process that runs inference: the Celery parent
+    before loading models, and each prefork child with its pool index.
+
+    Args:
+        worker_index: Index of the pool process, required for pinning
+        config: Result of ``inference_config`` (resolved if omitted)
+
+    Returns:
+        The applied config, plus 'cores' when pinned
+    """
+    import torch
+
+    config = dict(config or inference_config())
+    threads = config['threads']
+
+    # Libraries initialized after this point (OpenMP, MKL, tokenizers) read these
+    for var in ('OMP_NUM_THREADS', 'MKL_NUM_THREADS', 'OPENBLAS_NUM_THREADS'):
+        os.environ[var] = str(threads)
+    # Rust tokenizer threads would compete with torch inside a worker
+    os.environ.setdefault('TOKENIZERS_PARALLELISM', 'false')
+
+    torch.set_num_threads(threads)
+    try:
+        torch.set_num_interop_threads(config['interop_threads'])
+    except RuntimeError:
+        # Only settable before the first parallel op (or once per process)
+        pass
+
+    if config['pin'] and worker_index is not None and hasattr(os, 'sched_setaffinity'):
+        cores = core_slice(worker_index, threads)
+        os.sched_setaffinity(0, cores)
+        config['cores'] = cores
+
+    return config
@@ -1,11 +1,15 @@
 import os
-from typing import List, Dict
+from typing import List, Dict, Optional
 import requests
 from datetime import datetime, timedelta
 
-def crawl_topic(keyword: str, max_items: int = 50) -> List[Dict]:
+def crawl_topic(keyword: str, max_items: int = 50, cursors: Optional[Dict] = None) -> List[Dict]:
     """
     Crawl social media and news sources for a given topic/keyword.
+
+    When ``cursors`` is given (see ``advance_cursors``), only items newer
+    than the per-source high-water mark are returned. This is what the
+    topic watch mode uses to re-crawl incrementally.
     
     Note: This is a simplified implementation. In production, you would:
     1. Use Twitter API v2 with proper authentication
@@ -16,6 +20,7 @@ def crawl_topic(keyword: str, max_items: int = 50) -> List[Dict]:
     Args:
         keyword: Search keyword/topic
         max_items: Maximum number of items to collect
+        cursors: Optional per-source cursors from a previous crawl
     
     Returns:
         List of dicts with text data and metadata
@@ -33,8 +38,57 @@ def crawl_topic(keyword: str, max_items: int = 50) -> List[Dict]:
     news_data = generate_mock_news_data(keyword, max_items // 2)
     results.extend(news_data)
     
+    if cursors:
+        results = [item for item in results if is_new_item(item, cursors.get(item.get('source')))]
+    
     return results[:max_items]
 
+def is_new_item(item: Dict, cursor: Optional[Dict]) -> bool:
+    """
+    Check whether an item is past a source cursor.
+    
+    A cursor holds the newest date seen for a source ('last_date') and the
+    ids seen at exactly that date ('last_ids'), so items sharing the
+    high-water mark timestamp are neither dropped nor scored twice.
+    """
+    if not cursor or not cursor.get('last_date'):
+        return True
+    
+    date = item.get('date') or ''
+    if date > cursor['last_date']:
+        return True
+    if date == cursor['last_date']:
+        return item.get('id') not in cursor.get('last_ids', [])
+    return False
+
+def advance_cursors(cursors: Optional[Dict], items: List[Dict]) -> Dict:
+    """
+    Move per-source cursors forward past the given items.
+    
+    Args:
+        cursors: Existing cursors keyed by source name (may be None)
+        items: Newly crawled items
+    
+    Returns:
+        Updated cursors keyed by source name
+    """
+    cursors = {source: dict(cursor) for source, cursor in (cursors or {}).items()}
+    
+    for item in items:
+        date = item.get('date')
+        if not date:
+            continue
+        source = item.get('source', 'Unknown')
+        cursor = cursors.setdefault(source, {'last_date': None, 'last_ids': []})
+        
+        if cursor['last_date'] is None or date > cursor['last_date']:
+            cursor['last_date'] = date
+            cursor['last_ids'] = [item.get('id')]
+        elif date == cursor['last_date'] and item.get('id') not in cursor['last_ids']:
+            cursor['last_ids'].append(item.get('id'))
+    
+    return cursors
+
 def generate_mock_twitter_data(keyword: str, count: int) -> List[Dict]:
     """Generate mock Twitter data for demonstration."""
     import random
@@ -43,12 +97,14 @@ def generate_mock_twitter_data(keyword: str, count: int) -> List[Dict]:
     mock_tweets = []
     
     for i in range(count):
+        status_id = random.randint(1000000, 9999999)
         mock_tweets.append({
+            'id': str(status_id),
             'source': 'Twitter',
             'type': 'tweet',
-            'text': f"Mock tweet about {keyword}. This is sample text for demonstration purposes. {random.choice(['Great news!', 'Concerning development.', 'Interesting update.'])}",
+            'text': f"Kabar terbaru soal {keyword} ramai dibahas warganet hari ini. {random.choice(['Semoga ini jadi kabar baik untuk kita semua!', 'Perkembangannya cukup mengkhawatirkan.', 'Informasinya masih perlu dicek kebenarannya.'])}",
             'author': f'@user{i+1}',
-            'url': f'https://twitter.com/user{i+1}/status/{random.randint(1000000, 9999999)}',
+            'url': f'https://twitter.com/user{i+1}/status/{status_id}',
             'date': (datetime.now() - timedelta(days=random.randint(0, 30))).isoformat(),
             'location': random.choice(['Jakarta', 'Surabaya', 'Bandung', None]),
         })
@@ -64,13 +120,15 @@ def generate_mock_news_data(keyword: str, count: int) -> List[Dict]:
     
     for i in range(count):
         source = random.choice(news_sources)
+        article_id = random.randint(1000, 9999)
         mock_articles.append({
+            'id': f'article-{article_id}',
             'source': source,
             'type': 'article',
             'text': f"Mock news article about {keyword}. This is comprehensive coverage of the topic with multiple paragraphs. {' '.join(['Lorem ipsum dolor sit amet.' for _ in range(5)])}",
             'title': f"Breaking: Development in {keyword} Case",
             'author': f"Reporter {i+1}",
-            'url': f'https://{source.lower().replace(" ", "")}/news/article-{random.randint(1000, 9999)}',
+            'url': f'https://{source.lower().replace(" ", "")}/news/article-{article_id}',
             'date': (datetime.now() - timedelta(days=random.randint(0, 7))).isoformat(),
         })
     
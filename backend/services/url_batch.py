@@ -0,0 +1,185 @@
+import json
+import os
+import time
+from typing import Dict, List, Optional
+
+import redis
+
+from services.admission import get_redis
+
+# URL jobs are parked in per-client Redis lists and drained in batches by
+# analyze_url_batch_task; batching is off when the max size is 1
+URL_BATCH_MAX_SIZE = int(os.getenv('URL_BATCH_MAX_SIZE', '8'))
+URL_BATCH_MAX_WAIT = float(os.getenv('URL_BATCH_MAX_WAIT_MS', '200')) / 1000.0
+URL_FETCH_CONCURRENCY = int(os.getenv('URL_FETCH_CONCURRENCY', '8'))
+
+PENDING_KEY = 'hoaxalyzer:pending:url'
+CLIENTS_KEY = 'hoaxalyzer:pending-clients:url'
+# Drained jobs stay claimed (job id -> job, plus job id -> claim time)
+# until their batch finishes, so jobs of a batch task killed mid-run can be
+# requeued
+CLAIMED_KEY = 'hoaxalyzer:claimed:url'
+CLAIMED_AT_KEY = 'hoaxalyzer:claimed-at:url'
+POLL_SECONDS = 0.02
+
+# Pop and claim in one step: a worker dying between the two would lose the job
+_POP_AND_CLAIM = """
+local item = redis.call('LPOP', KEYS[1])
+if item then
+    local job_id = cjson.decode(item)['job_id']
+    redis.call('HSET', KEYS[2], job_id, item)
+    redis.call('ZADD', KEYS[3], ARGV[1], job_id)
+end
+return item
+"""
+
+# Give a claim back to the front of its client's list, unless another
+# caller requeued or released it first
+_REQUEUE = """
+if redis.call('ZREM', KEYS[2], ARGV[1]) == 0 then
+    return 0
+end
+local item = redis.call('HGET', KEYS[1], ARGV[1])
+redis.call('HDEL', KEYS[1], ARGV[1])
+if not item then
+    return 0
+end
+redis.call('LPUSH', KEYS[3], item)
+redis.call('SADD', KEYS[4], ARGV[2])
+return 1
+"""
+
+def batching_enabled() -> bool:
+    return URL_BATCH_MAX_SIZE > 1
+
+def _pending_key(client: str) -> str:
+    return f'{PENDING_KEY}:{client}'
+
+def enqueue_url_job(job_id: str, url: str, enqueued_at: float, client_id: Optional[str]) -> bool:
+    """
+    Park a URL job for the next batch, in its client's list.
+
+    Returns:
+        False when Redis is unavailable (the caller falls back to a
+        single-job task)
+    """
+    job = {'job_id': job_id, 'url': url, 'enqueued_at': enqueued_at, 'client_id': client_id}
+    client = client_id or 'anonymous'
+    try:
+        pipe = get_redis().pipeline(transaction=True)
+        pipe.rpush(_pending_key(client), json.dumps(job))
+        pipe.sadd(CLIENTS_KEY, client)
+        pipe.execute()
+        return True
+    except redis.RedisError:
+        return False
+
+def _forget_client(conn, client: str):
+    conn.srem(CLIENTS_KEY, client)
+    # A job parked between the empty pop and the removal re-adds the client
+    if conn.llen(_pending_key(client)):
+        conn.sadd(CLIENTS_KEY, client)
+
+def _waiting_clients(conn) -> List[str]:
+    """Clients with parked jobs, the one waiting longest first."""
+    heads = {}
+    for member in conn.smembers(CLIENTS_KEY):
+        client = member.decode('utf-8')
+        head = conn.lindex(_pending_key(client), 0)
+        if head is None:
+            _forget_client(conn, client)
+        else:
+            heads[client] = json.loads(head)['enqueued_at']
+    return sorted(heads, key=heads.get)
+
+def _pop(count: int) -> List[Dict]:
+    """
+    Claim up to ``count`` jobs, taking one per client in turn, so a burst
+    from one client shares the batch with everyone else's jobs.
+    """
+    conn = get_redis()
+    pop_and_claim = conn.register_script(_POP_AND_CLAIM)
+    clients = _waiting_clients(conn)
+    batch = []
+    while clients and len(batch) < count:
+        for client in list(clients):
+            if len(batch) >= count:
+                break
+            item = pop_and_claim(keys=[_pending_key(client), CLAIMED_KEY, CLAIMED_AT_KEY], args=[time.time()])
+            if item is None:
+                _forget_client(conn, client)
+                clients.remove(client)
+                continue
+            batch.append(json.loads(item))
+    return batch
+
+def drain_url_batch(max_size: int = URL_BATCH_MAX_SIZE, max_wait: float = URL_BATCH_MAX_WAIT) -> List[Dict]:
+    """
+    Claim up to ``max_size`` pending URL jobs.
+
+    Every submission also queues a batch task, so the first task to run
+    becomes the batch leader: it waits for more jobs until the batch is
+    full or its oldest job has been pending for ``max_wait`` seconds.
+    Later tasks find their jobs already taken and return immediately.
+    A job therefore waits at most ``max_wait`` for batching on top of
+    the usual queue wait. Callers must ``release_claims`` once the jobs
+    are finished.
+
+    Returns:
+        Job dicts with 'job_id', 'url', 'enqueued_at' and 'client_id'
+    """
+    batch = _pop(max_size)
+    while batch and len(batch) < max_size:
+        remaining = max_wait - (time.time() - min(job['enqueued_at'] for job in batch))
+        if remaining <= 0:
+            break
+        time.sleep(min(remaining, POLL_SECONDS))
+        try:
+            batch.extend(_pop(max_size - len(batch)))
+        except redis.RedisError:
+            # Run what is already claimed rather than dropping it
+            break
+    return batch
+
+def release_claims(job_ids: List[str]):
+    """Drop finished (completed or failed) jobs from the claimed set."""
+    if not job_ids:
+        return
+    try:
+        pipe = get_redis().pipeline(transaction=True)
+        pipe.hdel(CLAIMED_KEY, *job_ids)
+        pipe.zrem(CLAIMED_AT_KEY, *job_ids)
+        pipe.execute()
+    except redis.RedisError:
+        pass
+
+def requeue_stale_claims(lease: float) -> int:
+    """
+    Park claimed jobs again when their batch has held them longer than
+    ``lease`` seconds (its worker was killed by the hard time limit or
+    the OOM killer). They go to the front of their client's list.
+
+    Returns:
+        Number of jobs requeued
+    """
+    conn = get_redis()
+    requeue = conn.register_script(_REQUEUE)
+    stale = conn.zrangebyscore(CLAIMED_AT_KEY, '-inf', time.time() - lease)
+    jobs = []
+    for job_id in stale:
+        item = conn.hget(CLAIMED_KEY, job_id)
+        if item is None:
+            # Released meanwhile
+            conn.zrem(CLAIMED_AT_KEY, job_id)
+        else:
+            jobs.append(json.loads(item))
+
+    requeued = 0
+    # Newest first, so each client's oldest job ends up at the front
+    for job in sorted(jobs, key=lambda job: job['enqueued_at'], reverse=True):
+        client = job['client_id'] or 'anonymous'
+        requeued += requeue(
+            keys=[CLAIMED_KEY, CLAIMED_AT_KEY, _pending_key(client), CLIENTS_KEY],
+            args=[job['job_id'], client],
+        )
+    return requeued
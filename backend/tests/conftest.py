@@ -0,0 +1,41 @@
+import os
+import sys
+
+import pytest
+
+# Add backend directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# database.models builds its engine at import time; tests run on SQLite
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    """A fresh SQLite database behind database.crud."""
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+
+    from database import crud
+    from database.models import Base
+    from services.serialization import json_serializer, json_deserializer
+
+    engine = create_engine(
+        f'sqlite:///{tmp_path / "hoaxalyzer.db"}',
+        json_serializer=json_serializer,
+        json_deserializer=json_deserializer,
+    )
+    Base.metadata.create_all(bind=engine)
+    monkeypatch.setattr(crud, 'SessionLocal', sessionmaker(autocommit=False, autoflush=False, bind=engine))
+    yield engine
+    engine.dispose()
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    """An in-memory Redis behind services.admission.get_redis."""
+    import fakeredis
+
+    from services import admission
+
+    redis = fakeredis.FakeRedis()
+    monkeypatch.setattr(admission, '_redis', redis)
+    return redis
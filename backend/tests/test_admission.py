@@ -0,0 +1,73 @@
+import time
+
+import pytest
+import redis
+
+from services import admission
+from services.admission import AdmissionRejected, admit, release
+
+@pytest.fixture(autouse=True)
+def small_lanes(monkeypatch):
+    monkeypatch.setattr(admission, 'MAX_QUEUE_DEPTH', {'interactive': 4, 'bulk': 2})
+    monkeypatch.setattr(admission, 'SECONDS_PER_JOB', {'interactive': 5.0, 'bulk': 60.0})
+    monkeypatch.setattr(admission, 'WORKER_CONCURRENCY', 2)
+    monkeypatch.setattr(admission, 'queue_depth', lambda app, queue: 0)
+
+def test_priority_grows_with_the_clients_jobs_in_flight(fake_redis):
+    lanes = [admit(None, 'url', 'a', f'job{i}') for i in range(4)]
+    assert [lane['queue'] for lane in lanes] == ['interactive'] * 4
+    assert [lane['priority'] for lane in lanes] == [0, 1, 2, 3]
+
+def test_single_client_may_use_the_whole_lane(fake_redis):
+    for i in range(4):
+        admit(None, 'url', 'a', f'job{i}')
+    with pytest.raises(AdmissionRejected) as rejected:
+        admit(None, 'url', 'a', 'job4')
+    assert 'fair share is 4' in rejected.value.reason
+    # One job over the share, 5s per job, spread over 2 workers
+    assert rejected.value.retry_after == 3
+
+def test_fair_share_is_split_between_active_clients(fake_redis):
+    admit(None, 'url', 'a', 'a1')
+    admit(None, 'url', 'a', 'a2')
+
+    # A newcomer counts as active: share is 4 // 2
+    assert admit(None, 'url', 'b', 'b1')['priority'] == 0
+    with pytest.raises(AdmissionRejected):
+        admit(None, 'url', 'a', 'a3')
+
+    release('url', 'a', 'a1')
+    assert admit(None, 'url', 'a', 'a3')['priority'] == 1
+
+def test_lanes_are_counted_separately(fake_redis):
+    admit(None, 'topic', 'a', 't1')
+    admit(None, 'topic', 'a', 't2')
+    with pytest.raises(AdmissionRejected):
+        admit(None, 'topic', 'a', 't3')
+    assert admit(None, 'url', 'a', 'u1') == {'queue': 'interactive', 'priority': 0}
+
+def test_full_queue_rejects_everyone(fake_redis, monkeypatch):
+    monkeypatch.setattr(admission, 'queue_depth', lambda app, queue: 5)
+    with pytest.raises(AdmissionRejected) as rejected:
+        admit(None, 'url', 'new-client', 'job')
+    assert 'queue is full' in rejected.value.reason
+    # Two jobs past the threshold
+    assert rejected.value.retry_after == 5
+
+def test_stale_in_flight_jobs_expire(fake_redis, monkeypatch):
+    for i in range(4):
+        admit(None, 'url', 'a', f'job{i}')
+    later = time.time() + admission.INFLIGHT_TTL + 1
+    monkeypatch.setattr(admission.time, 'time', lambda: later)
+    assert admit(None, 'url', 'a', 'job4')['priority'] == 0
+
+def test_redis_outage_admits_without_fair_share(monkeypatch):
+    class DownRedis:
+        def __getattr__(self, name):
+            def fail(*args, **kwargs):
+                raise redis.ConnectionError('down')
+            return fail
+
+    monkeypatch.setattr(admission, '_redis', DownRedis())
+    assert admit(None, 'url', 'a', 'job') == {'queue': 'interactive', 'priority': 0}
+    release('url', 'a', 'job')
@@ -0,0 +1,65 @@
+import asyncio
+from unittest import mock
+
+import httpx
+import pytest
+
+pytest.importorskip('torch')
+
+from database.crud import create_analysis_job, save_analysis_results, update_job_status
+
+# celery_worker loads the models at import time; the API tests need none
+with mock.patch('models.nlp_pipeline.NLPPipeline'):
+    from main import CompressionMiddleware, app
+
+class Client:
+    """Synchronous requests against the app, without its startup event."""
+
+    def get(self, path, headers=None):
+        async def request():
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url='http://test') as client:
+                return await client.get(path, headers=headers)
+        return asyncio.run(request())
+
+@pytest.fixture
+def client(db):
+    return Client()
+
+def test_results_are_served_with_a_weak_etag_and_304_when_unchanged(client):
+    create_analysis_job('job-1', 'url', 'https://example.com/a')
+    pending = client.get('/api/v1/results/job-1')
+    assert pending.status_code == 200
+    assert pending.headers['etag'].startswith('W/"')
+
+    update_job_status('job-1', 'completed', 100)
+    save_analysis_results('job-1', {'sentiment': {'label': 'neutral', 'score': 0.5}})
+    completed = client.get('/api/v1/results/job-1')
+    etag = completed.headers['etag']
+    assert etag != pending.headers['etag']
+    assert completed.json()['results'] == {'sentiment': {'label': 'neutral', 'score': 0.5}}
+
+    not_modified = client.get('/api/v1/results/job-1', headers={'If-None-Match': etag})
+    assert not_modified.status_code == 304
+    assert not_modified.content == b''
+    assert not_modified.headers['etag'] == etag
+
+    # Weak comparison: the same tag without W/ (or among others) matches too
+    for tag in (etag.removeprefix('W/'), f'"other", {etag}', '*'):
+        assert client.get('/api/v1/results/job-1', headers={'If-None-Match': tag}).status_code == 304
+    assert client.get('/api/v1/results/job-1', headers={'If-None-Match': pending.headers['etag']}).status_code == 200
+
+def test_unknown_job_is_404(client):
+    assert client.get('/api/v1/results/missing').status_code == 404
+
+@pytest.mark.parametrize('path, query, excluded', [
+    ('/api/v1/export', b'format=parquet', True),
+    ('/api/v1/export', b'format=parquet&since=2024-01-01', True),
+    ('/api/v1/export', b'format=ndjson', False),
+    ('/api/v1/export', b'', False),
+    ('/api/v1/results/job-1', b'format=parquet', False),
+])
+def test_only_parquet_exports_skip_compression(path, query, excluded):
+    middleware = CompressionMiddleware(app)
+    scope = {'type': 'http', 'path': path, 'query_string': query}
+    assert middleware._is_handler_excluded(scope) is excluded
@@ -0,0 +1,113 @@
+import io
+import sys
+import types
+from datetime import datetime
+
+import pytest
+
+from database import crud
+from database.crud import (
+    archive_old_results,
+    create_analysis_job,
+    get_job_results,
+    iter_job_results,
+    save_analysis_results,
+    update_job_status,
+)
+from database.models import AnalysisResults
+from services import archive
+
+OLD = datetime(2024, 1, 15)
+RESULTS = {'hoax_label': 'hoax', 'articles': [{'title': 'Banjir', 'content': 'x' * 500}]}
+
+@pytest.fixture
+def archive_url(monkeypatch):
+    """Point the archive at a URL, with fresh store, client and hot cache."""
+    monkeypatch.setattr(archive, '_store', None)
+    monkeypatch.setattr(archive, '_s3_client', None)
+    monkeypatch.setattr(archive, '_hot_cache', type(archive._hot_cache)())
+
+    def use(url):
+        monkeypatch.setattr(archive, 'ARCHIVE_URL', url)
+    return use
+
+class FakeS3:
+    """The put_object/get_object subset of a boto3 S3 client, in memory."""
+
+    def __init__(self):
+        self.objects = {}
+
+    def put_object(self, Bucket, Key, Body, **extra):
+        self.objects[(Bucket, Key)] = (Body, extra)
+
+    def get_object(self, Bucket, Key):
+        return {'Body': io.BytesIO(self.objects[(Bucket, Key)][0])}
+
+def completed_job(job_id, created_at=None):
+    create_analysis_job(job_id, 'url', f'https://example.com/{job_id}')
+    save_analysis_results(job_id, RESULTS)
+    update_job_status(job_id, 'completed', 100)
+    db = crud.get_session()
+    try:
+        row = db.query(AnalysisResults).filter(AnalysisResults.job_id == job_id).one()
+        row.created_at = created_at or datetime.utcnow()
+        db.commit()
+    finally:
+        db.close()
+
+def stored_row(job_id):
+    db = crud.get_session()
+    try:
+        return db.query(AnalysisResults).filter(AnalysisResults.job_id == job_id).one()
+    finally:
+        db.close()
+
+def test_archival_is_off_without_an_archive_url(db, archive_url):
+    archive_url('')
+    completed_job('old', OLD)
+    assert archive_old_results(older_than_days=30) == 0
+    assert stored_row('old').results_data == RESULTS
+
+def test_old_results_round_trip_through_a_local_archive(db, archive_url, tmp_path):
+    archive_url(str(tmp_path / 'archive'))
+    completed_job('old', OLD)
+    completed_job('new')
+
+    assert archive_old_results(older_than_days=30) == 1
+
+    row = stored_row('old')
+    assert row.results_data is None and row.archived_at is not None
+    assert row.archive_key == 'file://' + str(tmp_path / 'archive' / 'results' / '2024' / '01' / 'old.json.zst')
+    assert stored_row('new').archive_key is None
+
+    assert get_job_results('old') == RESULTS
+    # Served from the hot cache once hydrated
+    assert row.archive_key in archive._hot_cache
+    assert {job['job_id']: job['results'] for job in iter_job_results()} == {'old': RESULTS, 'new': RESULTS}
+    # Nothing left to archive
+    assert archive_old_results(older_than_days=30) == 0
+
+def test_old_results_round_trip_through_s3(db, archive_url, monkeypatch):
+    s3 = FakeS3()
+    endpoints = []
+
+    def client(service, endpoint_url=None):
+        assert service == 's3'
+        endpoints.append(endpoint_url)
+        return s3
+
+    monkeypatch.setitem(sys.modules, 'boto3', types.SimpleNamespace(client=client))
+    monkeypatch.setenv('ARCHIVE_S3_ENDPOINT', 'http://minio:9000')
+    archive_url('s3://hoaxalyzer/archive')
+    completed_job('old', OLD)
+
+    assert archive_old_results(older_than_days=30) == 1
+
+    assert stored_row('old').archive_key == 's3://hoaxalyzer/archive/results/2024/01/old.json.zst'
+    body, extra = s3.objects[('hoaxalyzer', 'archive/results/2024/01/old.json.zst')]
+    assert extra['ContentEncoding'] == 'zstd'
+    assert archive.unpack(body) == RESULTS
+
+    assert get_job_results('old') == RESULTS
+    # Both the writer and the reader honour ARCHIVE_S3_ENDPOINT (MinIO)
+    assert endpoints == ['http://minio:9000', 'http://minio:9000']
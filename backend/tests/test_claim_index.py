@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+
+from models.claim_index import ClaimIndex
+
+DIM = 8
+
+def vectors(count, seed=0):
+    return np.random.default_rng(seed).normal(size=(count, DIM)).astype(np.float32)
+
+def claims(count, prefix='klaim'):
+    return [{'text': f'{prefix} {i}', 'label': 'hoax' if i % 2 else 'factual'} for i in range(count)]
+
+def test_missing_index_needs_a_dimension(tmp_path):
+    with pytest.raises(ValueError):
+        ClaimIndex(str(tmp_path / 'index'))
+
+def test_exact_search_before_training(tmp_path):
+    index = ClaimIndex(str(tmp_path), dim=DIM)
+    assert index.search(vectors(1)[0]) == []
+
+    data = vectors(20)
+    index.add(data, claims(20))
+    assert len(index) == 20
+
+    results = index.search(data[7] * 3.0, k=2)
+    assert results[0]['text'] == 'klaim 7'
+    assert results[0]['similarity'] == pytest.approx(1.0, abs=1e-5)
+    assert results[0]['similarity'] >= results[1]['similarity']
+
+def test_search_after_training_and_adding(tmp_path):
+    index = ClaimIndex(str(tmp_path), dim=DIM)
+    data = vectors(64)
+    index.add(data, claims(64))
+    index.train(nlist=4)
+    assert index.centroids.shape == (4, DIM)
+
+    # Rows added after training are assigned to a list on insert
+    extra = vectors(3, seed=1)
+    index.add(extra, claims(3, prefix='baru'))
+    assert sum(len(ids) for ids in index.lists.values()) == 67
+    assert index.search(extra[2], k=1, nprobe=1)[0]['text'] == 'baru 2'
+    assert index.search(data[10], k=1, nprobe=4)[0]['text'] == 'klaim 10'
+
+def test_unassigned_rows_are_still_searched(tmp_path):
+    index = ClaimIndex(str(tmp_path), dim=DIM)
+    index.add(vectors(32), claims(32))
+    index.train(nlist=4)
+    extra = vectors(2, seed=2)
+    index.add(extra, claims(2, prefix='baru'))
+
+    # Drop the assignments of the last rows, as if a writer died between
+    # appending vectors and their list assignments
+    assignments = np.fromfile(str(tmp_path / 'assignments.i32'), dtype=np.int32)
+    assignments[:32].tofile(str(tmp_path / 'assignments.i32'))
+
+    reopened = ClaimIndex(str(tmp_path))
+    assert len(reopened) == 34
+    assert sum(len(ids) for ids in reopened.lists.values()) == 32
+    result = reopened.search(extra[1], k=1, nprobe=1)[0]
+    assert result['text'] == 'baru 1'
+
+def test_other_instances_see_appended_rows(tmp_path):
+    writer = ClaimIndex(str(tmp_path), dim=DIM)
+    reader = ClaimIndex(str(tmp_path))
+    data = vectors(5)
+    writer.add(data, claims(5))
+    assert reader.search(data[3], k=1)[0]['text'] == 'klaim 3'
@@ -0,0 +1,167 @@
+from collections import OrderedDict
+
+import numpy as np
+import pytest
+
+pytest.importorskip('torch')
+
+from models.claim_index import ClaimIndex
+from models.nlp_pipeline import NLPPipeline
+
+DIM = 8
+
+def bare_pipeline(**settings):
+    """An NLPPipeline without models; tests stub the parts they call."""
+    pipeline = NLPPipeline.__new__(NLPPipeline)
+    pipeline.claim_index = None
+    pipeline.claim_match_threshold = 0.92
+    pipeline.claim_augment_threshold = 0.80
+    pipeline.claim_nprobe = 8
+    pipeline._embedding_cache = OrderedDict()
+    pipeline.__dict__.update(settings)
+    return pipeline
+
+def stub_hoax_model(pipeline, embeddings, hoax_prob=0.3):
+    """Serve hoax predictions and encoder states per text; record what was classified."""
+    classified = []
+    pipeline.hoax_tokenizer = None
+    pipeline.hoax_model = None
+    pipeline.encode = lambda texts, tokenizer=None: list(texts)
+
+    def predict(model_name, model, tokenizer, texts, with_embeddings=False):
+        classified.extend(texts)
+        probabilities = np.array([[1 - hoax_prob, hoax_prob]] * len(texts), dtype=np.float32)
+        return probabilities, np.stack([embeddings[text] for text in texts]) if with_embeddings else None
+
+    pipeline._predict = predict
+    return classified
+
+def test_cached_texts_matching_a_known_claim_skip_the_classifier(tmp_path):
+    rng = np.random.default_rng(0)
+    known, fresh = rng.normal(size=(2, DIM)).astype(np.float32)
+    index = ClaimIndex(str(tmp_path), dim=DIM)
+    index.add(known[None, :], [{'text': 'vaksin berisi chip', 'label': 'hoax'}])
+
+    pipeline = bare_pipeline(claim_index=index)
+    classified = stub_hoax_model(pipeline, {'lama': known, 'baru': fresh})
+
+    # First sighting: classified, then matched on the encoder states
+    [first] = pipeline.classify_hoax_batch(['lama'])
+    assert first['label'] == 'hoax' and first['matched_claim']['text'] == 'vaksin berisi chip'
+    assert classified == ['lama']
+
+    # Seen again: the cached embedding decides without a forward pass
+    results = pipeline.classify_hoax_batch(['baru', 'lama'])
+    assert classified == ['lama', 'baru']
+    assert results[1] == first
+    assert 'matched_claim' not in results[0]
+    assert results[0]['probability'] == pytest.approx(0.3)
+
+def test_results_without_a_claim_index_come_from_the_classifier():
+    pipeline = bare_pipeline()
+    classified = stub_hoax_model(pipeline, {}, hoax_prob=0.9)
+
+    [result] = pipeline.classify_hoax_batch(['teks'])
+    assert classified == ['teks']
+    assert result['label'] == 'hoax'
+    assert result['probability'] == pytest.approx(0.9)
+
+def linear(*labels):
+    return [{'label': label, 'score': 0.55, 'model': 'linear'} for label in labels]
+
+def test_escalate_runs_only_uncertain_texts_through_indobert():
+    pipeline = bare_pipeline(cascade_audit_rate=0.0)
+    escalated = []
+
+    def run_batch(texts):
+        escalated.append(texts)
+        return [{'label': 'negative', 'score': 0.9} for _ in texts]
+
+    results, stats = pipeline._escalate(
+        'sentiment', ['a', 'b', 'c'], linear('positive', 'negative', 'neutral'),
+        [True, False, True], run_batch,
+    )
+
+    # One batch for all escalated texts
+    assert escalated == [['a', 'c']]
+    assert [r['model'] for r in results] == ['indobert', 'linear', 'indobert']
+    assert results[1] == linear('negative')[0]
+    assert stats['escalated'] == 2 and stats['audited'] == 0
+    assert stats['escalation_rate'] == pytest.approx(2 / 3)
+    # Neither escalated text kept its linear label
+    assert (stats['compared'], stats['agreed'], stats['agreement']) == (2, 0, 0.0)
+
+def test_escalate_audits_confident_texts_and_uses_the_given_decision():
+    pipeline = bare_pipeline(cascade_audit_rate=1.0)
+    hoax = [{'label': 'factual', 'probability': 0.1, 'model': 'linear'}]
+
+    results, stats = pipeline._escalate(
+        'hoax', ['a'], hoax, [False],
+        lambda texts: [{'label': 'uncertain', 'probability': 0.45} for _ in texts],
+        lambda a, b: (a['probability'] >= 0.5) == (b['probability'] >= 0.5),
+    )
+
+    assert results[0]['model'] == 'indobert'
+    assert (stats['escalated'], stats['audited'], stats['escalation_rate']) == (0, 1, 0.0)
+    # Different labels, same side of 0.5
+    assert stats['agreement'] == 1.0
+
+def test_escalate_without_uncertain_texts_skips_indobert():
+    pipeline = bare_pipeline(cascade_audit_rate=0.0)
+
+    def run_batch(texts):
+        raise AssertionError('IndoBERT should not run')
+
+    results, stats = pipeline._escalate('sentiment', ['a'], linear('positive'), [False], run_batch)
+    assert results == linear('positive')
+    assert stats['agreement'] is None
+
+@pytest.fixture
+def tokenizer(tmp_path):
+    from transformers import BertTokenizerFast
+
+    vocab = tmp_path / 'vocab.txt'
+    vocab.write_text('\n'.join(['[PAD]', '[UNK]', '[CLS]', '[SEP]', '[MASK]', 'berita', 'palsu', 'banjir']))
+    return BertTokenizerFast(vocab_file=str(vocab))
+
+def test_encode_caches_ids_truncated_to_the_windows_read(tokenizer):
+    pipeline = bare_pipeline(
+        sentiment_tokenizer=tokenizer, max_length=6, max_chunks=2,
+        token_cache_size=2, _token_cache=OrderedDict(),
+    )
+
+    [ids] = pipeline.encode(['berita palsu ' * 10])
+    # Two windows of 6 - [CLS] - [SEP] tokens
+    assert ids.typecode == 'i' and len(ids) == 8
+    assert pipeline.encode(['berita palsu ' * 10])[0] is ids
+
+    pipeline.encode(['banjir', 'palsu'])
+    assert len(pipeline._token_cache) == 2
+
+def test_each_text_counts_as_one_cache_lookup_per_job(tokenizer, monkeypatch):
+    from services import telemetry
+    from services.telemetry import job_timer
+
+    counted = []
+
+    class Counter:
+        def labels(self, cache, result):
+            counted.append(result)
+            return self
+
+        def inc(self):
+            pass
+
+    monkeypatch.setattr(telemetry, 'CACHE_REQUESTS', Counter())
+    pipeline = bare_pipeline(
+        sentiment_tokenizer=tokenizer, max_length=512, max_chunks=1,
+        token_cache_size=16, _token_cache=OrderedDict(),
+    )
+
+    with job_timer('analyze_url_task'):
+        # Sentiment, then hoax through the shared tokenizer
+        pipeline.encode(['berita banjir'])
+        pipeline.encode(['berita banjir'])
+    with job_timer('analyze_url_task'):
+        pipeline.encode(['berita banjir'])
+    assert counted == ['miss', 'hit']
@@ -0,0 +1,62 @@
+import pytest
+
+from services import quality
+from services.quality import check_quality, detect_language, gate_items
+
+INDONESIAN = (
+    'Pemerintah mengumumkan bahwa harga beras akan naik pada bulan depan karena '
+    'panen yang gagal di beberapa daerah dan warga diminta untuk tidak panik.'
+)
+ENGLISH = (
+    'The government said that the price of rice will rise next month because the '
+    'harvest failed in several regions and people were asked not to panic.'
+)
+
+def check(text):
+    return check_quality(text, text.lower())
+
+def test_detect_language():
+    assert detect_language(INDONESIAN) == 'id'
+    assert detect_language(ENGLISH) == 'en'
+    assert detect_language('Правительство объявило о повышении цен на рис') == 'other'
+    assert detect_language('wkwk mantul') == 'unknown'
+
+def test_indonesian_article_is_usable():
+    assert check(INDONESIAN) == {'usable': True, 'reason': None, 'language': 'id'}
+
+def test_short_slangy_text_of_unknown_language_is_usable():
+    result = check('Mantul gan, banjir Kemang parah bgt wkwk')
+    assert result['usable']
+    assert result['language'] == 'unknown'
+
+@pytest.mark.parametrize('text, reason', [
+    ('Banjir lagi', 'too_short'),
+    ('Lorem ipsum dolor sit amet, consectetur adipiscing elit sed do eiusmod', 'lorem_ipsum'),
+    ('Situs ini menggunakan cookie untuk pengalaman terbaik. Setujui penggunaan cookie?', 'cookie_banner'),
+    ('Halaman tidak ditemukan, silakan kembali ke beranda situs kami', 'error_page'),
+    (ENGLISH, 'language'),
+    (' '.join(['promo murah'] * 15), 'repetitive'),
+])
+def test_unusable_text_gets_a_reason(text, reason):
+    result = check(text)
+    assert not result['usable']
+    assert result['reason'] == reason
+
+def test_length_is_judged_on_the_cleaned_text():
+    assert check_quality(INDONESIAN, 'harga beras')['reason'] == 'too_short'
+
+def test_gate_items_splits_and_annotates(monkeypatch):
+    monkeypatch.setattr(quality, 'QUALITY_GATE', 'flag')
+    items = [
+        {'text': INDONESIAN, 'cleaned_text': INDONESIAN.lower()},
+        {'text': ENGLISH, 'cleaned_text': ENGLISH.lower()},
+    ]
+    usable, gated = gate_items(items)
+    assert [item['text'] for item in usable] == [INDONESIAN]
+    assert gated[0]['quality']['reason'] == 'language'
+    assert 'quality' not in items[0]
+
+def test_gate_off_passes_everything(monkeypatch):
+    monkeypatch.setattr(quality, 'QUALITY_GATE', 'off')
+    items = [{'text': 'Banjir', 'cleaned_text': 'banjir'}]
+    assert gate_items(items) == (items, [])
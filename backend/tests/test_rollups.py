@@ -0,0 +1,94 @@
+from datetime import datetime
+
+import pytest
+
+from database.crud import add_rollup_items, query_rollups
+from services.rollups import build_rollup_deltas, bucket_start, rollup_item_key
+
+NOW = datetime(2024, 5, 10, 12, 34, 56)
+
+def test_bucket_start_truncates_to_hour_and_day():
+    assert bucket_start(NOW, 'hour') == datetime(2024, 5, 10, 12)
+    assert bucket_start(NOW, 'day') == datetime(2024, 5, 10)
+
+def test_deltas_per_source_granularity_and_bucket():
+    items = [
+        {'source': 'Twitter', 'date': '2024-05-10T08:15:00'},
+        {'source': 'Twitter', 'date': '2024-05-10T08:45:00Z'},
+        {'source': 'Twitter', 'date': '2024-05-10T09:05:00'},
+        {'source': 'Kompas.com', 'date': '2024-05-10T08:30:00'},
+    ]
+    sentiments = [
+        {'label': 'positive', 'score': 0.9},
+        {'label': 'negative', 'score': 0.7},
+        {'label': 'neutral', 'score': 0.5},
+        {'label': 'positive', 'score': 0.6},
+    ]
+    hoaxes = [{'probability': p} for p in (0.1, 0.8, 0.5, 0.3)]
+
+    deltas = build_rollup_deltas(items, sentiments, hoaxes, now=NOW)
+
+    assert set(deltas) == {
+        ('Twitter', 'hour', datetime(2024, 5, 10, 8)),
+        ('Twitter', 'hour', datetime(2024, 5, 10, 9)),
+        ('Twitter', 'day', datetime(2024, 5, 10)),
+        ('Kompas.com', 'hour', datetime(2024, 5, 10, 8)),
+        ('Kompas.com', 'day', datetime(2024, 5, 10)),
+    }
+    eight = deltas[('Twitter', 'hour', datetime(2024, 5, 10, 8))]
+    assert (eight['count'], eight['positive'], eight['negative'], eight['neutral']) == (2, 1, 1, 0)
+    assert eight['sentiment_score_sum'] == 0.9 + 0.7
+    assert eight['hoax_prob_sum'] == 0.1 + 0.8
+
+    day = deltas[('Twitter', 'day', datetime(2024, 5, 10))]
+    assert day['count'] == 3
+    assert day['hoax_prob_sum'] == 0.1 + 0.8 + 0.5
+
+def test_missing_or_invalid_dates_fall_back_to_now():
+    items = [{'source': 'Twitter'}, {'source': 'Twitter', 'date': 'kemarin'}]
+    sentiments = [{'label': 'neutral', 'score': 0.5}] * 2
+    hoaxes = [{'probability': 0.5}] * 2
+
+    deltas = build_rollup_deltas(items, sentiments, hoaxes, now=NOW)
+    assert deltas[('Twitter', 'hour', datetime(2024, 5, 10, 12))]['count'] == 2
+
+def test_no_items_no_deltas():
+    assert build_rollup_deltas([], [], [], now=NOW) == {}
+
+def test_item_key_falls_back_to_a_hash_of_the_url_or_text():
+    assert rollup_item_key({'id': 42, 'source': 'Twitter'}) == ('Twitter', '42')
+    by_url = rollup_item_key({'url': 'https://example.com/a', 'text': 'x'})
+    assert by_url[0] == 'Unknown' and by_url[1].startswith('sha1:')
+    assert by_url == rollup_item_key({'url': 'https://example.com/a', 'text': 'y'})
+    assert rollup_item_key({'text': 'x'}) != rollup_item_key({'text': 'y'})
+
+def _rows(keyword):
+    return query_rollups(keyword, 'day', datetime(2000, 1, 1), datetime(2100, 1, 1))
+
+def test_rollup_items_are_counted_once_across_runs(db):
+    items = [
+        {'id': '1', 'source': 'Twitter', 'date': '2024-05-10T08:15:00'},
+        {'id': '2', 'source': 'Twitter', 'date': '2024-05-10T08:45:00'},
+        # Same tweet twice in one crawl
+        {'id': '2', 'source': 'Twitter', 'date': '2024-05-10T08:45:00'},
+    ]
+    sentiments = [{'label': 'positive', 'score': 0.9}] * 3
+    hoaxes = [{'probability': 0.2}] * 3
+
+    assert add_rollup_items('banjir', items, sentiments, hoaxes) == 2
+    # A re-crawl of the same window only adds the new item
+    items.append({'id': '3', 'source': 'Twitter', 'date': '2024-05-10T09:05:00'})
+    assert add_rollup_items('banjir', items, sentiments + sentiments[:1], hoaxes + hoaxes[:1]) == 1
+
+    [day] = _rows('banjir')
+    assert (day['count'], day['positive']) == (3, 3)
+    assert day['hoax_prob_sum'] == pytest.approx(0.6)
+
+def test_rollup_item_ids_are_per_keyword(db):
+    item = [{'id': '1', 'source': 'Twitter', 'date': '2024-05-10T08:15:00'}]
+    sentiment = [{'label': 'negative', 'score': 0.8}]
+    hoax = [{'probability': 0.9}]
+
+    assert add_rollup_items('banjir', item, sentiment, hoax) == 1
+    assert add_rollup_items('gempa', item, sentiment, hoax) == 1
+    assert [row['count'] for row in _rows('banjir') + _rows('gempa')] == [1, 1]
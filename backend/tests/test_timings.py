@@ -0,0 +1,47 @@
+
+from database.crud import create_analysis_job, get_job_results, save_analysis_results, save_result_timings
+from services import telemetry
+from services.telemetry import job_timer, record_cache, span
+
+def test_spans_are_attributed_to_the_current_job():
+    with job_timer('analyze_url_task') as timer:
+        for _ in range(2):
+            with span('forward'):
+                pass
+        with span('db_write'):
+            pass
+
+    stages = timer.to_dict()['stages']
+    assert stages['forward']['count'] == 2
+    assert stages['db_write']['count'] == 1
+
+def test_metric_failures_do_not_fail_the_job(monkeypatch):
+    class Broken:
+        def labels(self, **labels):
+            raise FileNotFoundError('/tmp/hoaxalyzer-metrics/counter_1.db')
+
+    monkeypatch.setattr(telemetry, 'CACHE_REQUESTS', Broken())
+    monkeypatch.setattr(telemetry, 'STAGE_SECONDS', Broken())
+
+    record_cache('token', hit=True)
+    with job_timer('analyze_url_task') as timer:
+        with span('forward'):
+            pass
+    assert timer.to_dict()['stages']['forward']['count'] == 1
+
+def test_save_result_timings_replaces_only_the_timings(db):
+    create_analysis_job('job-1', 'url', 'https://example.com/a')
+    save_analysis_results('job-1', {
+        'sentiment': {'label': 'positive', 'score': 0.9},
+        'timings': {'stages': {}},
+    })
+
+    save_result_timings('job-1', {'total_seconds': 1.5, 'stages': {'db_write': {'seconds': 0.25, 'count': 1}}})
+
+    results = get_job_results('job-1')
+    assert results['sentiment'] == {'label': 'positive', 'score': 0.9}
+    assert results['timings'] == {'total_seconds': 1.5, 'stages': {'db_write': {'seconds': 0.25, 'count': 1}}}
+
+def test_save_result_timings_without_results_is_a_no_op(db):
+    save_result_timings('missing', {'total_seconds': 1.0})
+    assert get_job_results('missing') is None
@@ -0,0 +1,52 @@
+from datetime import datetime
+
+from services import topic_watch
+from services.topic_watch import merge_into_aggregate
+
+NOW = datetime(2024, 5, 10, 12, 0)
+
+def scored(date, label='positive', score=0.8, prob=0.2, source='Twitter'):
+    return (
+        {'id': date, 'source': source, 'date': date, 'text': 'teks'},
+        {'label': label, 'score': score},
+        {'probability': prob},
+    )
+
+def merge(aggregate, rows, now=NOW):
+    items, sentiments, hoaxes = zip(*rows) if rows else ([], [], [])
+    return merge_into_aggregate(aggregate, list(items), list(sentiments), list(hoaxes), ['banjir'], now=now)
+
+def test_items_are_bucketed_by_publication_day():
+    aggregate = merge(None, [
+        scored('2024-05-10T08:00:00'),
+        scored('2024-05-10T09:00:00', label='negative', score=0.6, prob=0.9, source='Kompas.com'),
+        scored('2024-05-09T23:00:00'),
+    ])
+    day = aggregate['days']['2024-05-10']
+    assert day['count'] == 2
+    assert (day['positive'], day['negative']) == (1, 1)
+    assert day['hoax_prob_sum'] == 0.2 + 0.9
+    assert day['sources'] == {
+        'Twitter': {'count': 1, 'sentiment_sum': 0.8},
+        'Kompas.com': {'count': 1, 'sentiment_sum': 0.6},
+    }
+    assert aggregate['days']['2024-05-09']['count'] == 1
+
+def test_merging_adds_to_existing_buckets_without_mutating_them():
+    first = merge(None, [scored('2024-05-10T08:00:00')])
+    second = merge(first, [scored('2024-05-10T10:00:00')])
+    assert second['days']['2024-05-10']['count'] == 2
+    assert first['days']['2024-05-10']['count'] == 1
+    assert second['keyword_counts'] == {'banjir': 2}
+
+def test_days_outside_the_window_are_pruned(monkeypatch):
+    monkeypatch.setattr(topic_watch, 'WATCH_WINDOW_DAYS', 7)
+    aggregate = merge(None, [scored('2024-05-01T08:00:00'), scored('2024-05-08T08:00:00')], now=datetime(2024, 5, 8))
+    # The day exactly WATCH_WINDOW_DAYS back is still inside the window
+    assert set(aggregate['days']) == {'2024-05-01', '2024-05-08'}
+
+    # A later run drops days that fell out of the window, including old new items
+    later = datetime(2024, 5, 14, 12)
+    aggregate = merge(aggregate, [scored('2024-04-20T08:00:00')], now=later)
+    assert set(aggregate['days']) == {'2024-05-08'}
+    assert aggregate['updated_at'] == later.isoformat()
@@ -0,0 +1,44 @@
+from services.twitter_crawler import advance_cursors, is_new_item
+
+def item(item_id, date, source='Twitter'):
+    return {'id': item_id, 'date': date, 'source': source}
+
+def test_everything_is_new_without_cursor():
+    assert is_new_item(item('1', '2024-05-01T10:00:00'), None)
+    assert is_new_item(item('1', '2024-05-01T10:00:00'), {'last_date': None, 'last_ids': []})
+
+def test_items_past_or_before_the_high_water_mark():
+    cursor = {'last_date': '2024-05-01T10:00:00', 'last_ids': ['1']}
+    assert is_new_item(item('2', '2024-05-01T10:00:01'), cursor)
+    assert not is_new_item(item('3', '2024-05-01T09:59:59'), cursor)
+
+def test_ties_at_the_high_water_mark_are_decided_by_id():
+    cursor = {'last_date': '2024-05-01T10:00:00', 'last_ids': ['1']}
+    assert not is_new_item(item('1', '2024-05-01T10:00:00'), cursor)
+    assert is_new_item(item('2', '2024-05-01T10:00:00'), cursor)
+
+def test_advance_keeps_all_ids_sharing_the_newest_date():
+    cursors = advance_cursors(None, [
+        item('1', '2024-05-01T10:00:00'),
+        item('2', '2024-05-01T10:00:00'),
+        item('0', '2024-05-01T09:00:00'),
+    ])
+    assert cursors == {'Twitter': {'last_date': '2024-05-01T10:00:00', 'last_ids': ['1', '2']}}
+
+    # A later crawl at the same timestamp only adds the unseen id
+    cursors = advance_cursors(cursors, [item('2', '2024-05-01T10:00:00'), item('3', '2024-05-01T10:00:00')])
+    assert cursors['Twitter']['last_ids'] == ['1', '2', '3']
+
+def test_advance_resets_ids_on_a_newer_date_and_tracks_sources_separately():
+    cursors = {'Twitter': {'last_date': '2024-05-01T10:00:00', 'last_ids': ['1', '2']}}
+    advanced = advance_cursors(cursors, [
+        item('4', '2024-05-01T11:00:00'),
+        item('a', '2024-04-30T08:00:00', source='Kompas.com'),
+        {'id': 'undated', 'source': 'Twitter'},
+    ])
+    assert advanced == {
+        'Twitter': {'last_date': '2024-05-01T11:00:00', 'last_ids': ['4']},
+        'Kompas.com': {'last_date': '2024-04-30T08:00:00', 'last_ids': ['a']},
+    }
+    # The input cursors are not modified
+    assert cursors['Twitter']['last_ids'] == ['1', '2']
@@ -0,0 +1,83 @@
+import json
+import time
+
+from services import url_batch
+from services.url_batch import (
+    CLAIMED_AT_KEY,
+    CLAIMED_KEY,
+    drain_url_batch,
+    enqueue_url_job,
+    release_claims,
+    requeue_stale_claims,
+)
+
+def park(job_id, client, enqueued_at):
+    assert enqueue_url_job(job_id, f'https://example.com/{job_id}', enqueued_at, client)
+
+def pending(redis, client):
+    return [json.loads(item)['job_id'] for item in redis.lrange(url_batch._pending_key(client), 0, -1)]
+
+def test_batches_take_one_job_per_client_in_turn(fake_redis):
+    for i in range(3):
+        park(f'a{i}', 'a', 100.0 + i)
+    park('b0', 'b', 101.5)
+    park('c0', None, 99.0)
+
+    batch = drain_url_batch(max_size=4, max_wait=0)
+
+    # Longest-waiting client first, then round robin
+    assert [job['job_id'] for job in batch] == ['c0', 'a0', 'b0', 'a1']
+    assert batch[0]['client_id'] is None
+    assert pending(fake_redis, 'a') == ['a2']
+    assert set(fake_redis.hkeys(CLAIMED_KEY)) == {b'c0', b'a0', b'b0', b'a1'}
+    assert fake_redis.zcard(CLAIMED_AT_KEY) == 4
+
+def test_drained_clients_are_forgotten(fake_redis):
+    park('a0', 'a', 100.0)
+    assert len(drain_url_batch(max_size=4, max_wait=0)) == 1
+    assert drain_url_batch(max_size=4, max_wait=0) == []
+    assert fake_redis.smembers(url_batch.CLIENTS_KEY) == set()
+
+def test_leader_waits_for_the_batch_to_fill(fake_redis, monkeypatch):
+    park('a0', 'a', time.time())
+    real_pop = url_batch._pop
+    calls = []
+
+    def pop_with_late_arrival(count):
+        batch = real_pop(count)
+        calls.append(count)
+        if len(calls) == 1:
+            park('b0', 'b', time.time())
+        return batch
+
+    monkeypatch.setattr(url_batch, '_pop', pop_with_late_arrival)
+    batch = drain_url_batch(max_size=2, max_wait=5)
+    assert [job['job_id'] for job in batch] == ['a0', 'b0']
+    assert calls == [2, 1]
+
+def test_released_jobs_are_not_requeued(fake_redis):
+    park('a0', 'a', 100.0)
+    [job] = drain_url_batch(max_size=4, max_wait=0)
+
+    release_claims([job['job_id']])
+
+    assert fake_redis.hlen(CLAIMED_KEY) == 0 and fake_redis.zcard(CLAIMED_AT_KEY) == 0
+    assert requeue_stale_claims(lease=0) == 0
+
+def test_stale_claims_go_back_to_the_front_in_order(fake_redis):
+    for i in range(3):
+        park(f'a{i}', 'a', 100.0 + i)
+    drain_url_batch(max_size=2, max_wait=0)
+
+    # Still within the lease
+    assert requeue_stale_claims(lease=60) == 0
+
+    assert requeue_stale_claims(lease=0) == 2
+    assert pending(fake_redis, 'a') == ['a0', 'a1', 'a2']
+    assert fake_redis.hlen(CLAIMED_KEY) == 0 and fake_redis.zcard(CLAIMED_AT_KEY) == 0
+    # A concurrent (or repeated) requeue finds nothing left to move
+    assert requeue_stale_claims(lease=0) == 0
+
+    requeued = drain_url_batch(max_size=3, max_wait=0)
+    assert [job['job_id'] for job in requeued] == ['a0', 'a1', 'a2']
+    assert requeued[0]['url'] == 'https://example.com/a0'